@@ -0,0 +1,261 @@
+"""Benchmark and accuracy-regression suite for the flight core.
+
+Run with `python -m arrowflight.bench`; see `main` for the options.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+import numpy as np
+from ..flight_profiles import Profile
+from ..flight_constants import Physics
+from ..flight_compute import SEARCH_METHODS, simulate_flight, solve_target
+from ..flight_sweep import sweep_grid
+from ..flight_table import build_table
+
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+CONFIG_PATH = Path(__file__).resolve().parent.parent / 'arrows.json'
+
+DT = 0.001
+ACCURACY_TARGETS = [(10.0, -10.0), (10.0, 0.0), (30.0, 2.0), (50.0, 0.0), (70.0, -5.0), (90.0, 10.0)]
+
+# solver variants checked against a tight-tolerance rk45 reference, with the holdover error each
+# is allowed [m]; bisect/ksection keep the legacy overshooting hit test and are biased by ~1 step,
+# table lookups add the bilinear interpolation error of a 2 m x 1 m grid
+METHODS = {
+    'brent_euler': 0.01,
+    'bisect_euler': 0.02,
+    'ksection_euler': 0.02,
+    'newton_euler': 0.01,
+    'sweep_euler': 0.01,
+    'table_euler': 0.015,
+    'brent_rk45': 0.001,
+}
+
+# `import arrowflight.flight` must stay below this many seconds and must not load the
+# plotting/interpolation stacks, which only the plot paths need
+IMPORT_BUDGET_S = 0.5
+LAZY_MODULES = ('matplotlib', 'readchar', 'plotly', 'scipy.optimize', 'scipy.interpolate')
+
+
+def _profiles():
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    return [Profile.from_dict(name, configs[name]) for name in sorted(configs)]
+
+
+def _measure(fn, repeat: int = 1, probe=None):
+    """Run fn `repeat` times; return (mean seconds, peak traced memory in bytes, last result).
+
+    Timing and memory are taken in separate runs since tracemalloc slows interpreted loops
+    down a lot; `probe` is a smaller representative workload to trace instead of fn.
+    """
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    seconds = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    try:
+        (probe or fn)()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def bench_simulate_flight(quick: bool = False) -> dict:
+    profile, phys = Profile('default'), Physics()
+    target_x = 50.0 if quick else 100.0
+    seconds, peak, flight = _measure(lambda: simulate_flight(0.05, profile, target_x, dt=DT, phys=phys),
+                                     repeat=3 if quick else 10)
+    steps = int(round(flight[2] / DT))
+    return {'target_x': target_x, 'steps': steps, 'seconds': seconds,
+            'steps_per_sec': steps / seconds, 'peak_memory_bytes': peak}
+
+
+def bench_find_optimal_angle(quick: bool = False) -> dict:
+    profile, phys = Profile('default'), Physics()
+    targets = ACCURACY_TARGETS[:3] if quick else ACCURACY_TARGETS
+    out = {}
+    for search in SEARCH_METHODS:
+        seconds, peak, _ = _measure(lambda: [solve_target(profile, x, y, dt=DT, phys=phys, search=search)
+                                             for x, y in targets],
+                                    probe=lambda: solve_target(profile, 10.0, 0.0, dt=DT, phys=phys, search=search))
+        out[search] = {'solves': len(targets), 'seconds': seconds,
+                       'solves_per_sec': len(targets) / seconds, 'peak_memory_bytes': peak}
+    return out
+
+
+def bench_flight_main(quick: bool = False) -> dict:
+    from ..flight import main as flight_main
+
+    def run():
+        argv = sys.argv
+        sys.argv = ['arrowflight', '50', '0', 'default', '--no-plot', '--exact', '--no-cache']
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                flight_main()
+        finally:
+            sys.argv = argv
+
+    seconds, peak, _ = _measure(run, repeat=1 if quick else 5)
+    return {'argv': '50 0 default --no-plot --exact --no-cache', 'seconds': seconds, 'peak_memory_bytes': peak}
+
+
+def bench_profile_grid(quick: bool = False) -> dict:
+    from ..calc_profile_results import frange, solve_grid
+
+    profile, phys = Profile('default'), Physics()
+    xs = list(frange(10.0, 100.0, 30.0 if quick else 10.0))
+    ys = list(frange(-10.0, 10.0, 10.0 if quick else 5.0))
+    points = [(x, y) for x in xs for y in ys]
+    pool_s, pool_peak, _ = _measure(lambda: list(solve_grid(profile, points, dt=DT, phys=phys, workers=1)),
+                                    probe=lambda: list(solve_grid(profile, [(10.0, 0.0)], dt=DT, phys=phys, workers=1)))
+
+    # the sweep solver runs the full default calc_profile_results grid
+    full = [(x, y) for x in frange(10.0, 101.0, 2.0) for y in frange(-10.0, 10.0, 1.0)]
+    sweep_s, sweep_peak, _ = _measure(lambda: sweep_grid(profile, full, dt=DT, phys=phys))
+    return {
+        'pool': {'points': len(points), 'seconds': pool_s, 'solves_per_sec': len(points) / pool_s,
+                 'peak_memory_bytes': pool_peak},
+        'sweep': {'points': len(full), 'seconds': sweep_s, 'solves_per_sec': len(full) / sweep_s,
+                  'peak_memory_bytes': sweep_peak},
+    }
+
+
+def check_startup(budget: float = IMPORT_BUDGET_S) -> dict:
+    """Import arrowflight.flight in a fresh interpreter with -X importtime and check the budget.
+
+    Also times a complete `arrowflight 50 0 --no-plot` run (table lookup path).
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(CONFIG_PATH.parent.parent),
+                                                                    os.environ.get('PYTHONPATH')])))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import arrowflight.flight'],
+                          capture_output=True, text=True, env=env, check=True)
+    imported = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            imported[parts[2].strip()] = int(parts[1]) / 1e6
+    import_s = imported.get('arrowflight.flight')
+    loaded = sorted(m for m in imported if m.split('.')[0] in LAZY_MODULES or m in LAZY_MODULES)
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'arrowflight.flight', '50', '0', '--no-plot', '--no-cache'],
+                   capture_output=True, env=env, check=True)
+    cli_s = time.perf_counter() - start
+
+    failures = []
+    if import_s is None or import_s > budget:
+        failures.append(f"import arrowflight.flight took {import_s} s > budget {budget} s")
+    if loaded:
+        failures.append(f"import arrowflight.flight loads {', '.join(loaded)}")
+    return {'import_seconds': import_s, 'budget_seconds': budget, 'cli_no_plot_seconds': cli_s,
+            'eager_plotting_modules': loaded, 'failures': failures}
+
+
+def accuracy_holdovers() -> dict:
+    """Holdover [m] of every METHODS variant and of the reference, per profile and target."""
+    phys = Physics()
+    out = {}
+    for profile in _profiles():
+        # grid nodes sit halfway between the targets so the lookups really interpolate
+        table = build_table(profile, phys, x_range=(9.0, 2.0, 91.0), y_range=(-10.5, 1.0, 10.5), dt=DT)
+        sweep = sweep_grid(profile, ACCURACY_TARGETS, dt=DT, phys=phys)
+        for (x, y), swept in zip(ACCURACY_TARGETS, sweep):
+            case = f"{profile.name}@{x:g},{y:g}"
+            looked_up = table.lookup(x, y)
+            ref = solve_target(profile, x, y, dt=DT, phys=phys, integrator='rk45', rtol=1e-11, atol=1e-11,
+                               holdover_tol=1e-9)
+            out[case] = {
+                'reference': ref.holdover,
+                'brent_euler': solve_target(profile, x, y, dt=DT, phys=phys).holdover,
+                'bisect_euler': solve_target(profile, x, y, dt=DT, phys=phys, search='bisect').holdover,
+                'ksection_euler': solve_target(profile, x, y, dt=DT, phys=phys, search='ksection').holdover,
+                'newton_euler': solve_target(profile, x, y, dt=DT, phys=phys, search='newton').holdover,
+                'sweep_euler': swept.holdover,
+                # None where the table cell touches an unreachable grid point
+                'table_euler': looked_up.holdover if looked_up is not None else None,
+                'brent_rk45': solve_target(profile, x, y, dt=DT, phys=phys, integrator='rk45').holdover,
+            }
+    return out
+
+
+def check_accuracy(holdovers: dict, baseline: dict = None, baseline_tol: float = 1e-3) -> dict:
+    """Compare holdovers with the reference (METHODS tolerances) and with a stored baseline."""
+    failures = []
+    max_err = {m: 0.0 for m in METHODS}
+    max_drift = {m: 0.0 for m in METHODS}
+    for case, values in holdovers.items():
+        for method, tol in METHODS.items():
+            if values.get(method) is None:
+                continue
+            err = abs(values[method] - values['reference'])
+            max_err[method] = max(max_err[method], err)
+            if err > tol:
+                failures.append(f"{case} {method}: |holdover - reference| = {err:.5f} m > {tol} m")
+            if baseline is not None and baseline.get(case, {}).get(method) is not None:
+                drift = abs(values[method] - baseline[case][method])
+                max_drift[method] = max(max_drift[method], drift)
+                if drift > baseline_tol:
+                    failures.append(f"{case} {method}: moved {drift:.5f} m from baseline > {baseline_tol} m")
+    report = {'max_error_vs_reference': max_err, 'tolerances': METHODS, 'failures': failures}
+    if baseline is not None:
+        report['max_drift_vs_baseline'] = max_drift
+        report['baseline_tolerance'] = baseline_tol
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m arrowflight.bench',
+                                     description="Time the flight core and check holdover accuracy against a reference and a stored baseline.")
+    parser.add_argument('--quick', action='store_true', help='Smaller workloads for a fast smoke run')
+    parser.add_argument('--skip-timing', action='store_true', help='Only run the accuracy checks')
+    parser.add_argument('--output', '-o', default=None, help='Write the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help='Baseline holdovers JSON (default: bundled baseline.json)')
+    parser.add_argument('--baseline-tol', type=float, default=1e-3, help='Allowed holdover drift from the baseline in meters (default: 0.001)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the current holdovers as the new baseline')
+    args = parser.parse_args(argv)
+
+    report = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform()}
+    if not args.skip_timing:
+        report['simulate_flight'] = bench_simulate_flight(args.quick)
+        report['find_optimal_angle'] = bench_find_optimal_angle(args.quick)
+        report['flight_main'] = bench_flight_main(args.quick)
+        report['profile_grid'] = bench_profile_grid(args.quick)
+
+    holdovers = accuracy_holdovers()
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if args.update_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(holdovers, f, indent=2, sort_keys=True)
+            f.write('\n')
+    elif baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    report['accuracy'] = check_accuracy(holdovers, baseline, args.baseline_tol)
+    report['startup'] = check_startup()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+
+    failures = report['accuracy']['failures'] + report['startup']['failures']
+    if failures:
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        sys.exit(1)
@@ -1,15 +1,123 @@
 # parent.py
 import argparse
-import subprocess
 import sys
-import csv
-import re
+import json
 from pathlib import Path
 import time
 import concurrent.futures
-import threading
 import itertools
 import os
+from dataclasses import asdict, replace
+from typing import List, Sequence, Tuple
+from .flight_profiles import Profile
+from .flight_constants import Physics
+from .flight_compute import SolveInfo, SolveResult
+from .flight_sweep import sweep_grid
+from .flight_cache import SolveCache, cached_solve, default_cache, solve_key
+from .flight_envelope import UnreachableTargetError, persist_envelopes
+from .flight_store import ResultStore
+from .flight_adaptive import adaptive_grid
+from .flight_stats import collect_stats, phase
+from . import flight_stats
+
+
+DT = 0.001       # default time step [s]
+
+
+def frange(start: float, stop: float, step: float):
+    """Float-range generator (inclusive stop with small epsilon)."""
+    x = float(start)
+    eps = abs(step) * 1e-9
+    if step == 0:
+        raise ValueError("step must be non-zero")
+    if step > 0:
+        while x <= stop + eps:
+            yield round(x, 10)
+            x += step
+    else:
+        while x >= stop - eps:
+            yield round(x, 10)
+            x += step
+
+
+def _solve_point(profile: Profile, x: float, y: float, dt: float, phys: Physics,
+                 cache: SolveCache = None) -> SolveResult:
+    """`cached_solve` of one grid point; a point whose flight cannot reach the target plane
+    keeps its row with NaN values, as in the lookup tables.
+    """
+    try:
+        return cached_solve(cache, profile, x, y, dt=dt, phys=phys)
+    except UnreachableTargetError:
+        nan = float('nan')
+        return SolveResult(profile.name, float(x), float(y), nan, nan, nan, nan, nan, nan, nan,
+                           solver=SolveInfo('brent', 0, 0, False))
+
+
+def _solve_chunk(profile: Profile, points: Sequence[Tuple[float, float]], dt: float,
+                 phys: Physics, cache: SolveCache = None, collect: bool = False):
+    """Worker task: solve a contiguous slice of the grid in-process.
+
+    Returns (results, stats) where stats is the worker's counter dict if `collect` is set.
+    Without a cache (--no-cache) the reachability envelopes are not written to disk either.
+    """
+    persist_envelopes(cache is not None)
+    try:
+        if not collect:
+            return [_solve_point(profile, x, y, dt, phys, cache) for x, y in points], None
+        with collect_stats() as stats:
+            results = [_solve_point(profile, x, y, dt, phys, cache) for x, y in points]
+        return results, stats.as_dict()
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def solve_grid(profile: Profile, points: Sequence[Tuple[float, float]], dt: float = DT,
+               phys: Physics = None, workers: int = None, chunk_size: int = None,
+               cache: SolveCache = None):
+    """Solve all (x, y) points on a process pool and yield SolveResults in grid order.
+
+    The grid is split into contiguous chunks so every worker process solves many points
+    per task; results are yielded as soon as the next chunk in grid order is ready.
+    Workers share the on-disk tier of `cache`, if it has one.
+    """
+    phys = phys if phys is not None else Physics()
+    points = list(points)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(points) or 1))
+    if chunk_size is None:
+        # a few chunks per worker keeps the pool busy while the tail finishes
+        chunk_size = max(1, len(points) // (workers * 4))
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _solve_chunk(profile, chunk, dt, phys, cache)[0]
+        return
+
+    # worker processes collect their own counters, merged here into the active collector
+    collect = flight_stats.enabled()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = [ex.submit(_solve_chunk, profile, chunk, dt, phys, cache, collect) for chunk in chunks]
+        for f in futures:
+            results, stats = f.result()
+            if stats is not None:
+                flight_stats._active.merge(stats)
+            yield from results
+
+
+def sweep_grid_cached(profile: Profile, points: Sequence[Tuple[float, float]], dt: float = DT,
+                      phys: Physics = None, cache: SolveCache = None) -> List[SolveResult]:
+    """`sweep_grid` that only sweeps the points missing from `cache`."""
+    if cache is None:
+        return sweep_grid(profile, points, dt=dt, phys=phys)
+    keys = [solve_key(profile, phys, x, y, dt=dt, search='sweep') for x, y in points]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, r in enumerate(results) if r is None]
+    solved = sweep_grid(profile, [points[i] for i in missing], dt=dt, phys=phys)
+    for i, result in zip(missing, solved):
+        results[i] = result
+    cache.put_many((keys[i], results[i]) for i in missing)
+    return [replace(r, profile=profile.name) for r in results]
 
 
 def main():
@@ -17,90 +125,117 @@ def main():
     parser.add_argument('profile_name', nargs='?', default='default', help='The name of the profile in the file arrows.json to be used for the calculations (default: default)')
     parser.add_argument('--x_values', nargs=3, type=float, default=[10.0, 2.0, 100.0], help='The start, step and end values for target distances in meters (default: 10 2 100)')
     parser.add_argument('--y_values', nargs=3, type=float, default=[-10,1,10], help='The start, step and end values for target heights in meters (default: -10 1 10)')
-    
+    parser.add_argument('--config-file', '-c', default=str(Path(__file__).with_name('arrows.json')), help='Path to JSON config with named profiles')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='Number of worker processes (default: number of CPU cores)')
+    parser.add_argument('--sweep', action='store_true', help='Solve the whole grid in one process with shared multi-distance trajectories instead of per-point solves')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the on-disk solve cache')
+    parser.add_argument('--stats', action='store_true', help='Print step/solver counters and per-phase timings to stderr')
+    parser.add_argument('--adaptive', type=float, default=None, metavar='TOL', help='Adaptive quadtree sampling: refine cells until the holdover interpolation error is below TOL meters; the x/y step values become the finest spacing (scattered output)')
+    parser.add_argument('--angle-tol', type=float, default=0.01, help='Adaptive: allowed aim-angle interpolation error in degrees (default: 0.01)')
+    parser.add_argument('--coarse-level', type=int, default=3, help='Adaptive: initial cells are 2**LEVEL steps wide (default: 3)')
+    parser.add_argument('--output', '-o', default=None, help='Output path without suffix (default: <profile>_results)')
+    parser.add_argument('--format', choices=['csv', 'npz', 'both'], default='csv', help='Write CSV, binary columnar .npz, or both (default: csv)')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted run and solve the whole grid again')
+
 
     args = parser.parse_args()
+    if not args.stats:
+        return run(args)
+    with collect_stats() as stats:
+        try:
+            return run(args)
+        finally:
+            print(stats.report(), file=sys.stderr)
+
+
+def run_adaptive(args, profile: Profile, phys: Physics, out_base: Path, formats):
+    """Adaptive mode of `run`: quadtree sampling, each level solved as one sweep batch."""
+    cache = None if args.no_cache else default_cache()
+    levels = []
+
+    def solve(points):
+        levels.append(len(points))
+        sys.stdout.write(f"\rLevel {len(levels)}: solving {len(points)} points")
+        sys.stdout.flush()
+        return sweep_grid_cached(profile, points, dt=DT, phys=phys, cache=cache)
+
+    with phase('solve'):
+        results, uniform = adaptive_grid(solve, tuple(args.x_values), tuple(args.y_values),
+                                         holdover_tol=args.adaptive, angle_tol=args.angle_tol,
+                                         coarse_level=args.coarse_level)
+    meta = {
+        'profile': {k: float(v) for k, v in asdict(profile).items() if k != 'name'},
+        'profile_name': profile.name,
+        'physics': asdict(phys),
+        'x_values': list(args.x_values),
+        'y_values': list(args.y_values),
+        'dt': DT,
+        'solver': 'sweep',
+        'adaptive': {'holdover_tol': args.adaptive, 'angle_tol': args.angle_tol, 'coarse_level': args.coarse_level},
+    }
+    # the point set is only known at the end, so there is nothing to resume
+    with phase('write'), ResultStore(out_base, len(results), meta, formats=formats, resume=False) as store:
+        for result in results:
+            store.write(result)
+    print()
+    print(f"Adaptive: {len(results)} points in {len(levels)} levels instead of {uniform} on the uniform grid")
+
+
+def run(args):
+    """Solve the grid described by parsed command line `args` and write the result files."""
     profile_name = args.profile_name
     x_start, x_step, x_end = args.x_values
     y_start, y_step, y_end = args.y_values
 
-    csv_header_written = [False]     # steuert, ob CSV-Header bereits in die Datei geschrieben wurde (mutable container)
-    header_row = [None]              # store the header row to skip duplicates
-    out_path = Path(profile_name + "_results.csv")
-
-    def frange(start: float, stop: float, step: float):
-        """Float-range generator (inclusive stop with small epsilon)."""
-        x = float(start)
-        eps = abs(step) * 1e-9
-        if step == 0:
-            raise ValueError("step must be non-zero")
-        if step > 0:
-            while x <= stop + eps:
-                yield round(x, 10)
-                x += step
-        else:
-            while x >= stop - eps:
-                yield round(x, 10)
-                x += step
+    out_base = Path(args.output or profile_name + "_results")
+    formats = ('csv', 'npz') if args.format == 'both' else (args.format,)
+
+    config_path = Path(args.config_file)
+    try:
+        with phase('config_load'), open(config_path, 'r', encoding='utf-8') as f:
+            configs = json.load(f)
+    except Exception as e:
+        print(f"Failed to read config file: {e}")
+        sys.exit(1)
+    if profile_name not in configs:
+        print(f"Profile '{profile_name}' not found in config. Available profiles: {', '.join(sorted(configs.keys()))}")
+        sys.exit(1)
+    profile = Profile.from_dict(profile_name, configs[profile_name])
+    phys = Physics()
 
     start = time.perf_counter()
-    prev_len = 0
+
+    if args.adaptive is not None:
+        run_adaptive(args, profile, phys, out_base, formats)
+        print(f"Completed in {time.perf_counter() - start:.2f} seconds.")
+        return
 
     combos = list(itertools.product(list(frange(x_start, x_end + 1, x_step)), list(frange(y_start, y_end, y_step))))
 
-    file_lock = threading.Lock()
-    print_lock = threading.Lock()
-
-    def run_and_write(x, y):
-        command = [
-            sys.executable,
-            "-m",
-            "arrowflight.flight",
-            str(x),
-            str(y),
-            profile_name,
-            "--no-plot",
-        ]
-
-        msg = f"Running command: {' '.join(command)}"
-        with print_lock:
-            sys.stdout.write('\r' + msg + ' ' * max(0, prev_len - len(msg)))
-            sys.stdout.flush()
-
-        result = subprocess.run(command, capture_output=True, text=True)
-        stdout = result.stdout or ""
-        if not stdout.strip():
-            with print_lock:
-                print()
-                print(f"Command produced no stdout (rc={result.returncode}). stderr:\n{result.stderr}")
-
-        lines = [ln for ln in stdout.splitlines() if ln.strip()]
-        rows = [re.split(r"\s{2,}", ln.strip()) for ln in lines]
-
-        with file_lock:
-            with out_path.open("a", newline="", encoding="utf-8") as fout:
-                writer = csv.writer(fout)
-                for i, cols in enumerate(rows):
-                    # write header once and remember it; skip any subsequent rows that match the header
-                    if not csv_header_written[0]:
-                        writer.writerow(cols)
-                        csv_header_written[0] = True
-                        header_row[0] = tuple(cols)
-                    else:
-                        if header_row[0] is not None and tuple(cols) == header_row[0]:
-                            continue  # skip duplicate header row
-                        writer.writerow(cols)
-
-    # Ensure file is created/truncated before concurrent appends
-    with out_path.open("w", newline="", encoding="utf-8") as fout:
-        pass
-
-    max_workers = min(32, (os.cpu_count() or 1) * 5, len(combos) or 1)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = [ex.submit(run_and_write, x, y) for x, y in combos]
-        # wait for all to complete, propagate exceptions
-        for f in concurrent.futures.as_completed(futures):
-            f.result()
+    # everything the stored rows depend on; a checkpoint with different meta is not resumed
+    meta = {
+        'profile': {k: float(v) for k, v in asdict(profile).items() if k != 'name'},
+        'profile_name': profile_name,
+        'physics': asdict(phys),
+        'x_values': list(args.x_values),
+        'y_values': list(args.y_values),
+        'dt': DT,
+        'solver': 'sweep' if args.sweep else 'brent',
+    }
+    with ResultStore(out_base, len(combos), meta, formats=formats, resume=not args.restart) as store:
+        todo = combos[store.completed:]
+        if store.completed:
+            print(f"Resuming after {store.completed}/{len(combos)} completed points")
+        cache = None if args.no_cache else default_cache()
+        if args.sweep:
+            solved = sweep_grid_cached(profile, todo, dt=DT, phys=phys, cache=cache)
+        else:
+            solved = solve_grid(profile, todo, dt=DT, phys=phys, workers=args.workers, cache=cache)
+        with phase('solve_and_write'):
+            for result in solved:
+                store.write(result)
+                sys.stdout.write(f"\rSolved {store.completed}/{len(combos)} (x={result.target_x:.2f}, y={result.target_y:.2f})")
+                sys.stdout.flush()
 
     end=time.perf_counter()
     # ensure we end on a fresh line before printing summary
@@ -1,42 +1,108 @@
 # Version 4: Improved plot display and user-friendly exit
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
-from matplotlib.gridspec import GridSpec
-import threading
-import readchar
+import os
 import sys
 import argparse
 import json
+import functools
 from pathlib import Path
-from .flight_profiles import Profile
+from .flight_profiles import ProfileSet
 from .flight_constants import Physics
-from .flight_compute import simulate_flight, find_optimal_angle
-from .flight_plot import plot_trajectory, plot_trajectories
+from .flight_compute import simulate_flight, SEARCH_METHODS, INTEGRATORS, RESULT_HEADERS
+from .flight_table import fly_table_hit, load_or_build_table
+from .flight_cache import DEFAULT_CACHE_DIR, cached_solve, cached_solve_profiles, default_cache
+from .flight_envelope import UnreachableTargetError, check_reachable, persist_envelopes
+from .flight_batch import BATCH_FORMATS, BatchSolver, run_batch
+from .flight_dispersion import ShotSpread, dispersion_report, error_budget, impact_heights
+from .flight_stats import collect_stats, phase
 
 
 # --- Numerical parameters ---
 DT = 0.001       # default time step [s]
+PLOT_DX = 0.1    # recorded trajectory spacing for plots [m]
 
 
 def main():
+    if sys.argv[1:2] == ['serve']:
+        from .flight_serve import main as serve_main
+        return serve_main(sys.argv[2:])
+    if sys.argv[1:2] == ['calibrate']:
+        from .flight_calibrate import main as calibrate_main
+        return calibrate_main(sys.argv[2:])
+    if sys.argv[1:2] == ['design']:
+        from .flight_design import main as design_main
+        return design_main(sys.argv[2:])
+    if sys.argv[1:2] == ['export']:
+        from .flight_export import main as export_main
+        return export_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="Compute optimal arrow launch angle using named profiles from a config file.")
-    parser.add_argument('target_x', type=float, nargs='?', default=None, help='Target horizontal distance in meters')
-    parser.add_argument('target_y', type=float, nargs='?', default=None, help='Target height in meters')
-    parser.add_argument('profile', nargs='*', default=['default'], help='One or more named profiles from the config file (default: ["default"])')
+    # read as strings: with --batch every positional argument is a profile name (see run)
+    parser.add_argument('target_x', nargs='?', default=None, help='Target horizontal distance in meters')
+    parser.add_argument('target_y', nargs='?', default=None, help='Target height in meters')
+    parser.add_argument('profile', nargs='*', default=[], help='One or more named profiles from the config file (default: ["default"])')
     parser.add_argument('--list-profiles', action='store_true', help='List available profiles from the config file and exit')
     parser.add_argument('--config-file', '-c', default=str(Path(__file__).with_name('arrows.json')), help='Path to JSON config with named profiles')
     parser.add_argument('--no-plot', action='store_true', help='Do not show plots')
+    parser.add_argument('--interactive', '-i', action='store_true', help='Show a live window with sliders for target distance and height and check boxes for the profiles of the config file')
     parser.add_argument('--no-header', action='store_true', help='Do not print the header table')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the solve cache (~/.cache/arrowflight, override with ARROWFLIGHT_CACHE_DIR)')
+    parser.add_argument('--exact', action='store_true', help='Always solve the target instead of interpolating from the per-profile lookup table')
+    parser.add_argument('--search', choices=SEARCH_METHODS, default=None, help='Angle search: Brent root finding on the target-plane height, fixed 25-step bisection, vectorized k-section or Newton steps from the angle sensitivity (default: brent; implies --exact)')
+    parser.add_argument('--holdover-tol', type=float, default=None, help='Stop the brent search once the holdover is known to this many meters (default: angle tolerance 1e-7 rad)')
+    parser.add_argument('--integrator', choices=INTEGRATORS, default='euler', help='Flight integrator: fixed-step Euler or adaptive Dormand-Prince RK45 (default: euler)')
+    parser.add_argument('--rtol', type=float, default=1e-6, help='Relative tolerance of the rk45 integrator (default: 1e-6)')
+    parser.add_argument('--atol', type=float, default=1e-6, help='Absolute tolerance of the rk45 integrator (default: 1e-6)')
+    parser.add_argument('--dispersion', type=int, default=0, metavar='N', help='Fly N perturbed shots per profile at the solved angle and report the impact-height spread and ring hit probabilities')
+    parser.add_argument('--sigma-v0', type=float, default=2.0, help='Dispersion: standard deviation of the release speed in fps (default: 2)')
+    parser.add_argument('--sigma-mass', type=float, default=2.0, help='Dispersion: standard deviation of the arrow mass in grains (default: 2)')
+    parser.add_argument('--sigma-cw', type=float, default=0.005, help='Dispersion: standard deviation of the drag coefficient (default: 0.005)')
+    parser.add_argument('--sigma-angle', type=float, default=0.05, help='Dispersion: standard deviation of the launch angle in degrees (default: 0.05)')
+    parser.add_argument('--sigma-rho', type=float, default=0.0, help='Dispersion/error budget: standard deviation of the air density in kg/m³ (default: 0)')
+    parser.add_argument('--error-budget', action='store_true', help='Report how much each --sigma-* deviation moves the impact height, from one sensitivity flight per profile')
+    parser.add_argument('--seed', type=int, default=None, help='Dispersion: random seed for reproducible samples')
+    parser.add_argument('--workers', '-j', type=int, default=1, help='Dispersion: worker processes for the sample chunks (default: 1, 0 = all cores)')
+    parser.add_argument('--batch', nargs='?', const='-', default=None, metavar='FILE', help='Read targets (target_x, target_y, optional profile) as JSON lines or CSV from FILE or stdin (-) and stream one result per line to stdout')
+    parser.add_argument('--batch-format', choices=BATCH_FORMATS, default='jsonl', help='Batch mode output: JSON lines or CSV with raw floats (default: jsonl)')
+    parser.add_argument('--stats', action='store_true', help='Print step/solver counters and per-phase timings to stderr')
+
+    # intermixed, so profiles may follow options: `arrowflight light --batch FILE heavy`
+    args = parser.parse_intermixed_args()
+
+    if not args.stats:
+        return run(args, parser)
+    with collect_stats() as stats:
+        try:
+            return run(args, parser)
+        finally:
+            print(stats.report(), file=sys.stderr)
 
-    args = parser.parse_args()
 
-    # If not listing profiles, require target_x and target_y
-    if not args.list_profiles and (args.target_x is None or args.target_y is None):
-        parser.error('target_x and target_y are required unless --list-profiles is used')
+def _float_arg(parser, name, value):
+    """`value` of positional argument `name` as a float (None stays None); a parser error otherwise."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parser.error(f"argument {name}: invalid float value: '{value}'")
+
 
-    target_x = args.target_x
-    target_y = args.target_y
+def run(args, parser):
+    """Solve and report the targets described by parsed command line `args`."""
+    if args.batch is not None:
+        # the targets come from the batch input, so `arrowflight --batch FILE light` names profiles only
+        profile_names = [a for a in (args.target_x, args.target_y) if a is not None] + args.profile
+        target_x = target_y = None
+    else:
+        # If not listing profiles or reading a batch, require target_x and target_y
+        if not args.list_profiles and (args.target_x is None or args.target_y is None):
+            parser.error('target_x and target_y are required unless --list-profiles or --batch is used')
+        target_x, target_y = (_float_arg(parser, name, getattr(args, name)) for name in ('target_x', 'target_y'))
+        profile_names = list(args.profile)
+    profile_names = profile_names or ['default']
+    if args.interactive and args.no_plot:
+        parser.error('--interactive cannot be combined with --no-plot')
 
     config_path = Path(args.config_file)
     if not config_path.exists():
@@ -44,7 +110,7 @@ def main():
         sys.exit(1)
 
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
+        with phase('config_load'), open(config_path, 'r', encoding='utf-8') as f:
             configs = json.load(f)
     except Exception as e:
         print(f"Failed to read config file: {e}")
@@ -55,70 +121,104 @@ def main():
             print(name)
         return
 
-    # allow multiple profiles
-    profile_names = args.profile if isinstance(args.profile, list) else [args.profile]
-
     results = []
     trajectories = []
 
     phys = Physics()
+    # the lookup table is built with the default solver settings; any explicit solver choice solves exactly
+    use_table = not (args.exact or args.search or args.holdover_tol is not None or args.integrator != 'euler')
+    cache = None if args.no_cache else default_cache()
+    persist_envelopes(not args.no_cache)
 
     for pname in profile_names:
         if pname not in configs:
             print(f"Profile '{pname}' not found in config. Available profiles: {', '.join(sorted(configs.keys()))}")
             sys.exit(1)
 
-        profile_obj = Profile.from_dict(pname, configs[pname])
+    if args.batch is not None:
+        solver = BatchSolver(configs, config_path, profile_names, phys, DT, use_table=use_table, cache=cache,
+                             search=args.search or 'brent', integrator=args.integrator, rtol=args.rtol, atol=args.atol,
+                             holdover_tol=args.holdover_tol)
+        try:
+            if args.batch == '-':
+                failed = run_batch(solver, sys.stdin, fmt=args.batch_format)
+            else:
+                with open(args.batch, 'r', newline='', encoding='utf-8') as fin:
+                    failed = run_batch(solver, fin, fmt=args.batch_format)
+        except BrokenPipeError:
+            # the reader went away (e.g. `| head`); stop without a traceback on interpreter exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        except OSError as e:
+            print(f"Failed to read batch input: {e}", file=sys.stderr)
+            sys.exit(1)
+        if failed:
+            print(f"{failed} batch queries failed", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    profiles = ProfileSet.from_config(configs, profile_names)
 
-        # find optimal angle
-        best_theta, best_x_hit, best_y_hit = find_optimal_angle(profile_obj, target_x, target_y, dt=DT, phys=phys)
+    solved = [None] * len(profiles)
+    if use_table:
+        for i, p in enumerate(profiles):
+            # a table that cannot be saved is not built: one exact solve is faster
+            table = load_or_build_table(p, phys, config_path, dt=DT, cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+                                        keep_unsaved=False)
+            result = table.lookup(target_x, target_y) if table is not None else None
+            if result is not None:
+                # fly the interpolated angle once, so best_x_hit/best_y_hit are those of a real flight
+                solved[i] = fly_table_hit(result, p, phys, DT)
+    missing = [i for i, r in enumerate(solved) if r is None]
+    unreachable = []
+    for i in missing:
+        try:
+            check_reachable(profiles[i], target_x, target_y, phys)
+        except UnreachableTargetError as e:
+            unreachable.append(str(e))
+    if unreachable:
+        print("\n".join(unreachable))
+        sys.exit(1)
+    if len(missing) > 1 and args.search is None and args.integrator == 'euler' and args.holdover_tol is None:
+        # default solver settings: solve all remaining profiles in one vectorized batch
+        with phase('solve'):
+            batch = ProfileSet([profiles[i] for i in missing])
+            for i, result in zip(missing, cached_solve_profiles(cache, batch, target_x, target_y, dt=DT, phys=phys)):
+                solved[i] = result
+        # a profile the batch did not converge for gets a search of its own
+        missing = [i for i in missing if not solved[i].solver.converged]
+    for i in missing:
+        with phase('solve'):
+            try:
+                solved[i] = cached_solve(cache, profiles[i], target_x, target_y, dt=DT, phys=phys, search=args.search or 'brent',
+                                         integrator=args.integrator, rtol=args.rtol, atol=args.atol, holdover_tol=args.holdover_tol)
+            except UnreachableTargetError as e:
+                unreachable.append(str(e))
+    unreachable += [f"Profile '{p.name}': the angle search did not converge for target ({target_x:.2f} m, {target_y:.2f} m); "
+                    f"no launch angle to report." for p, r in zip(profiles, solved)
+                    if r is not None and r.solver is not None and not r.solver.converged]
+    if unreachable:
+        print("\n".join(unreachable))
+        sys.exit(1)
+
+    for profile_obj, result in zip(profiles, solved):
+        pname = profile_obj.name
+        results.append(result)
+
+        if args.no_plot:
+            continue
 
         # final simulation recording trajectory
-        result = simulate_flight(best_theta, profile=profile_obj, target_x=target_x, dt=DT, phys=phys, record_trajectory=True)
-        x_end, y_end, t, v_end, angle_end, xs, ys, vxs, vys, ts = result
-
-        # total velocity
-        v_total = np.sqrt(np.array(vxs)**2 + np.array(vys)**2)
-        target_height_rel = (np.tan(best_theta) * target_x - target_y)
-
-        impact_angle_deg = np.degrees(np.arctan2(vys[-1], vxs[-1]))
-
-        results.append({
-            'profile': pname,
-            'target_x': f"{target_x:.2f}",
-            'target_y': f"{target_y:.2f}",
-            'holdover': f"{target_height_rel:.3f}",
-            'launch_angle': f"{np.degrees(best_theta):.3f}",
-            'best_x_hit': f"{best_x_hit:.2f}",
-            'best_y_hit': f"{best_y_hit:.2f}",
-            'flight_time': f"{t:.2f}",
-            'final_speed': f"{v_total[-1]:.2f}",
-            'impact_angle': f"{impact_angle_deg:.2f}"
-        })
-
-        # trajectories.append({'xs': xs, 'ys': ys, 'v_total': v_total, 'label': pname, 'target_height_rel': target_height_rel})
-        trajectories.append({'xs': xs, 'ys': ys, 'v_total': v_total, 'label': pname, 'target_height_rel': target_height_rel, 'color': tuple(np.random.rand(3,))})
-        
+        best_theta = np.radians(result.launch_angle)
+        with phase('trajectory'):
+            traj = simulate_flight(best_theta, profile=profile_obj, target_x=target_x, dt=DT, phys=phys, record_trajectory=True,
+                                   integrator=args.integrator, rtol=args.rtol, atol=args.atol, record_dx=PLOT_DX)
+
+        trajectories.append({'xs': traj.x, 'ys': traj.y, 'v_total': traj.speed, 'label': pname, 'target_height_rel': result.holdover, 'color': tuple(np.random.rand(3,))})
 
     # prepare and print table
-    headers = [
-        'Profile',
-        "Target distance [m]",
-        "Target height [m]",
-        "Optimal holdover",
-        "Optimal launch angle [°]",
-        "best_x_hit [m]",
-        "best_y_hit [m]",
-        "Flight time [s]",
-        "Final speed [m/s]",
-        "Impact angle [°]"
-    ]
-
-    rows = []
-    for r in results:
-        rows.append([
-            r['profile'], r['target_x'], r['target_y'], r['holdover'], r['launch_angle'], r['best_x_hit'], r['best_y_hit'], r['flight_time'], r['final_speed'], r['impact_angle']
-        ])
+    headers = RESULT_HEADERS
+    rows = [r.to_row() for r in results]
 
     # compute column widths
     widths = []
@@ -133,10 +233,54 @@ def main():
     for row in rows:
         print("  ".join(v.rjust(w) for v, w in zip(row, widths)))
 
+    spread = ShotSpread(v0_fps=args.sigma_v0, mass_grains=args.sigma_mass, cw=args.sigma_cw, angle_deg=args.sigma_angle,
+                        rho=args.sigma_rho)
+    if args.error_budget:
+        with phase('error_budget'):
+            for profile_obj, result in zip(profiles, results):
+                budget = error_budget(profile_obj, np.radians(result.launch_angle), target_x, spread, dt=DT, phys=phys)
+                print()
+                print("\n".join(budget.lines()))
+
+    if args.dispersion > 0:
+        with phase('dispersion'):
+            for profile_obj, result in zip(profiles, results):
+                heights = impact_heights(profile_obj, np.radians(result.launch_angle), target_x, spread, samples=args.dispersion,
+                                         dt=DT, phys=phys, seed=args.seed, workers=args.workers or None)
+                print()
+                print("\n".join(dispersion_report(profile_obj, target_x, target_y, heights).lines()))
+
     if args.no_plot:
         return
 
-    plot_trajectories(trajectories, target_x)
+    if args.interactive:
+        from .flight_plot import plot_interactive
+        solver = BatchSolver(configs, config_path, profile_names, phys, DT, use_table=use_table, cache=cache,
+                             search=args.search or 'brent', integrator=args.integrator, rtol=args.rtol, atol=args.atol,
+                             holdover_tol=args.holdover_tol)
+        # the solutions shown at start-up are already known
+        solver.profiles.update((p.name, p) for p in profiles)
+        solve = _live_solve(solver)
+        colors = {t['label']: t['color'] for t in trajectories}
+        plot_interactive(solve, sorted(configs.keys()), profile_names, target_x, target_y, colors=colors)
+        return
+
+    # matplotlib and readchar are only imported when a plot is actually shown
+    from .flight_plot import plot_trajectories
+    with phase('plot'):
+        plot_trajectories(trajectories, target_x)
+
+
+def _live_solve(solver: BatchSolver):
+    """solve(name, target_x, target_y) for `plot_interactive`: the solution of `solver` (lookup
+    table, solve cache) and its recorded trajectory, memoized for recently shown targets.
+    """
+    @functools.lru_cache(maxsize=1024)
+    def solve(name: str, target_x: float, target_y: float):
+        result, traj = solver.trajectory(name, target_x, target_y, record_dx=PLOT_DX)
+        return {'xs': traj.x, 'ys': traj.y, 'v_total': traj.speed, 'target_height_rel': result.holdover,
+                'summary': f"{name}: {result.launch_angle:.3f}°, holdover {result.holdover:+.3f} m"}
+    return solve
 
 
 if __name__ == "__main__":
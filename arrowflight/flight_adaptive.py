@@ -0,0 +1,80 @@
+import math
+from typing import Callable, Dict, List, Sequence, Tuple
+from .flight_compute import SolveResult
+
+
+def _aim_angle(result: SolveResult) -> float:
+    """Launch angle relative to the line of sight to the target [°], as plotted by plot_profile_results."""
+    return result.launch_angle - math.degrees(math.atan2(result.target_y, result.target_x))
+
+
+def adaptive_grid(solve: Callable[[Sequence[Tuple[float, float]]], List[SolveResult]],
+                  x_values: Tuple[float, float, float], y_values: Tuple[float, float, float],
+                  holdover_tol: float = 0.01, angle_tol: float = 0.01, coarse_level: int = 3):
+    """Sample the (target_x, target_y) plane adaptively with a quadtree of cells.
+
+    x_values/y_values are (start, step, end); `step` is the finest spacing a cell may be
+    refined to, i.e. the spacing of the equivalent uniform grid. Sampling starts with cells
+    2**coarse_level steps wide. Every level, each cell's center is solved and compared
+    with the bilinear interpolation of its corners; cells whose holdover [m] or aim angle [°]
+    error exceeds the tolerance, or that contain both reachable and unreachable points,
+    are split (in both directions where still possible). All
+    new points of a level are passed to `solve` (a list of (x, y) -> SolveResults in
+    order) in one call, so a batch solver handles the whole level at once.
+
+    Returns (results sorted by (x, y), number of points of the equivalent uniform grid).
+    """
+    (x0, dx, x1), (y0, dy, y1) = x_values, y_values
+    if dx <= 0 or dy <= 0:
+        raise ValueError("step values must be positive")
+    nx = int(math.floor((x1 - x0) / dx + 1e-9))
+    ny = int(math.floor((y1 - y0) / dy + 1e-9))
+    coarse = 2 ** max(coarse_level, 0)
+
+    def point(i: int, j: int) -> Tuple[float, float]:
+        return round(x0 + i * dx, 10), round(y0 + j * dy, 10)
+
+    solved: Dict[Tuple[int, int], SolveResult] = {}
+
+    def solve_missing(nodes):
+        nodes = sorted(set(n for n in nodes if n not in solved))
+        if nodes:
+            for node, result in zip(nodes, solve([point(*n) for n in nodes])):
+                solved[node] = result
+
+    xs_edges = sorted(set(list(range(0, nx, coarse)) + [nx]))
+    ys_edges = sorted(set(list(range(0, ny, coarse)) + [ny]))
+    cells = [(i0, i1, j0, j1) for i0, i1 in zip(xs_edges, xs_edges[1:]) for j0, j1 in zip(ys_edges, ys_edges[1:])]
+    if not cells:
+        # degenerate range (a single row or column): no cells to refine, solve the lattice directly
+        solve_missing([(i, j) for i in range(nx + 1) for j in range(ny + 1)])
+
+    while cells:
+        corners = [n for i0, i1, j0, j1 in cells for n in ((i0, j0), (i1, j0), (i0, j1), (i1, j1))]
+        # cells one step wide in both directions cannot be split any further, but their corners
+        # (edge midpoints of the parent cell) are still part of the refined mesh
+        cells = [c for c in cells if c[1] - c[0] >= 2 or c[3] - c[2] >= 2]
+        centers = [((i0 + i1) // 2, (j0 + j1) // 2) for i0, i1, j0, j1 in cells]
+        solve_missing(corners + centers)
+
+        refined = []
+        for (i0, i1, j0, j1), (ic, jc) in zip(cells, centers):
+            u = (ic - i0) / (i1 - i0)
+            w = (jc - j0) / (j1 - j0)
+            corners = [solved[(i0, j0)], solved[(i1, j0)], solved[(i0, j1)], solved[(i1, j1)]]
+            weights = ((1 - u) * (1 - w), u * (1 - w), (1 - u) * w, u * w)
+            center = solved[(ic, jc)]
+            hold_err = abs(center.holdover - sum(wt * c.holdover for wt, c in zip(weights, corners)))
+            angle_err = abs(_aim_angle(center) - sum(wt * _aim_angle(c) for wt, c in zip(weights, corners)))
+            # cells straddling the edge of the reachable band have a kink the center test can miss
+            reach = {r.solver is None or r.solver.converged for r in corners + [center]}
+            if not (hold_err > holdover_tol or angle_err > angle_tol or len(reach) > 1):
+                continue
+            isplit = [i0, ic, i1] if i1 - i0 >= 2 else [i0, i1]
+            jsplit = [j0, jc, j1] if j1 - j0 >= 2 else [j0, j1]
+            refined += [(a, b, c, d) for a, b in zip(isplit, isplit[1:]) for c, d in zip(jsplit, jsplit[1:])]
+        cells = refined
+
+    results = [solved[n] for n in sorted(solved)]
+    return results, (nx + 1) * (ny + 1)
+
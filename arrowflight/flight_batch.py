@@ -0,0 +1,207 @@
+"""Streaming batch mode: `arrowflight --batch [FILE]`.
+
+Queries are read from FILE (or stdin for `-`) as JSON lines or as CSV with a header row;
+the format is detected from the first non-blank line. Every query has `target_x`,
+`target_y` and optionally `profile` (default: the profile(s) given on the command line).
+Results are written to stdout as soon as each query is solved, one JSON object or CSV
+row per result with the raw float values; failed queries produce a record with `line`
+and `error` instead.
+"""
+import csv
+import itertools
+import json
+import math
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, TextIO, Tuple
+import numpy as np
+from .flight_profiles import Profile
+from .flight_constants import Physics
+from .flight_compute import SolveResult, Trajectory, simulate_flight
+from .flight_table import load_or_build_table
+from .flight_cache import DEFAULT_CACHE_DIR, cached_solve
+from .flight_envelope import check_reachable
+from .flight_store import RESULT_COLUMNS
+from .flight_stats import phase
+
+
+BATCH_FORMATS = ('jsonl', 'csv')
+CSV_FIELDS = ('line', 'profile') + RESULT_COLUMNS + ('error',)
+
+
+def _json_query(text: str):
+    try:
+        query = json.loads(text)
+    except ValueError as e:
+        return ValueError(f"invalid JSON: {e}")
+    return query if isinstance(query, dict) else ValueError("each query must be a JSON object")
+
+
+def read_queries(lines: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line number, query dict) from JSON lines or CSV text.
+
+    A line that cannot be parsed yields a ValueError in place of the dict, so the caller
+    can report it and carry on with the next query. Blank lines are skipped.
+    """
+    lines = iter(lines)
+    skipped = 0
+    for first in lines:
+        if first.strip():
+            break
+        skipped += 1
+    else:
+        return
+
+    if first.lstrip().startswith('{'):
+        for lineno, text in enumerate(itertools.chain([first], lines), skipped + 1):
+            if text.strip():
+                yield lineno, _json_query(text)
+        return
+
+    reader = csv.reader(itertools.chain([first], lines))
+    header = [h.strip() for h in next(reader)]
+    for row in reader:
+        lineno = reader.line_num + skipped
+        if not any(cell.strip() for cell in row):
+            continue
+        if len(row) != len(header):
+            yield lineno, ValueError(f"expected {len(header)} fields, got {len(row)}")
+            continue
+        yield lineno, {h: cell.strip() for h, cell in zip(header, row) if cell.strip()}
+
+
+class BatchSolver:
+    """Answers batch queries with the profiles, lookup tables and solve cache kept across queries.
+
+    `use_table` and `solve_options` (keyword arguments of `cached_solve`) are the same
+    settings a single `arrowflight` call would use. Without a `cache` (--no-cache), lookup
+    tables are not saved under the cache directory either.
+    """
+
+    def __init__(self, configs: Dict, config_path: Path, default_profiles: Sequence[str], phys: Physics,
+                 dt: float, use_table: bool = True, cache=None, **solve_options):
+        self.configs = configs
+        self.config_path = config_path
+        self.default_profiles = list(default_profiles)
+        self.phys = phys
+        self.dt = dt
+        self.use_table = use_table
+        self.cache = cache
+        self.solve_options = solve_options
+        self.profiles: Dict[str, Profile] = {}
+        self.tables = {}
+
+    def profile(self, name: str) -> Profile:
+        if name not in self.profiles:
+            if name not in self.configs:
+                raise ValueError(f"profile '{name}' not found in config")
+            self.profiles[name] = Profile.from_dict(name, self.configs[name])
+        return self.profiles[name]
+
+    def table(self, profile: Profile):
+        if profile.name not in self.tables:
+            self.tables[profile.name] = load_or_build_table(profile, self.phys, self.config_path, dt=self.dt,
+                                                            cache_dir=DEFAULT_CACHE_DIR if self.cache is not None else None)
+        return self.tables[profile.name]
+
+    def solve(self, query: Dict) -> List[SolveResult]:
+        """Results of one query, one per profile.
+
+        Raises ValueError for an invalid query, UnreachableTargetError (a ValueError) for a
+        target out of reach.
+        """
+        try:
+            target_x = float(query['target_x'])
+            target_y = float(query['target_y'])
+        except KeyError as e:
+            raise ValueError(f"missing field {e}")
+        except (TypeError, ValueError):
+            raise ValueError("target_x and target_y must be numbers")
+        if not (math.isfinite(target_x) and math.isfinite(target_y)):
+            raise ValueError("target_x and target_y must be finite numbers")
+        if target_x <= 0:
+            raise ValueError("target_x must be positive")
+        names = [query['profile']] if query.get('profile') else self.default_profiles
+        profiles = [self.profile(str(name)) for name in names]
+
+        results = []
+        for profile in profiles:
+            result = self.table(profile).lookup(target_x, target_y) if self.use_table else None
+            if result is None:
+                check_reachable(profile, target_x, target_y, self.phys)
+                with phase('solve'):
+                    result = cached_solve(self.cache, profile, target_x, target_y, dt=self.dt, phys=self.phys,
+                                          **self.solve_options)
+            results.append(result)
+        return results
+
+    def trajectory(self, name: str, target_x: float, target_y: float,
+                   record_dx: float = None) -> Tuple[SolveResult, Trajectory]:
+        """Solve one target for profile `name` and fly the solution again, recording the trajectory.
+
+        Raises like `solve`.
+        """
+        result, = self.solve({'target_x': target_x, 'target_y': target_y, 'profile': name})
+        options = {k: v for k, v in self.solve_options.items() if k in ('integrator', 'rtol', 'atol')}
+        with phase('trajectory'):
+            traj = simulate_flight(np.radians(result.launch_angle), profile=self.profile(name), target_x=target_x,
+                                   dt=self.dt, phys=self.phys, record_trajectory=True, record_dx=record_dx, **options)
+        return result, traj
+
+
+def _plain(value):
+    """json.dumps fallback for NumPy scalars."""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class _JsonLinesWriter:
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def result(self, lineno: int, result: SolveResult):
+        self.out.write(json.dumps(dict(line=lineno, **asdict(result)), default=_plain) + '\n')
+
+    def error(self, lineno: int, message: str):
+        self.out.write(json.dumps({'line': lineno, 'error': message}) + '\n')
+
+
+class _CsvWriter:
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.writer = csv.writer(out, lineterminator='\n')
+        self.writer.writerow(CSV_FIELDS)
+
+    def result(self, lineno: int, result: SolveResult):
+        # repr keeps every digit of the floats
+        self.writer.writerow([lineno, result.profile] + [repr(float(getattr(result, name))) for name in RESULT_COLUMNS] + [''])
+
+    def error(self, lineno: int, message: str):
+        self.writer.writerow([lineno, ''] + [''] * len(RESULT_COLUMNS) + [message])
+
+
+def run_batch(solver: BatchSolver, fin: TextIO, out: TextIO = None, fmt: str = 'jsonl') -> int:
+    """Solve every query from `fin`, writing (and flushing) each result to `out` as it is done.
+
+    Returns the number of failed queries.
+    """
+    if fmt not in BATCH_FORMATS:
+        raise ValueError(f"Unknown batch format '{fmt}'. Choose from: {', '.join(BATCH_FORMATS)}")
+    out = out if out is not None else sys.stdout
+    writer = _JsonLinesWriter(out) if fmt == 'jsonl' else _CsvWriter(out)
+    failed = 0
+    for lineno, query in read_queries(fin):
+        try:
+            if isinstance(query, Exception):
+                raise query
+            results = solver.solve(query)
+        except ValueError as e:
+            failed += 1
+            writer.error(lineno, str(e))
+        else:
+            for result in results:
+                writer.result(lineno, result)
+        out.flush()
+    return failed
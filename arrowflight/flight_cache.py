@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import List, Optional
+from .flight_profiles import Profile, ProfileSet
+from .flight_constants import Physics
+from .flight_compute import solve_target, SolveInfo, SolveResult
+from .flight_sweep import solve_profiles
+from . import flight_stats
+
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('ARROWFLIGHT_CACHE_DIR', Path.home() / '.cache' / 'arrowflight'))
+CACHE_FILE = 'solves.sqlite'
+# part of every cache key, table and envelope hash: bump it whenever a change to the solvers
+# or integrators can change their results, so stale entries are not served
+SOLVER_VERSION = 2
+
+
+def _q(v) -> str:
+    """Quantize a float for use in a cache key (9 significant digits)."""
+    return 'None' if v is None else f"{float(v):.9g}"
+
+
+def solve_key(profile: Profile, phys: Physics, target_x: float, target_y: float, dt: float = 0.001,
+              search: str = 'brent', integrator: str = 'euler', rtol: float = 1e-6, atol: float = 1e-6,
+              holdover_tol: float = None) -> str:
+    """Cache key of one solve; the profile name is not part of it, only its values and SOLVER_VERSION."""
+    phys = phys if phys is not None else Physics()
+    parts = [profile.mass_grains, profile.diameter_m, profile.cw, profile.v0_fps, phys.rho, phys.g,
+             target_x, target_y, dt, rtol, atol, holdover_tol]
+    return '|'.join([f"v{SOLVER_VERSION}", search, integrator] + [_q(v) for v in parts])
+
+
+class SolveCache:
+    """Memoizes `solve_target` results in a bounded in-memory LRU with an optional sqlite tier.
+
+    The sqlite file can be shared by concurrent processes (WAL mode, busy timeout); every
+    process opens its own connection lazily, so the cache can be pickled into pool workers.
+    """
+
+    def __init__(self, maxsize: int = 4096, path: Optional[Path] = None):
+        self.maxsize = maxsize
+        self.path = Path(path) if path is not None else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_lru'] = OrderedDict()
+        return state
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30.0)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS solves (key TEXT PRIMARY KEY, result TEXT NOT NULL)')
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[SolveResult]:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            flight_stats.count('cache_hits')
+            return self._lru[key]
+        if self.path is not None:
+            row = self._db().execute('SELECT result FROM solves WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                d = json.loads(row[0])
+                if d.get('solver') is not None:
+                    d['solver'] = SolveInfo(**d['solver'])
+                result = SolveResult(**d)
+                self._remember(key, result)
+                self.hits += 1
+                self.disk_hits += 1
+                flight_stats.count('cache_hits')
+                flight_stats.count('cache_disk_hits')
+                return result
+        self.misses += 1
+        flight_stats.count('cache_misses')
+        return None
+
+    def put(self, key: str, result: SolveResult):
+        self._remember(key, result)
+        if self.path is not None:
+            db = self._db()
+            db.execute('INSERT OR REPLACE INTO solves (key, result) VALUES (?, ?)', (key, json.dumps(asdict(result))))
+            db.commit()
+
+    def put_many(self, items):
+        """Store several (key, result) pairs with a single sqlite transaction."""
+        items = list(items)
+        for key, result in items:
+            self._remember(key, result)
+        if self.path is not None and items:
+            db = self._db()
+            db.executemany('INSERT OR REPLACE INTO solves (key, result) VALUES (?, ?)',
+                           [(key, json.dumps(asdict(result))) for key, result in items])
+            db.commit()
+
+    def _remember(self, key: str, result: SolveResult):
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses, 'size': len(self._lru)}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def default_cache(cache_dir: Path = None) -> SolveCache:
+    """In-memory LRU backed by the shared sqlite store under `cache_dir` (default: ~/.cache/arrowflight)."""
+    return SolveCache(path=Path(cache_dir or DEFAULT_CACHE_DIR) / CACHE_FILE)
+
+
+def cached_solve(cache: Optional[SolveCache], profile: Profile, target_x: float, target_y: float,
+                 dt: float = 0.001, phys: Physics = None, search: str = 'brent', integrator: str = 'euler',
+                 rtol: float = 1e-6, atol: float = 1e-6, holdover_tol: float = None) -> SolveResult:
+    """`solve_target` through `cache` (which may be None to disable caching)."""
+    if cache is None:
+        return solve_target(profile, target_x, target_y, dt=dt, phys=phys, search=search, integrator=integrator,
+                            rtol=rtol, atol=atol, holdover_tol=holdover_tol)
+    key = solve_key(profile, phys, target_x, target_y, dt=dt, search=search, integrator=integrator,
+                    rtol=rtol, atol=atol, holdover_tol=holdover_tol)
+    result = cache.get(key)
+    if result is None:
+        result = solve_target(profile, target_x, target_y, dt=dt, phys=phys, search=search, integrator=integrator,
+                              rtol=rtol, atol=atol, holdover_tol=holdover_tol)
+        cache.put(key, result)
+    return replace(result, profile=profile.name)
+
+
+def cached_solve_profiles(cache: Optional[SolveCache], profiles: ProfileSet, target_x: float, target_y: float,
+                          dt: float = 0.001, phys: Physics = None) -> List[SolveResult]:
+    """`flight_sweep.solve_profiles` through `cache`; only the profiles missing from it are solved."""
+    if cache is None:
+        return solve_profiles(profiles, target_x, target_y, dt=dt, phys=phys)
+    keys = [solve_key(p, phys, target_x, target_y, dt=dt, search='sweep') for p in profiles]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        solved = solve_profiles(ProfileSet([profiles[i] for i in missing]), target_x, target_y, dt=dt, phys=phys)
+        for i, result in zip(missing, solved):
+            results[i] = result
+        cache.put_many((keys[i], results[i]) for i in missing)
+    return [replace(r, profile=p.name) for p, r in zip(profiles, results)]
@@ -0,0 +1,211 @@
+"""Fit a profile's drag coefficient (and optionally muzzle velocity) to measured impacts: `arrowflight calibrate`.
+
+Measurements are a CSV file with a header, or a JSON list of objects, with the fields
+
+    distance       horizontal distance of the impact [m]
+    launch_angle   launch angle [°] (optional, default 0)
+    height         impact height relative to the release point [m], or
+    drop           distance of the impact below the launch line [m]
+                   (height = tan(launch_angle) * distance - drop)
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Sequence
+import numpy as np
+from .flight_profiles import Profile
+from .flight_constants import Physics, FPS_TO_MS
+from .flight_compute import _euler_batch, plane_height, MAX_FLIGHT_TIME
+
+
+DT = 0.001
+
+
+@dataclass
+class Measurement:
+    distance: float
+    height: float
+    launch_angle: float = 0.0
+
+
+@dataclass
+class CalibrationResult:
+    """Fitted profile and least-squares diagnostics (residuals in m)."""
+    profile: Profile
+    parameters: Sequence[str]
+    values: np.ndarray
+    std_errors: np.ndarray
+    residuals: np.ndarray
+    rms: float
+    max_abs: float
+    evaluations: int
+    success: bool
+    message: str
+    seconds: float
+
+    def lines(self) -> List[str]:
+        out = [f"Fitted profile '{self.profile.name}' to {self.residuals.size} measurements in {self.seconds:.2f} s "
+               f"({self.evaluations} batch evaluations): {self.message}"]
+        for name, value, err in zip(self.parameters, self.values, self.std_errors):
+            out.append(f"  {name} = {value:.6g} ± {err:.2g}")
+        out.append(f"  residual rms {self.rms:.4f} m, max |residual| {self.max_abs:.4f} m")
+        return out
+
+
+def read_measurements(path: Path) -> List[Measurement]:
+    """Read measurement records from CSV or JSON (see module docstring)."""
+    path = Path(path)
+    if path.suffix.lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    else:
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            records = [row for row in csv.DictReader(f)]
+    out = []
+    for i, rec in enumerate(records, 1):
+        try:
+            distance = float(rec['distance'])
+            angle = float(rec.get('launch_angle') or 0.0)
+            if rec.get('height') not in (None, ''):
+                height = float(rec['height'])
+            else:
+                height = np.tan(np.radians(angle)) * distance - float(rec['drop'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"measurement {i}: needs distance and height or drop ({e})")
+        out.append(Measurement(distance, float(height), angle))
+    if not out:
+        raise ValueError("no measurements found")
+    return out
+
+
+def predicted_heights(params: np.ndarray, profile: Profile, measurements: Sequence[Measurement],
+                      fit_v0: bool, dt: float = DT, phys: Physics = None) -> np.ndarray:
+    """Crossing heights at every measurement distance for one or several parameter vectors.
+
+    params has shape (k, p) with p = 1 (cw) or 2 (cw, v0_fps); all k x n flights are one
+    `_euler_batch` call. Returns shape (k, n).
+    """
+    params = np.atleast_2d(params)
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    x = np.array([m.distance for m in measurements])
+    theta = np.radians([m.launch_angle for m in measurements])
+    cw = params[:, :1]
+    v0 = params[:, 1:2] * FPS_TO_MS if fit_v0 else profile.v0_ms()
+    drag = 0.5 * rho * cw * profile.area() / profile.mass_kg()
+    xe, ye, _, vx, vy = _euler_batch(theta[None, :], v0, drag, g, x[None, :], dt, max_steps=int(MAX_FLIGHT_TIME / dt))
+    return plane_height(xe, ye, np.degrees(np.arctan2(vy, vx)), x[None, :])
+
+
+def calibrate(profile: Profile, measurements: Sequence[Measurement], fit_v0: bool = False,
+              dt: float = DT, phys: Physics = None, name: str = None) -> CalibrationResult:
+    """Least-squares fit of cw (and v0_fps) so the simulated flights match the measured heights.
+
+    Residuals and the forward-difference Jacobian are each evaluated as a single batch:
+    the Jacobian flies the base parameters and one perturbed copy per parameter together.
+    """
+    from scipy.optimize import least_squares
+
+    start = time.perf_counter()
+    y = np.array([m.height for m in measurements])
+    names = ['cw', 'v0_fps'] if fit_v0 else ['cw']
+    x0 = np.array([profile.cw, profile.v0_fps] if fit_v0 else [profile.cw], dtype=float)
+    lower = np.array([1e-4, 10.0] if fit_v0 else [1e-4])
+    upper = np.array([5.0, 2000.0] if fit_v0 else [5.0])
+    evaluations = 0
+
+    def residuals(p):
+        nonlocal evaluations
+        evaluations += 1
+        return predicted_heights(p, profile, measurements, fit_v0, dt=dt, phys=phys)[0] - y
+
+    def jacobian(p):
+        nonlocal evaluations
+        evaluations += 1
+        # relative steps well above the O(dt^2) jitter of the fixed-step crossing height
+        h = 1e-4 * np.maximum(np.abs(p), 1.0)
+        h = np.where(p + h > upper, -h, h)
+        batch = np.vstack([p, p + np.diag(h)])
+        heights = predicted_heights(batch, profile, measurements, fit_v0, dt=dt, phys=phys)
+        return ((heights[1:] - heights[0]) / h[:, None]).T
+
+    fit = least_squares(residuals, x0, jac=jacobian, bounds=(lower, upper), x_scale='jac')
+    res = fit.fun
+    dof = res.size - x0.size
+    try:
+        cov = np.linalg.inv(fit.jac.T @ fit.jac) * (res @ res / dof if dof > 0 else np.nan)
+        std_errors = np.sqrt(np.diag(cov))
+    except np.linalg.LinAlgError:
+        std_errors = np.full(x0.size, np.nan)
+
+    fitted = replace(profile, name=name or f"{profile.name}_calibrated", cw=float(fit.x[0]))
+    if fit_v0:
+        fitted = replace(fitted, v0_fps=float(fit.x[1]))
+    return CalibrationResult(
+        profile=fitted,
+        parameters=names,
+        values=fit.x,
+        std_errors=std_errors,
+        residuals=res,
+        rms=float(np.sqrt(np.mean(res ** 2))),
+        max_abs=float(np.max(np.abs(res))),
+        evaluations=evaluations,
+        success=bool(fit.success),
+        message=fit.message,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='arrowflight calibrate', description="Fit a profile's cw (and optionally v0_fps) to measured impacts and store it as a new profile.")
+    parser.add_argument('measurements', help='CSV or JSON file with distance, launch_angle and height or drop per shot')
+    parser.add_argument('--profile', '-p', default='default', help='Profile to start from (default: default)')
+    parser.add_argument('--name', '-n', default=None, help='Name of the fitted profile entry (default: <profile>_calibrated)')
+    parser.add_argument('--fit-v0', action='store_true', help='Also fit the muzzle velocity v0_fps')
+    parser.add_argument('--config-file', '-c', default=str(Path(__file__).with_name('arrows.json')), help='Path to JSON config with named profiles')
+    parser.add_argument('--dry-run', action='store_true', help='Print the fit without writing the config file')
+    parser.add_argument('--force', action='store_true', help='Overwrite an existing profile entry of the same name')
+    args = parser.parse_args(argv)
+
+    config_path = Path(args.config_file)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            configs = json.load(f)
+    except Exception as e:
+        print(f"Failed to read config file: {e}")
+        sys.exit(1)
+    if args.profile not in configs:
+        print(f"Profile '{args.profile}' not found in config. Available profiles: {', '.join(sorted(configs.keys()))}")
+        sys.exit(1)
+    name = args.name or f"{args.profile}_calibrated"
+    if name in configs and not (args.force or args.dry_run):
+        print(f"Profile '{name}' already exists in {config_path}; use --name for a new entry or --force to overwrite it.")
+        sys.exit(1)
+    try:
+        measurements = read_measurements(Path(args.measurements))
+    except (OSError, ValueError) as e:
+        print(f"Failed to read measurements: {e}")
+        sys.exit(1)
+
+    profile = Profile.from_dict(args.profile, configs[args.profile])
+    result = calibrate(profile, measurements, fit_v0=args.fit_v0, phys=Physics(), name=name)
+    print("\n".join(result.lines()))
+    if args.dry_run:
+        return
+    if not result.success:
+        print("Fit did not converge; config file left unchanged.")
+        sys.exit(1)
+
+    entry = dict(configs[args.profile])
+    entry['cw'] = round(result.profile.cw, 6)
+    if args.fit_v0:
+        entry['v0_fps'] = round(result.profile.v0_fps, 3)
+    configs[result.profile.name] = entry
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(configs, f, indent=2)
+        f.write('\n')
+    print(f"Wrote profile '{result.profile.name}' to {config_path}")
@@ -1,14 +1,230 @@
+from dataclasses import dataclass
+from typing import List
+import math
 import numpy as np
 from .flight_profiles import Profile
 from .flight_constants import Physics
+from . import flight_stats
+
+
+SEARCH_METHODS = ('brent', 'bisect', 'ksection', 'newton')
+INTEGRATORS = ('euler', 'rk45')
+
+# search flights end once the arrow sinks this far [m] below the target height, or after this long [s]
+SEARCH_FLOOR_MARGIN = 1.0
+MAX_FLIGHT_TIME = 60.0
+
+# Dormand-Prince 5(4) tableau
+_DP_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# difference between the 5th and the embedded 4th order weights (error estimate)
+_DP_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+RESULT_HEADERS = [
+    'Profile',
+    "Target distance [m]",
+    "Target height [m]",
+    "Optimal holdover",
+    "Optimal launch angle [°]",
+    "best_x_hit [m]",
+    "best_y_hit [m]",
+    "Flight time [s]",
+    "Final speed [m/s]",
+    "Impact angle [°]"
+]
+
+
+@dataclass
+class SolveInfo:
+    """Convergence report of one `find_optimal_angle` call."""
+    search: str
+    iterations: int
+    simulations: int
+    converged: bool
+
+
+@dataclass
+class SolveResult:
+    """Numeric outcome of one solve; angles in degrees, distances in m, speeds in m/s."""
+    profile: str
+    target_x: float
+    target_y: float
+    holdover: float
+    launch_angle: float
+    best_x_hit: float
+    best_y_hit: float
+    flight_time: float
+    final_speed: float
+    impact_angle: float
+    solver: SolveInfo = None
+
+    def to_row(self) -> List[str]:
+        """Format the result as a table/CSV row matching RESULT_HEADERS."""
+        return [
+            self.profile,
+            f"{self.target_x:.2f}",
+            f"{self.target_y:.2f}",
+            f"{self.holdover:.3f}",
+            f"{self.launch_angle:.3f}",
+            f"{self.best_x_hit:.2f}",
+            f"{self.best_y_hit:.2f}",
+            f"{self.flight_time:.2f}",
+            f"{self.final_speed:.2f}",
+            f"{self.impact_angle:.2f}"
+        ]
+
+
+# parameters of `Sensitivity`, in order
+SENSITIVITY_PARAMS = ('theta', 'v0', 'mass', 'cw', 'rho')
+
+
+@dataclass
+class Sensitivity:
+    """Derivatives of the height [m] at which a flight crosses the target plane.
+
+    Per unit of each parameter: launch angle [rad], launch speed [m/s], arrow mass [kg],
+    drag coefficient and air density [kg/m³].
+    """
+    theta: float
+    v0: float
+    mass: float
+    cw: float
+    rho: float
+
+
+class Trajectory:
+    """Recorded flight samples (after each kept step) as NumPy arrays.
+
+    t [s], x, y [m] and vx, vy [m/s] have one entry per recorded sample; the final state
+    of the flight is always the last sample. speed, energy and impact_angle are computed
+    on first access.
+    """
+    __slots__ = ('t', 'x', 'y', 'vx', 'vy', 'mass_kg', '_speed')
+
+    def __init__(self, t: np.ndarray, x: np.ndarray, y: np.ndarray, vx: np.ndarray, vy: np.ndarray,
+                 mass_kg: float = None):
+        self.t = t
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.vy = vy
+        self.mass_kg = mass_kg
+        self._speed = None
+
+    def __len__(self) -> int:
+        return self.t.size
+
+    @property
+    def speed(self) -> np.ndarray:
+        """Total speed [m/s] of every sample."""
+        if self._speed is None:
+            self._speed = np.hypot(self.vx, self.vy)
+        return self._speed
+
+    @property
+    def energy(self) -> np.ndarray:
+        """Kinetic energy [J] of every sample (needs mass_kg)."""
+        if self.mass_kg is None:
+            raise ValueError("Trajectory has no mass_kg; kinetic energy is unknown")
+        return 0.5 * self.mass_kg * self.speed ** 2
+
+    @property
+    def flight_time(self) -> float:
+        return float(self.t[-1])
+
+    @property
+    def final_speed(self) -> float:
+        return float(self.speed[-1])
+
+    @property
+    def impact_angle(self) -> float:
+        """Flight path angle [°] of the final state."""
+        return math.degrees(math.atan2(self.vy[-1], self.vx[-1]))
+
+
+class _TrajectoryRecorder:
+    """Appends flight states to a growing (n, 5) buffer, keeping every `every`-th step
+    or, if `dx` is given, the first step at or past each multiple of `dx` in x."""
+    __slots__ = ('buf', 'n', 'every', 'dx', 'next_x', 'step')
+
+    def __init__(self, capacity: int, every: int = 1, dx: float = None):
+        if every < 1:
+            raise ValueError("record_every must be at least 1")
+        if dx is not None and dx <= 0:
+            raise ValueError("record_dx must be positive")
+        self.buf = np.empty((max(capacity, 16), 5))
+        self.n = 0
+        self.every = every
+        self.dx = dx
+        self.next_x = dx
+        self.step = 0
+
+    def add(self, t: float, x: float, y: float, vx: float, vy: float, force: bool = False):
+        self.step += 1
+        if not force:
+            if self.dx is not None:
+                if x < self.next_x:
+                    return
+                self.next_x = (math.floor(x / self.dx) + 1) * self.dx
+            elif self.step % self.every:
+                return
+        if self.n == self.buf.shape[0]:
+            self.buf = np.resize(self.buf, (2 * self.n, 5))
+        self.buf[self.n] = (t, x, y, vx, vy)
+        self.n += 1
+
+    def finish(self, t: float, x: float, y: float, vx: float, vy: float, mass_kg: float) -> Trajectory:
+        """Make sure the final state is the last sample and return the Trajectory."""
+        if self.n == 0 or self.buf[self.n - 1, 0] != t:
+            self.add(t, x, y, vx, vy, force=True)
+        data = self.buf[:self.n]
+        return Trajectory(*(data[:, j].copy() for j in range(5)), mass_kg=mass_kg)
 
 
 def simulate_flight(theta: float, profile: Profile, target_x: float, dt: float = 0.001,
-                    phys: Physics = None, record_trajectory: bool = False):
-    """Simulates flight using provided Profile and Physics; returns endpoint and optionally trajectory.
+                    phys: Physics = None, record_trajectory: bool = False, integrator: str = 'euler',
+                    rtol: float = 1e-6, atol: float = 1e-6, record_every: int = 1, record_dx: float = None,
+                    y_floor: float = None, max_steps: int = None, sensitivity: bool = False):
+    """Simulates flight using provided Profile and Physics.
+
+    Returns the endpoint (x, y, t, v_end, angle_end), or with record_trajectory=True a
+    `Trajectory` of the flight instead. Recording keeps every `record_every`-th step, or
+    with `record_dx` one step per `record_dx` meters of distance; the final state is always kept.
+
+    integrator='euler' steps with a fixed `dt` and stops at the first step past target_x.
+    integrator='rk45' uses adaptive Dormand-Prince steps controlled by `rtol`/`atol`
+    (`dt` is only the initial step) and returns the interpolated state at exactly x == target_x.
 
-    See original implementation in `flight.py` for semantics.
+    The flight ends early, short of target_x, once the arrow is descending below `y_floor`
+    (it cannot climb back, so it will cross the target plane lower still) or after
+    `max_steps` steps. Callers recognize an early end by x < target_x.
+
+    With sensitivity=True (euler only, no recording) the variational equations of the
+    Euler scheme are integrated alongside the state, and a `Sensitivity` of the
+    target-plane height is appended to the returned endpoint.
     """
+    if integrator not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator '{integrator}'. Choose from: {', '.join(INTEGRATORS)}")
+    if sensitivity:
+        if integrator != 'euler' or record_trajectory:
+            raise ValueError("sensitivities are only available for unrecorded euler flights")
+        *end, derivs = _flight_sensitivity(theta, profile, target_x, dt=dt, phys=phys,
+                                           y_floor=y_floor, max_steps=max_steps)
+        return tuple(end) + (Sensitivity(*derivs),)
+    if integrator == 'rk45':
+        return _simulate_flight_rk45(theta, profile, target_x, dt=dt, phys=phys,
+                                     record_trajectory=record_trajectory, rtol=rtol, atol=atol,
+                                     record_every=record_every, record_dx=record_dx,
+                                     y_floor=y_floor, max_steps=max_steps)
+
     # extract sim params from Profile
     v0 = profile.v0_ms()
     m = profile.mass_kg()
@@ -19,13 +235,23 @@ def simulate_flight(theta: float, profile: Profile, target_x: float, dt: float =
     vy = v0 * np.sin(theta)
     x, y, t = 0.0, 0.0, 0.0
 
+    recorder = None
     if record_trajectory:
-        xs, ys, vxs, vys, ts = [], [], [], [], []
+        # vx only decays, so target_x / (vx0 * dt) steps is a lower bound of the flight length
+        min_steps = int(target_x / max(vx * dt, 1e-12)) + 2 if vx > 0 else 1024
+        if record_dx is not None:
+            capacity = int(target_x / record_dx) + 2
+        else:
+            capacity = min_steps // record_every + 2
+        recorder = _TrajectoryRecorder(min(capacity, 1 << 20), every=record_every, dx=record_dx)
 
     rho = phys.rho if phys is not None else 1.2
     g = phys.g if phys is not None else 9.81
+    floor = y_floor if y_floor is not None else -math.inf
+    budget = max_steps if max_steps is not None else -1
+    steps = 0
 
-    while x <= target_x:
+    while x <= target_x and steps != budget and not (y < floor and vy < 0):
         v = np.sqrt(vx**2 + vy**2)
         if v == 0:
             Fd = 0.0
@@ -41,36 +267,540 @@ def simulate_flight(theta: float, profile: Profile, target_x: float, dt: float =
         x += vx * dt
         y += vy * dt
         t += dt
+        steps += 1
 
-        if record_trajectory:
-            xs.append(x)
-            ys.append(y)
-            vxs.append(vx)
-            vys.append(vy)
-            ts.append(t)
+        if recorder is not None:
+            recorder.add(t, x, y, vx, vy)
 
     v_end = np.sqrt(vx**2 + vy**2)
     angle_end = np.degrees(np.arctan2(vy, vx))
 
+    if flight_stats._active is not None:
+        flight_stats.count('simulations')
+        flight_stats.count('integration_steps', steps)
+
+    if recorder is not None:
+        return recorder.finish(t, x, y, vx, vy, m)
+    return x, y, t, v_end, angle_end
+
+
+def _flight_sensitivity(theta: float, profile: Profile, target_x: float, dt: float = 0.001, phys: Physics = None,
+                        params=SENSITIVITY_PARAMS, y_floor: float = None, max_steps: int = None):
+    """Euler flight of `simulate_flight` that also differentiates every step with respect to `params`.
+
+    The derivatives are those of the discrete scheme, so they are exact for the Euler
+    target-plane height (including the step back onto the plane). Returns
+    (x, y, t, v_end, angle_end, [d(height)/d(param) for param in params]).
+    """
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    m = profile.mass_kg()
+    v0 = profile.v0_ms()
+    k = 0.5 * rho * profile.cw * profile.area() / m
+    # d(k)/d(param) and the initial velocity derivatives
+    dk = [{'mass': -k / m, 'cw': k / profile.cw, 'rho': k / rho}.get(p, 0.0) for p in params]
+    c, sn = math.cos(theta), math.sin(theta)
+    dvx = [{'theta': -v0 * sn, 'v0': c}.get(p, 0.0) for p in params]
+    dvy = [{'theta': v0 * c, 'v0': sn}.get(p, 0.0) for p in params]
+    dx = [0.0] * len(params)
+    dy = [0.0] * len(params)
+    n = range(len(params))
+
+    vx, vy = v0 * c, v0 * sn
+    x = y = 0.0
+    floor = y_floor if y_floor is not None else -math.inf
+    budget = max_steps if max_steps is not None else -1
+    steps = 0
+    while x <= target_x and steps != budget and not (y < floor and vy < 0):
+        v = math.sqrt(vx * vx + vy * vy)
+        kv = k * v
+        for i in n:
+            # d(k*v) from d(k) and d(v) = (vx*dvx + vy*dvy) / v, with the pre-step velocities
+            dkv = dk[i] * v + (k * (vx * dvx[i] + vy * dvy[i]) / v if v > 0 else 0.0)
+            dvx[i] -= (dkv * vx + kv * dvx[i]) * dt
+            dvy[i] -= (dkv * vy + kv * dvy[i]) * dt
+            dx[i] += dvx[i] * dt
+            dy[i] += dvy[i] * dt
+        vx -= kv * vx * dt
+        vy -= (g + kv * vy) * dt
+        x += vx * dt
+        y += vy * dt
+        steps += 1
+
+    if flight_stats._active is not None:
+        flight_stats.count('simulations')
+        flight_stats.count('integration_steps', steps)
+        flight_stats.count('sensitivity_steps', steps * len(params))
+
+    # plane_height = y - (x - target_x) * vy / vx
+    slope = vy / vx
+    derivs = [dy[i] - dx[i] * slope - (x - target_x) * (dvy[i] * vx - vy * dvx[i]) / (vx * vx) for i in n]
+    return x, y, steps * dt, math.sqrt(vx * vx + vy * vy), math.degrees(math.atan2(vy, vx)), derivs
+
+
+def _simulate_flight_rk45(theta: float, profile: Profile, target_x: float, dt: float = 0.001,
+                          phys: Physics = None, record_trajectory: bool = False,
+                          rtol: float = 1e-6, atol: float = 1e-6, record_every: int = 1,
+                          record_dx: float = None, y_floor: float = None, max_steps: int = None):
+    """Adaptive Dormand-Prince integration of the flight up to the plane x == target_x.
+
+    Same return values as `simulate_flight`; the last state is located on the target plane
+    with the cubic Hermite dense output of the step that crosses it.
+    """
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    drag = 0.5 * rho * profile.cw * profile.area() / profile.mass_kg()
+
+    def rhs(s):
+        vx, vy = s[2], s[3]
+        kv = drag * math.sqrt(vx * vx + vy * vy)
+        return (vx, vy, -kv * vx, -g - kv * vy)
+
+    v0 = profile.v0_ms()
+    state = (0.0, 0.0, v0 * math.cos(theta), v0 * math.sin(theta))
+    f0 = rhs(state)
+    t = 0.0
+    h = dt
+    accepted = rejected = 0
+
+    recorder = None
     if record_trajectory:
-        return x, y, t, v_end, angle_end, xs, ys, vxs, vys, ts
+        capacity = int(target_x / record_dx) + 2 if record_dx is not None else 256
+        recorder = _TrajectoryRecorder(capacity, every=record_every, dx=record_dx)
+
+    while True:
+        k = [f0]
+        for i in range(1, 7):
+            a = _DP_A[i]
+            stage = tuple(state[j] + h * sum(a[m] * k[m][j] for m in range(i)) for j in range(4))
+            k.append(rhs(stage))
+        # stage 7 is evaluated at the 5th order solution (FSAL)
+        new_state = stage
+        f1 = k[6]
+
+        err = 0.0
+        for j in range(4):
+            e = h * sum(_DP_E[m] * k[m][j] for m in range(7))
+            scale = atol + rtol * max(abs(state[j]), abs(new_state[j]))
+            err += (e / scale) ** 2
+        err = math.sqrt(err / 4.0)
+
+        if err > 1.0:
+            h *= max(0.2, 0.9 * err ** -0.2)
+            rejected += 1
+            continue
+        accepted += 1
+
+        if new_state[0] > target_x:
+            # locate x(s) == target_x on the Hermite interpolant of this step (Newton on s)
+            x0, x1 = state[0], new_state[0]
+            d0, d1 = h * f0[0], h * f1[0]
+            s = (target_x - x0) / (x1 - x0)
+            for _ in range(8):
+                s2, s3 = s * s, s * s * s
+                xs_ = ((2 * s3 - 3 * s2 + 1) * x0 + (s3 - 2 * s2 + s) * d0
+                       + (-2 * s3 + 3 * s2) * x1 + (s3 - s2) * d1)
+                dxs = (6 * s2 - 6 * s) * x0 + (3 * s2 - 4 * s + 1) * d0 + (-6 * s2 + 6 * s) * x1 + (3 * s2 - 2 * s) * d1
+                step = (xs_ - target_x) / dxs
+                s -= step
+                if abs(step) < 1e-14:
+                    break
+            s2, s3 = s * s, s * s * s
+            h00, h10, h01, h11 = 2 * s3 - 3 * s2 + 1, s3 - 2 * s2 + s, -2 * s3 + 3 * s2, s3 - s2
+            state = tuple(h00 * state[j] + h10 * h * f0[j] + h01 * new_state[j] + h11 * h * f1[j]
+                          for j in range(4))
+            state = (float(target_x),) + state[1:]
+            t += s * h
+        else:
+            state = new_state
+            f0 = f1
+            t += h
+
+        if recorder is not None:
+            recorder.add(t, *state)
+
+        if state[0] >= target_x or accepted == max_steps or (y_floor is not None and state[1] < y_floor and state[3] < 0):
+            break
+        h *= min(5.0, 0.9 * err ** -0.2) if err > 0 else 5.0
+
+    x, y, vx, vy = state
+    v_end = math.sqrt(vx * vx + vy * vy)
+    angle_end = math.degrees(math.atan2(vy, vx))
+
+    if flight_stats._active is not None:
+        flight_stats.count('simulations')
+        flight_stats.count('integration_steps', accepted)
+        flight_stats.count('rejected_steps', rejected)
+
+    if recorder is not None:
+        return recorder.finish(t, x, y, vx, vy, profile.mass_kg())
+    return x, y, t, v_end, angle_end
+
+
+def _euler_batch(theta, v0, drag, g: float, target_x, dt: float, stations=None, y_floor=None,
+                 max_steps: int = None):
+    """Semi-implicit Euler kernel shared by the batch simulators.
+
+    theta, v0 (m/s), drag (0.5*rho*cw*A/m), target_x and y_floor may be scalars or arrays;
+    they are broadcast against each other. Rays are dropped from the working set as soon as
+    they pass their target_x, so every step only touches the rays still in flight.
+
+    If `stations` (ascending distances in m) is given, every ray flies to stations[-1]
+    instead of target_x and the height at which it crosses each station is recorded.
+
+    With `y_floor`, a ray is stopped at the first step that leaves it descending below its
+    floor, and with `max_steps` every ray still in flight after that many steps is stopped
+    (as in `simulate_flight`); the stations they did not reach keep a NaN height.
+
+    Returns arrays (x, y, t, vx, vy) holding the state of each ray at its final step, plus
+    an array of crossing heights of shape (n_rays, n_stations) if stations were given.
+    """
+    if stations is not None:
+        stations = np.asarray(stations, dtype=float)
+        target_x = stations[-1]
+    floor = y_floor if y_floor is not None else -np.inf
+    theta, v0, drag, target_x, floor = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (theta, v0, drag, target_x, floor)))
+    shape = theta.shape
+    theta, v0, drag, target_x, floor = (a.ravel() for a in (theta, v0, drag, target_x, floor))
+    n = theta.size
+
+    x_out = np.empty(n)
+    y_out = np.empty(n)
+    t_out = np.empty(n)
+    vx_out = np.empty(n)
+    vy_out = np.empty(n)
+
+    if stations is not None:
+        heights = np.full((n, stations.size), np.nan)
+        nxt = np.zeros(n, dtype=int)
+        checkpoint = np.full(n, stations[0])
+    else:
+        checkpoint = target_x
+
+    # velocity and position are carried as complex numbers (x + iy) so one step is a
+    # handful of ufunc calls on the whole working set
+    idx = np.arange(n)
+    vel = v0 * np.exp(1j * theta)
+    pos = np.zeros(n, dtype=complex)
+    kdt = drag * dt
+    gdt = 1j * g * dt
+    buf = np.empty(n)
+    dv = np.empty(n, dtype=complex)
+    gdt2 = g * dt * dt
+    steps = 0
+    ray_steps = 0
+
+    while True:
+        if stations is not None:
+            # one step may pass several stations; step back along the final velocity onto each
+            rows = np.flatnonzero(pos.real > checkpoint)
+            while rows.size:
+                heights[idx[rows], nxt[rows]] = (pos.imag[rows]
+                                                 - (pos.real[rows] - checkpoint[rows]) * vel.imag[rows] / vel.real[rows])
+                nxt[rows] += 1
+                rows = rows[nxt[rows] < stations.size]
+                checkpoint[rows] = stations[nxt[rows]]
+                rows = rows[pos.real[rows] > checkpoint[rows]]
+            done = nxt == stations.size
+        else:
+            done = pos.real > target_x
+        if y_floor is not None:
+            done |= (pos.imag < floor) & (vel.imag < 0)
+        if max_steps is not None and steps >= max_steps:
+            done[:] = True
+
+        if done.any():
+            hit = idx[done]
+            x_out[hit] = pos.real[done]
+            y_out[hit] = pos.imag[done]
+            t_out[hit] = steps * dt
+            vx_out[hit] = vel.real[done]
+            vy_out[hit] = vel.imag[done]
+
+            keep = ~done
+            idx = idx[keep]
+            vel, pos = vel[keep], pos[keep]
+            kdt, target_x, checkpoint, floor = kdt[keep], target_x[keep], checkpoint[keep], floor[keep]
+            buf, dv = buf[keep], dv[keep]
+            if stations is not None:
+                nxt = nxt[keep]
+        if not idx.size:
+            break
+
+        # vx only decays, so no ray can reach its next checkpoint within `safe` steps: run them unchecked
+        with np.errstate(divide='ignore', invalid='ignore'):
+            safe = np.min((checkpoint - pos.real) / (vel.real * dt))
+            if y_floor is not None:
+                safe = min(safe, np.min(_floor_safe_steps(pos.imag, vel, floor, kdt, g, dt, gdt2)))
+        safe = int(safe) if np.isfinite(safe) and safe > 0 else 0
+        if max_steps is not None:
+            safe = max(min(safe, max_steps - steps - 1), 0)
+        for _ in range(safe + 1):
+            np.abs(vel, out=buf)
+            buf *= kdt
+            np.multiply(vel, buf, out=dv)
+            vel -= dv
+            vel -= gdt
+            np.multiply(vel, dt, out=dv)
+            pos += dv
+        steps += safe + 1
+        ray_steps += idx.size * (safe + 1)
+
+    if flight_stats._active is not None:
+        flight_stats.count('batch_passes')
+        flight_stats.count('batch_rays', n)
+        flight_stats.count('batch_steps', steps)
+        flight_stats.count('batch_ray_steps', ray_steps)
+
+    out = tuple(a.reshape(shape) for a in (x_out, y_out, t_out, vx_out, vy_out))
+    if stations is not None:
+        return out + (heights.reshape(shape + (stations.size,)),)
+    return out
+
+
+def _floor_safe_steps(y, vel, floor, kdt, g: float, dt: float, gdt2: float):
+    """Steps every ray of `_euler_batch` can take before it may be descending below its floor.
+
+    Per step, a descending ray's sink speed grows by at most g*dt, so n steps sink it by at
+    most n*a + g*dt²*n*(n+1)/2 with a = max(-vy, 0)*dt. A ray still below its floor can only
+    be stopped once it descends; until then vy drops by at most (g + drag*|v|_max*vy)*dt
+    per step, where the speed never exceeds max(|v|, terminal speed).
+    """
+    a = np.maximum(-vel.imag, 0.0) * dt + 0.5 * gdt2
+    above = y - floor
+    sink = (np.sqrt(a * a + 2.0 * gdt2 * np.maximum(above, 0.0)) - a) / gdt2
+    vmax = np.maximum(np.abs(vel), np.sqrt(g * dt / kdt))
+    climb = vel.imag / ((g + kdt / dt * vmax * vel.imag) * dt)
+    return np.floor(np.where(above >= 0, sink, np.maximum(climb, 0.0)))
+
+
+def simulate_flight_batch(thetas, profile: Profile, target_x: float, dt: float = 0.001,
+                          phys: Physics = None, y_floor: float = None, max_steps: int = None):
+    """Vectorized `simulate_flight` for a whole array of launch angles.
+
+    All angles are integrated in lockstep with the same scheme as `simulate_flight`,
+    including the early end below `y_floor` or after `max_steps` steps.
+    Returns arrays (x, y, t, v_end, angle_end) with the shape of `thetas`.
+    """
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    drag = 0.5 * rho * profile.cw * profile.area() / profile.mass_kg()
+
+    x, y, t, vx, vy = _euler_batch(thetas, profile.v0_ms(), drag, g, target_x, dt, y_floor=y_floor,
+                                   max_steps=max_steps)
+    v_end = np.sqrt(vx**2 + vy**2)
+    angle_end = np.degrees(np.arctan2(vy, vx))
     return x, y, t, v_end, angle_end
 
 
+def plane_height(x_hit: float, y_hit: float, angle_end: float, target_x: float) -> float:
+    """Height at which a flight crossed the plane x == target_x.
+
+    The Euler integrators stop one step past target_x; since that step moved along the
+    final velocity, the crossing is recovered by stepping back along `angle_end` (degrees).
+    Works on scalars and arrays; for rk45 results (x_hit == target_x) it returns y_hit.
+    """
+    return y_hit - (x_hit - target_x) * np.tan(np.radians(angle_end))
+
+
 def find_optimal_angle(profile: Profile, target_x: float, target_y: float, dt: float = 0.001,
-                       phys: Physics = None, iterations: int = 25):
-    """Binary search for optimal launch angle that reaches target_x/target_y.
+                       phys: Physics = None, iterations: int = 25, search: str = 'brent', k: int = 32,
+                       integrator: str = 'euler', rtol: float = 1e-6, atol: float = 1e-6,
+                       angle_tol: float = 1e-7, holdover_tol: float = None, full_output: bool = False,
+                       use_envelope: bool = True):
+    """Search for the optimal launch angle that reaches target_x/target_y.
+
+    search='brent' finds the root of the continuous residual plane_height(theta) - target_y
+    on [-45°, 45°] with Brent's method, stopping once the angle is known to `angle_tol`
+    (radians) or, if given, the holdover to `holdover_tol` (m).
+    search='bisect' halves the [-45°, 45°] bracket `iterations` times with scalar simulations.
+    search='ksection' evaluates `k` interior angles per round with `simulate_flight_batch`
+    and keeps the sub-interval containing the switch; the number of rounds is chosen so the
+    final bracket is at least as narrow as `iterations` bisection steps.
+    search='newton' solves the same residual as brent with Newton steps, taking the slope
+    from the flight's angle sensitivity (euler only), safeguarded by bisection.
+    integrator/rtol/atol are passed through to `simulate_flight`.
+
+    With use_envelope, the profile's reachability envelope (see flight_envelope) answers
+    targets out of reach with the nearest edge of [-45°, 45°] and an unconverged SolveInfo
+    without searching, and narrows the starting bracket of the others to a few degrees.
+
+    Returns (best_theta_rad, best_x_hit, best_y_hit), plus a SolveInfo if full_output is set.
+    """
+    if search not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method '{search}'. Choose from: {', '.join(SEARCH_METHODS)}")
+    if search == 'newton' and integrator != 'euler':
+        raise ValueError("the newton search needs the euler integrator")
+    bracket = side = guess = None
+    if use_envelope:
+        # imported here: flight_envelope is built on this module
+        from .flight_envelope import reach_envelope
+        envelope = reach_envelope(profile, phys)
+        side = envelope.outside(target_x, target_y)
+        if side is None:
+            bracket = envelope.bracket(target_x, target_y)
+            if search == 'newton':
+                guess = envelope.initial_angle(target_x, target_y)
+
+    if side is not None:
+        best_theta = np.radians(45.0 if side == 'high' else -45.0)
+        best_x_hit, best_y_hit = simulate_flight(best_theta, profile=profile, target_x=target_x, dt=dt, phys=phys,
+                                                 integrator=integrator, rtol=rtol, atol=atol,
+                                                 **_search_limits(target_x, target_y, dt))[:2]
+        info = SolveInfo(search, 0, 1, False)
+    elif search == 'brent':
+        best_theta, best_x_hit, best_y_hit, info = _brent_search(
+            profile, target_x, target_y, dt=dt, phys=phys, integrator=integrator, rtol=rtol, atol=atol,
+            angle_tol=angle_tol, holdover_tol=holdover_tol, bracket=bracket)
+    elif search == 'newton':
+        best_theta, best_x_hit, best_y_hit, info = _newton_search(
+            profile, target_x, target_y, dt=dt, phys=phys, angle_tol=angle_tol, holdover_tol=holdover_tol,
+            bracket=bracket, guess=guess)
+    elif search == 'ksection':
+        best_theta, best_x_hit, best_y_hit, info = _ksection_search(
+            profile, target_x, target_y, dt=dt, phys=phys, iterations=iterations, k=k,
+            integrator=integrator, rtol=rtol, atol=atol, bracket=bracket)
+    else:
+        best_theta, best_x_hit, best_y_hit, info = _bisect_search(
+            profile, target_x, target_y, dt=dt, phys=phys, iterations=iterations,
+            integrator=integrator, rtol=rtol, atol=atol, bracket=bracket)
+
+    if flight_stats._active is not None:
+        flight_stats.count('solves')
+        flight_stats.count('solver_iterations', info.iterations)
+        flight_stats.count('solver_simulations', info.simulations)
+
+    if full_output:
+        return best_theta, best_x_hit, best_y_hit, info
+    return best_theta, best_x_hit, best_y_hit
+
+
+def _search_limits(target_x: float, target_y: float, dt: float):
+    """Keyword arguments that let the search flights end early (see `simulate_flight`).
+
+    Flights ending below the floor have a residual below -SEARCH_FLOOR_MARGIN, so the
+    residual is exact wherever a root can be.
+    """
+    return {'y_floor': target_y - SEARCH_FLOOR_MARGIN, 'max_steps': int(MAX_FLIGHT_TIME / dt)}
 
-    Returns (best_theta_rad, best_x_hit, best_y_hit)
+
+def _brent_search(profile: Profile, target_x: float, target_y: float, dt: float = 0.001,
+                  phys: Physics = None, integrator: str = 'euler', rtol: float = 1e-6, atol: float = 1e-6,
+                  angle_tol: float = 1e-7, holdover_tol: float = None, bracket=None):
+    """Brent root search on the target-plane height residual (see `find_optimal_angle`).
+
+    A `bracket` (low, high) in radians replaces [-45°, 45°] if the residual changes sign
+    over it.
     """
+    # scipy.optimize takes ~0.3 s to import; table lookups and the other searches never need it
+    from scipy.optimize import brentq
     low, high = np.radians(-45.0), np.radians(45.0)
+    limits = _search_limits(target_x, target_y, dt)
+    if holdover_tol is not None:
+        # d(holdover)/d(theta) = target_x / cos(theta)^2 >= target_x on the search interval
+        angle_tol = min(angle_tol, holdover_tol / max(target_x, 1e-9))
+
+    hits = {}
+
+    def residual(theta):
+        # brentq re-evaluates the bracket ends, so every simulation is memoized
+        if theta not in hits:
+            x_hit, y_hit, t, v_end, a_end = simulate_flight(theta, profile=profile, target_x=target_x,
+                                                           dt=dt, phys=phys, integrator=integrator,
+                                                           rtol=rtol, atol=atol, **limits)
+            hits[theta] = (x_hit, y_hit, plane_height(x_hit, y_hit, a_end, target_x) - target_y)
+        return hits[theta][2]
+
+    if bracket is not None and residual(bracket[0]) <= 0 <= residual(bracket[1]):
+        low, high = bracket
+    r_low, r_high = residual(low), residual(high)
+    if r_low > 0 or r_high < 0:
+        # no sign change: the target lies outside the reachable band, return the closest edge
+        best_theta = low if r_low > 0 else high
+        return best_theta, hits[best_theta][0], hits[best_theta][1], SolveInfo('brent', 0, 2, False)
+
+    best_theta, res = brentq(residual, low, high, xtol=angle_tol, full_output=True)
+    if best_theta not in hits:
+        residual(best_theta)
+    best_x_hit, best_y_hit, _ = hits[best_theta]
+    return best_theta, best_x_hit, best_y_hit, SolveInfo('brent', res.iterations, len(hits), res.converged)
+
+
+def _newton_search(profile: Profile, target_x: float, target_y: float, dt: float = 0.001,
+                   phys: Physics = None, angle_tol: float = 1e-7, holdover_tol: float = None,
+                   bracket=None, guess: float = None, max_iterations: int = 50):
+    """Safeguarded Newton iteration on the brent residual (see `find_optimal_angle`).
+
+    Every flight integrates its angle sensitivity, which is the exact slope of the Euler
+    residual. Steps that leave the current bracket are replaced by bisection. Without a
+    `bracket` the ends of [-45°, 45°] are checked first like in `_brent_search`. If a given
+    bracket turns out not to hold the root, the search restarts on [-45°, 45°].
+    """
+    low, high = bracket if bracket is not None else (np.radians(-45.0), np.radians(45.0))
+    limits = _search_limits(target_x, target_y, dt)
+    if holdover_tol is not None:
+        angle_tol = min(angle_tol, holdover_tol / max(target_x, 1e-9))
+    simulations = 0
+
+    def residual(theta):
+        nonlocal simulations
+        simulations += 1
+        x_hit, y_hit, _t, _v, a_end, (slope,) = _flight_sensitivity(theta, profile, target_x, dt=dt, phys=phys,
+                                                                     params=('theta',), **limits)
+        return x_hit, y_hit, plane_height(x_hit, y_hit, a_end, target_x) - target_y, slope
+
+    if bracket is None:
+        x_low, y_low, r_low, _ = residual(low)
+        x_high, y_high, r_high, _ = residual(high)
+        if r_low > 0 or r_high < 0:
+            # no sign change: the target lies outside the reachable band, return the closest edge
+            if r_low > 0:
+                return low, x_low, y_low, SolveInfo('newton', 0, simulations, False)
+            return high, x_high, y_high, SolveInfo('newton', 0, simulations, False)
+
+    theta = guess if guess is not None and low < guess < high else 0.5 * (low + high)
+    converged = False
+    for iteration in range(1, max_iterations + 1):
+        x_hit, y_hit, r, slope = residual(theta)
+        if r < 0:
+            low = theta
+        else:
+            high = theta
+        step = -r / slope if slope > 0 else math.inf
+        if abs(step) < angle_tol or r == 0:
+            converged = True
+            break
+        if high - low < angle_tol:
+            break
+        theta = theta + step if low < theta + step < high else 0.5 * (low + high)
+
+    if not converged and bracket is not None:
+        best_theta, best_x_hit, best_y_hit, info = _newton_search(
+            profile, target_x, target_y, dt=dt, phys=phys, angle_tol=angle_tol,
+            max_iterations=max_iterations)
+        return best_theta, best_x_hit, best_y_hit, SolveInfo('newton', iteration + info.iterations,
+                                                             simulations + info.simulations, info.converged)
+    return theta, x_hit, y_hit, SolveInfo('newton', iteration, simulations, converged)
+
+
+def _bisect_search(profile: Profile, target_x: float, target_y: float, dt: float = 0.001,
+                   phys: Physics = None, iterations: int = 25, integrator: str = 'euler',
+                   rtol: float = 1e-6, atol: float = 1e-6, bracket=None):
+    """Fixed-iteration bisection on the hit/miss test (see `find_optimal_angle`).
+
+    Starts from `bracket` (low, high) in radians if given, else [-45°, 45°].
+    """
+    low, high = bracket if bracket is not None else (np.radians(-45.0), np.radians(45.0))
+    limits = _search_limits(target_x, target_y, dt)
     best_theta = None
     best_x_hit = best_y_hit = None
 
     for _ in range(iterations):
         mid = 0.5 * (low + high)
         x_hit, y_hit, t, v_end, a_end = simulate_flight(mid, profile=profile, target_x=target_x,
-                                                       dt=dt, phys=phys)
+                                                       dt=dt, phys=phys, integrator=integrator,
+                                                       rtol=rtol, atol=atol, **limits)
         if (x_hit < target_x) or (y_hit < target_y):
             low = mid
         else:
@@ -78,4 +808,81 @@ def find_optimal_angle(profile: Profile, target_x: float, target_y: float, dt: f
         best_theta = mid
         best_x_hit, best_y_hit = x_hit, y_hit
 
-    return best_theta, best_x_hit, best_y_hit
+    return best_theta, best_x_hit, best_y_hit, SolveInfo('bisect', iterations, iterations, True)
+
+
+def _ksection_search(profile: Profile, target_x: float, target_y: float, dt: float = 0.001,
+                     phys: Physics = None, iterations: int = 25, k: int = 32,
+                     integrator: str = 'euler', rtol: float = 1e-6, atol: float = 1e-6, bracket=None):
+    """k-section variant of `_bisect_search` (one batch per round).
+
+    The batch kernel is Euler only; with integrator='rk45' the k angles of a round are
+    simulated one after another.
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    low, high = bracket if bracket is not None else (np.radians(-45.0), np.radians(45.0))
+    limits = _search_limits(target_x, target_y, dt)
+    rounds = max(1, int(np.ceil(iterations * np.log(2.0) / np.log(k + 1.0))))
+    fractions = np.arange(1, k + 1) / (k + 1.0)
+    best_theta = None
+    best_x_hit = best_y_hit = None
+
+    for _ in range(rounds):
+        mids = low + (high - low) * fractions
+        if integrator == 'euler':
+            x_hit, y_hit, _t, _v, _a = simulate_flight_batch(mids, profile=profile, target_x=target_x,
+                                                             dt=dt, phys=phys, **limits)
+        else:
+            hits = [simulate_flight(m, profile=profile, target_x=target_x, dt=dt, phys=phys,
+                                    integrator=integrator, rtol=rtol, atol=atol, **limits)[:2] for m in mids]
+            x_hit, y_hit = np.array(hits).T
+        too_low = (x_hit < target_x) | (y_hit < target_y)
+        # too_low is True for the flat angles and False from the switch onwards
+        j = int(np.argmin(too_low)) if not too_low.all() else k
+        if j < k:
+            high = mids[j]
+        if j > 0:
+            low = mids[j - 1]
+        pick = min(j, k - 1)
+        best_theta = float(mids[pick])
+        best_x_hit, best_y_hit = float(x_hit[pick]), float(y_hit[pick])
+
+    return best_theta, best_x_hit, best_y_hit, SolveInfo('ksection', rounds, rounds * k, True)
+
+
+def solve_target(profile: Profile, target_x: float, target_y: float, dt: float = 0.001,
+                 phys: Physics = None, search: str = 'brent', integrator: str = 'euler',
+                 rtol: float = 1e-6, atol: float = 1e-6, holdover_tol: float = None) -> SolveResult:
+    """Find the optimal angle for one target and evaluate the resulting flight.
+
+    Returns a SolveResult with the same quantities the `arrowflight` table prints.
+    Raises flight_envelope.UnreachableTargetError if the flight at the angle found ends
+    early (see `_search_limits`) instead of reaching the target plane.
+    """
+    best_theta, best_x_hit, best_y_hit, info = find_optimal_angle(
+        profile, target_x, target_y, dt=dt, phys=phys, search=search, integrator=integrator,
+        rtol=rtol, atol=atol, holdover_tol=holdover_tol, full_output=True)
+    x_end, y_end, t, v_end, angle_end = simulate_flight(best_theta, profile=profile, target_x=target_x,
+                                                        dt=dt, phys=phys, integrator=integrator,
+                                                        rtol=rtol, atol=atol,
+                                                        **_search_limits(target_x, target_y, dt))
+    if x_end < target_x:
+        from .flight_envelope import UnreachableTargetError
+        raise UnreachableTargetError(
+            profile.name, target_x, target_y, math.nan, math.nan,
+            reason=f"its flight at {np.degrees(best_theta):.3f}° sinks more than {SEARCH_FLOOR_MARGIN:g} m below "
+                   f"the target height or flies longer than {MAX_FLIGHT_TIME:g} s before reaching {target_x:.2f} m")
+    return SolveResult(
+        profile=profile.name,
+        target_x=float(target_x),
+        target_y=float(target_y),
+        holdover=float(np.tan(best_theta) * target_x - target_y),
+        launch_angle=float(np.degrees(best_theta)),
+        best_x_hit=float(best_x_hit),
+        best_y_hit=float(best_y_hit),
+        flight_time=float(t),
+        final_speed=float(v_end),
+        impact_angle=float(angle_end),
+        solver=info
+    )
@@ -9,3 +9,6 @@ class Physics:
 # Global conversion constants
 GRAINS_TO_KG = 0.00006479891
 FPS_TO_MS = 0.3048
+
+# Target ring radii [m] drawn around the aiming point and used for hit probabilities
+RING_RADII = (0.1, 0.2, 0.3, 0.4)
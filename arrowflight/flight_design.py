@@ -0,0 +1,253 @@
+"""Search arrow setups for the flattest or fastest flight over a target band: `arrowflight design`.
+
+Candidate setups are the grid of the given ranges of mass_grains, v0_fps, diameter_m and
+cw (the other values come from a base profile). A candidate is scored over a grid of
+targets covering the band, with one of the objectives
+
+    spread   largest minus smallest holdover [m] (how far the sight moves over the band)
+    time     longest flight time [s]
+
+Candidates that cannot reach every target of the band are infeasible. Both objectives
+are maxima over the band, so the value over the four band corners is a lower bound of
+the full score: the corners of all candidates are solved first in a few vectorized
+batches, and candidates are then scored in order of their bound, in rounds spread over a
+process pool, until the remaining bounds cannot beat the best scores found.
+"""
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from .flight_profiles import Profile, ProfileSet
+from .flight_constants import Physics
+from .flight_sweep import solve_many, solve_profiles
+
+
+DESIGN_PARAMS = ('mass_grains', 'v0_fps', 'diameter_m', 'cw')
+OBJECTIVES = ('spread', 'time')
+DT = 0.001
+
+
+@dataclass
+class Candidate:
+    """An arrow setup and its scores over the band (inf if it cannot reach all of it)."""
+    profile: Profile
+    spread: float
+    max_time: float
+
+    def score(self, objective: str) -> float:
+        return self.spread if objective == 'spread' else self.max_time
+
+
+@dataclass
+class DesignResult:
+    """Best candidates (ascending score) and the counts of the search."""
+    objective: str
+    targets: int
+    best: List[Candidate]
+    candidates: int
+    infeasible: int
+    evaluated: int
+    pruned: int
+    seconds: float
+
+    def lines(self) -> List[str]:
+        out = [f"Searched {self.candidates} setups over {self.targets} targets in {self.seconds:.2f} s: "
+               f"{self.evaluated} scored, {self.pruned} pruned by their corner bound, "
+               f"{self.infeasible} cannot reach the whole band"]
+        if not self.best:
+            out.append("No setup reaches every target of the band.")
+            return out
+        out.append(f"  {'rank':>4}  {'mass_grains':>11}  {'v0_fps':>8}  {'diameter_m':>10}  {'cw':>7}  "
+                   f"{'spread [m]':>10}  {'max time [s]':>12}")
+        for rank, c in enumerate(self.best, 1):
+            p = c.profile
+            out.append(f"  {rank:>4}  {p.mass_grains:>11.1f}  {p.v0_fps:>8.1f}  {p.diameter_m:>10.5f}  {p.cw:>7.4f}  "
+                       f"{c.spread:>10.3f}  {c.max_time:>12.4f}")
+        return out
+
+
+def candidate_profiles(base: Profile, ranges: Dict[str, Tuple[float, float]], steps: int = 5) -> List[Profile]:
+    """Grid of setups: `steps` evenly spaced values for every parameter in `ranges`, base values for the rest."""
+    unknown = set(ranges) - set(DESIGN_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown design parameter(s): {', '.join(sorted(unknown))}")
+    if steps < 1:
+        raise ValueError("steps must be at least 1")
+    names = [name for name in DESIGN_PARAMS if name in ranges]
+    axes = [np.linspace(*ranges[name], steps if ranges[name][0] != ranges[name][1] else 1) for name in names]
+    return [replace(base, name=f"{base.name}_design{i}", **{n: float(v) for n, v in zip(names, values)})
+            for i, values in enumerate(itertools.product(*axes))]
+
+
+def band_targets(x_range: Tuple[float, float], y_range: Tuple[float, float],
+                 points: Tuple[int, int] = (7, 5)) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat (target_x, target_y) arrays of a points[0] x points[1] grid over the band, corners included."""
+    if not 0 < x_range[0] <= x_range[1]:
+        raise ValueError("band distances must be positive and ascending")
+    if y_range[0] > y_range[1]:
+        raise ValueError("band heights must be ascending")
+    xs, ys = np.meshgrid(*(np.linspace(*r, max(n, 2) if r[0] != r[1] else 1) for r, n in zip((x_range, y_range), points)),
+                         indexing='ij')
+    return xs.ravel(), ys.ravel()
+
+
+def _scores(holdover: np.ndarray, t: np.ndarray, x_hit: np.ndarray, vx: np.ndarray, target_x: np.ndarray,
+            converged: np.ndarray) -> Tuple[float, float]:
+    """(spread, max time) of one candidate's band solutions; inf unless every target converged.
+
+    The flight times are stepped back from the final Euler step to the target plane, so
+    they do not jump with the step size.
+    """
+    if not converged.all():
+        return np.inf, np.inf
+    return float(holdover.max() - holdover.min()), float((t - (x_hit - target_x) / vx).max())
+
+
+def corner_bounds(profiles: ProfileSet, x_range, y_range, dt: float = DT, phys: Physics = None,
+                  workers: int = 1) -> np.ndarray:
+    """(n, 2) lower bounds of (spread, max time) from the band corners, one `solve_profiles` batch per corner."""
+    corners = sorted({(x, y) for x in x_range for y in y_range})
+    solved = [solve_profiles(profiles, x, y, dt=dt, phys=phys, workers=workers) for x, y in corners]
+    out = np.empty((len(profiles), 2))
+    for i, results in enumerate(zip(*solved)):
+        vx = [r.final_speed * np.cos(np.radians(r.impact_angle)) for r in results]
+        out[i] = _scores(*(np.array([getattr(r, f) for r in results])
+                           for f in ('holdover', 'flight_time', 'best_x_hit')), np.array(vx),
+                         np.array([r.target_x for r in results]), np.array([r.solver.converged for r in results]))
+    return out
+
+
+def _score_chunk(profiles: Sequence[Profile], tx: np.ndarray, ty: np.ndarray, dt: float,
+                 phys: Physics) -> List[Tuple[float, float]]:
+    """Scores of every profile over the band, each solved as one multi-target `solve_many` batch."""
+    out = []
+    for profile in profiles:
+        sol = solve_many(profile, tx, ty, dt=dt, phys=phys)
+        out.append(_scores(np.tan(sol['theta']) * tx - ty, sol['t'], sol['x_hit'], sol['vx'], tx, sol['converged']))
+    return out
+
+
+def design(base: Profile, ranges: Dict[str, Tuple[float, float]], x_range: Tuple[float, float],
+           y_range: Tuple[float, float], points: Tuple[int, int] = (7, 5), steps: int = 5,
+           objective: str = 'spread', top: int = 5, dt: float = DT, phys: Physics = None,
+           workers: int = 1, chunk_size: int = 8) -> DesignResult:
+    """Find the `top` setups with the lowest objective score over the band (see module docstring).
+
+    Every round scores up to workers * chunk_size candidates, in chunks of `chunk_size`
+    on `workers` processes if workers > 1 (None: number of CPU cores). Candidates whose
+    corner bound is not below the top-th best score found so far are pruned; the
+    result is the same as scoring every candidate.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'. Choose from: {', '.join(OBJECTIVES)}")
+    start = time.perf_counter()
+    profiles = candidate_profiles(base, ranges, steps)
+    tx, ty = band_targets(x_range, y_range, points)
+    workers = workers or os.cpu_count() or 1
+    column = OBJECTIVES.index(objective)
+    bounds = corner_bounds(ProfileSet(profiles), x_range, y_range, dt=dt, phys=phys, workers=workers)[:, column]
+
+    pending = [int(i) for i in np.argsort(bounds, kind='stable') if np.isfinite(bounds[i])]
+    scored: Dict[int, Candidate] = {}
+    pos = 0
+    pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while pos < len(pending):
+            best = sorted(c.score(objective) for c in scored.values())
+            cutoff = best[top - 1] if len(best) >= top else np.inf
+            # bounds are ascending: stop at the first candidate that cannot make the top list
+            batch = list(itertools.takewhile(lambda i: bounds[i] < cutoff, pending[pos:pos + workers * chunk_size]))
+            if not batch:
+                break
+            chunks = [batch[k:k + chunk_size] for k in range(0, len(batch), chunk_size)]
+            if pool is None:
+                results = [_score_chunk([profiles[i] for i in chunk], tx, ty, dt, phys) for chunk in chunks]
+            else:
+                futures = [pool.submit(_score_chunk, [profiles[i] for i in chunk], tx, ty, dt, phys) for chunk in chunks]
+                results = [f.result() for f in futures]
+            for chunk, chunk_scores in zip(chunks, results):
+                scored.update((i, Candidate(profiles[i], *s)) for i, s in zip(chunk, chunk_scores))
+            pos += len(batch)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # ties are ranked in grid order, independent of the rounds and workers
+    feasible = [scored[i] for i in sorted(scored, key=lambda i: (scored[i].score(objective), i))
+                if np.isfinite(scored[i].score(objective))]
+    return DesignResult(
+        objective=objective,
+        targets=int(tx.size),
+        best=feasible[:top],
+        candidates=len(profiles),
+        infeasible=len(profiles) - len(pending) + len(scored) - len(feasible),
+        evaluated=len(scored),
+        pruned=len(pending) - pos,
+        seconds=time.perf_counter() - start,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='arrowflight design', description='Search arrow setups for the smallest holdover spread or flight time over a band of targets.')
+    parser.add_argument('--band-x', type=float, nargs=2, required=True, metavar=('NEAR', 'FAR'), help='Target distances of the band in meters')
+    parser.add_argument('--band-y', type=float, nargs=2, default=(0.0, 0.0), metavar=('LOW', 'HIGH'), help='Target heights of the band in meters (default: 0 0)')
+    parser.add_argument('--band-points', type=int, nargs=2, default=(7, 5), metavar=('NX', 'NY'), help='Targets across the band distances and heights (default: 7 5)')
+    for name, help_unit in (('mass_grains', 'grains'), ('v0_fps', 'fps'), ('diameter_m', 'meters'), ('cw', 'drag coefficient')):
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, nargs=2, metavar=('MIN', 'MAX'), help=f"Range of {name} ({help_unit}) to search (default: the base profile value)")
+    parser.add_argument('--steps', type=int, default=5, help='Values per searched parameter range (default: 5)')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='spread', help='Minimize the holdover spread over the band or the longest flight time (default: spread)')
+    parser.add_argument('--top', type=int, default=5, help='Number of best setups to print (default: 5)')
+    parser.add_argument('--profile', '-p', default='default', help='Base profile for the values that are not searched (default: default)')
+    parser.add_argument('--config-file', '-c', default=str(Path(__file__).with_name('arrows.json')), help='Path to JSON config with named profiles')
+    parser.add_argument('--workers', '-j', type=int, default=1, help='Worker processes for scoring candidates (default: 1, 0 = all cores)')
+    parser.add_argument('--save', default=None, metavar='NAME', help='Write the best setup to the config file as profile NAME')
+    parser.add_argument('--force', action='store_true', help='With --save, overwrite an existing profile entry NAME')
+    args = parser.parse_args(argv)
+
+    ranges = {name: tuple(getattr(args, name)) for name in DESIGN_PARAMS if getattr(args, name) is not None}
+    if not ranges:
+        parser.error('give a range for at least one of --mass-grains, --v0-fps, --diameter-m, --cw')
+    config_path = Path(args.config_file)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            configs = json.load(f)
+    except Exception as e:
+        print(f"Failed to read config file: {e}")
+        sys.exit(1)
+    if args.profile not in configs:
+        print(f"Profile '{args.profile}' not found in config. Available profiles: {', '.join(sorted(configs.keys()))}")
+        sys.exit(1)
+    if args.save in configs and not args.force:
+        print(f"Profile '{args.save}' already exists in {config_path}; save under a new name or use --force to overwrite it.")
+        sys.exit(1)
+
+    base = Profile.from_dict(args.profile, configs[args.profile])
+    try:
+        result = design(base, ranges, tuple(args.band_x), tuple(args.band_y), points=tuple(args.band_points),
+                        steps=args.steps, objective=args.objective, top=args.top, phys=Physics(),
+                        workers=args.workers or None)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print("\n".join(result.lines()))
+    if not result.best:
+        sys.exit(1)
+    if args.save is None:
+        return
+
+    best = result.best[0].profile
+    entry = dict(configs[args.profile])
+    for name in ranges:
+        entry[name] = round(getattr(best, name), 6)
+    configs[args.save] = entry
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(configs, f, indent=2)
+        f.write('\n')
+    print(f"Wrote profile '{args.save}' to {config_path}")
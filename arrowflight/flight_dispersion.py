@@ -0,0 +1,151 @@
+import concurrent.futures
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+import numpy as np
+from .flight_profiles import Profile
+from .flight_constants import Physics, GRAINS_TO_KG, FPS_TO_MS, RING_RADII
+from .flight_compute import _euler_batch, plane_height, simulate_flight, Sensitivity, MAX_FLIGHT_TIME
+
+
+@dataclass
+class ShotSpread:
+    """Standard deviations of the shot-to-shot variation sampled by `impact_heights`."""
+    v0_fps: float = 2.0
+    mass_grains: float = 2.0
+    cw: float = 0.005
+    angle_deg: float = 0.05
+    rho: float = 0.0
+
+
+@dataclass
+class DispersionReport:
+    """Impact-height statistics on the target plane; heights relative to target_y in m."""
+    profile: str
+    target_x: float
+    target_y: float
+    samples: int
+    mean: float
+    std: float
+    percentiles: Dict[int, float] = field(default_factory=dict)
+    hit_probability: Dict[float, float] = field(default_factory=dict)
+
+    def lines(self) -> List[str]:
+        """Human-readable report, one line per item."""
+        out = [f"{self.profile}: {self.samples} shots at {self.target_x:.2f} m, "
+               f"impact height vs target: mean {self.mean:+.3f} m, std {self.std:.3f} m"]
+        out.append("  percentiles: " + ", ".join(f"p{p} {v:+.3f} m" for p, v in self.percentiles.items()))
+        out.append("  hit probability: " + ", ".join(f"r={r:g} m {100 * p:.1f}%" for r, p in self.hit_probability.items()))
+        return out
+
+
+def _heights_chunk(profile: Profile, theta: float, target_x: float, spread: ShotSpread, n: int,
+                   seed, dt: float, phys: Physics) -> np.ndarray:
+    """Sample `n` perturbed shots and return their crossing heights at target_x."""
+    rng = np.random.default_rng(seed)
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    v0 = (profile.v0_fps + spread.v0_fps * rng.standard_normal(n)) * FPS_TO_MS
+    mass = (profile.mass_grains + spread.mass_grains * rng.standard_normal(n)) * GRAINS_TO_KG
+    cw = profile.cw + spread.cw * rng.standard_normal(n)
+    thetas = theta + np.radians(spread.angle_deg) * rng.standard_normal(n)
+    if spread.rho:
+        rho = rho + spread.rho * rng.standard_normal(n)
+    drag = 0.5 * rho * cw * profile.area() / mass
+    x, y, _, vx, vy = _euler_batch(thetas, v0, drag, g, target_x, dt, max_steps=int(MAX_FLIGHT_TIME / dt))
+    return plane_height(x, y, np.degrees(np.arctan2(vy, vx)), target_x)
+
+
+def impact_heights(profile: Profile, theta: float, target_x: float, spread: ShotSpread = None,
+                   samples: int = 10000, dt: float = 0.001, phys: Physics = None, seed: int = None,
+                   chunk_size: int = 8192, workers: int = 1) -> np.ndarray:
+    """Fly `samples` perturbed copies of a shot at launch angle `theta` (rad) in vectorized chunks.
+
+    v0, mass, cw, the launch angle and (if its spread is set) the air density are drawn
+    from normal distributions around the profile values (see ShotSpread). Chunks of `chunk_size` shots bound the memory of the
+    batch kernel; with workers > 1 (None: number of CPU cores) they run on a process pool.
+    Every chunk has its own child seed of `seed`, so the result does not depend on `workers`.
+    Returns the height [m] at which each shot crosses the plane x == target_x.
+    """
+    spread = spread if spread is not None else ShotSpread()
+    sizes = [min(chunk_size, samples - i) for i in range(0, samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+    if workers <= 1:
+        parts = [_heights_chunk(profile, theta, target_x, spread, n, s, dt, phys) for n, s in zip(sizes, seeds)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(_heights_chunk, profile, theta, target_x, spread, n, s, dt, phys)
+                       for n, s in zip(sizes, seeds)]
+            parts = [f.result() for f in futures]
+    return np.concatenate(parts) if parts else np.empty(0)
+
+
+def dispersion_report(profile: Profile, target_x: float, target_y: float,
+                      heights: np.ndarray, radii: Tuple[float, ...] = RING_RADII) -> DispersionReport:
+    """Summarize impact heights; a shot hits a ring if its vertical miss is within the radius.
+
+    The model is two-dimensional, so only the vertical miss distance is known.
+    """
+    miss = heights - target_y
+    return DispersionReport(
+        profile=profile.name,
+        target_x=float(target_x),
+        target_y=float(target_y),
+        samples=int(miss.size),
+        mean=float(miss.mean()),
+        std=float(miss.std()),
+        percentiles={p: float(v) for p, v in zip((5, 50, 95), np.percentile(miss, (5, 50, 95)))},
+        hit_probability={r: float(np.mean(np.abs(miss) <= r)) for r in radii},
+    )
+
+
+@dataclass
+class ErrorBudget:
+    """Linearized impact-height error budget of one shot: per parameter its standard deviation
+    (in the units of ShotSpread), the height derivative per unit and the resulting height
+    spread [m].
+    """
+    profile: str
+    target_x: float
+    sensitivity: Sensitivity
+    rows: List[Tuple[str, float, float, float]]
+    total: float
+
+    def lines(self) -> List[str]:
+        """Human-readable report, one line per item."""
+        out = [f"{self.profile}: impact-height error budget at {self.target_x:.2f} m (1 sigma, linearized)"]
+        for label, sigma, per_unit, height in self.rows:
+            out.append(f"  {label:<22} {sigma:>8g}  {per_unit:+11.4g} m/unit  {height:7.3f} m")
+        out.append(f"  {'total (root sum square)':<22} {'':>8}  {'':>16}  {self.total:7.3f} m")
+        return out
+
+
+# (label, ShotSpread field, Sensitivity field, parameter units per ShotSpread unit)
+_BUDGET_ROWS = (
+    ('launch angle [°]', 'angle_deg', 'theta', np.pi / 180.0),
+    ('release speed [fps]', 'v0_fps', 'v0', FPS_TO_MS),
+    ('arrow mass [gr]', 'mass_grains', 'mass', GRAINS_TO_KG),
+    ('drag coefficient', 'cw', 'cw', 1.0),
+    ('air density [kg/m³]', 'rho', 'rho', 1.0),
+)
+
+
+def error_budget(profile: Profile, theta: float, target_x: float, spread: ShotSpread = None,
+                 dt: float = 0.001, phys: Physics = None) -> ErrorBudget:
+    """Propagate the ShotSpread deviations to the impact height with one sensitivity flight.
+
+    The derivatives of the target-plane height come from a single `simulate_flight` with
+    sensitivity=True at launch angle `theta` (rad); each parameter contributes
+    |derivative| * sigma and the total assumes independent errors. This is the first-order
+    counterpart of `impact_heights`.
+    """
+    spread = spread if spread is not None else ShotSpread()
+    sens = simulate_flight(theta, profile=profile, target_x=target_x, dt=dt, phys=phys, sensitivity=True)[-1]
+    rows = []
+    for label, spread_field, sens_field, unit in _BUDGET_ROWS:
+        per_unit = getattr(sens, sens_field) * unit
+        sigma = getattr(spread, spread_field)
+        rows.append((label, sigma, per_unit, abs(per_unit) * sigma))
+    total = float(np.sqrt(sum(r[3] ** 2 for r in rows)))
+    return ErrorBudget(profile.name, float(target_x), sens, rows, total)
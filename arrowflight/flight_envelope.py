@@ -0,0 +1,254 @@
+"""Reachability envelope of a profile: the band of heights it can hit at every distance.
+
+A fan of launch angles over [-45°, 45°] (the search domain of `find_optimal_angle`) is
+flown once with the batch kernel, recording the height at which every ray crosses each
+station distance, until every ray is descending below ENVELOPE_FLOOR. Targets outside the
+band are rejected before any search runs; for the others the fan angles around the
+target height give a narrow starting bracket.
+
+The fan is flown with the coarse step ENVELOPE_DT (about 0.1 s per profile); the reject
+margin grows with the distance to cover the step error against the solver's integrators.
+Envelopes are kept in memory and saved under the solve cache directory
+(`<cache dir>/envelopes/<hash>.npy`), so every profile is flown once; after
+`persist_envelopes(False)` (the --no-cache flags) they are only kept in memory.
+"""
+import hashlib
+import json
+import math
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .flight_profiles import Profile
+from .flight_constants import Physics
+from .flight_compute import _euler_batch
+from .flight_cache import DEFAULT_CACHE_DIR, SOLVER_VERSION
+from . import flight_stats
+
+
+ENVELOPE_ANGLES = 91        # fan rays over [-45°, 45°], 1° apart
+ENVELOPE_DT = 0.004         # time step of the fan [s]
+ENVELOPE_STEP = 1.0         # station spacing [m]
+ENVELOPE_X_MAX = 1000.0     # farthest station [m]
+ENVELOPE_FLOOR = -50.0      # rays are followed down to this height [m]
+ENVELOPE_MARGIN = (0.05, 1e-3)  # tolerance of the reject test: a [m] + b * target_x
+
+_ENVELOPES: Dict[tuple, 'ReachEnvelope'] = {}
+# whether reach_envelope loads and saves envelopes under the cache directory
+_persist = True
+
+
+class UnreachableTargetError(ValueError):
+    """The target lies outside the band of heights the profile can hit at its distance.
+
+    low/high are NaN if the band is not known; `reason` then explains the rejection.
+    """
+
+    def __init__(self, profile: str, target_x: float, target_y: float, low: float, high: float,
+                 reason: str = None):
+        self.profile = profile
+        self.target_x = target_x
+        self.target_y = target_y
+        self.low = low
+        self.high = high
+        if reason is None:
+            band = "nothing" if high == -math.inf else (
+                f"{'below ' + format(ENVELOPE_FLOOR, '.0f') if low == -math.inf else format(low, '.2f')} to {high:.2f} m")
+            reason = f"at {target_x:.2f} m it can hit heights from {band}"
+        super().__init__(f"target ({target_x:.2f} m, {target_y:.2f} m) is out of reach for profile '{profile}': "
+                         f"{reason}")
+
+
+class ReachEnvelope:
+    """Crossing heights of a fan of launch angles at regularly spaced station distances.
+
+    heights has shape (len(thetas), len(xs)); NaN marks stations a ray did not reach
+    before it sank below `floor`.
+    """
+
+    def __init__(self, thetas: np.ndarray, xs: np.ndarray, heights: np.ndarray, floor: float = ENVELOPE_FLOOR,
+                 margin: Tuple[float, float] = ENVELOPE_MARGIN):
+        self.thetas = thetas
+        self.xs = xs
+        self.heights = heights
+        self.floor = floor
+        self.margin = margin
+        # every ray sank below the floor before the last station: nothing farther is reachable
+        self.complete = bool(np.isnan(heights[:, -1]).all())
+        # last point of every ray above the floor (the launch point included) and the slope of
+        # the chord into it; the flight path only steepens, so past that point a ray stays
+        # below the chord's extension
+        px = np.concatenate(([0.0], xs))
+        ph = np.column_stack([np.zeros(thetas.size), heights])
+        last = np.count_nonzero(~np.isnan(ph), axis=1) - 1
+        rows = np.arange(thetas.size)
+        prev = np.maximum(last - 1, 0)
+        self._last_x, self._last_h = px[last], ph[rows, last]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._last_slope = np.where(last > 0, (ph[rows, last] - ph[rows, prev]) / (px[last] - px[prev]), np.nan)
+
+    def columns(self, target_x: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(known, upper) heights of every fan ray at target_x, or None outside the stations.
+
+        `known` is interpolated between the neighbouring stations (-inf where a ray did not
+        reach both); `upper` bounds the height of the rays that sank below the floor in
+        between by their height at the nearer station.
+        """
+        xs = self.xs
+        if target_x < xs[0]:
+            return None
+        if target_x > xs[-1]:
+            if not self.complete:
+                return None
+            dead = np.full(self.thetas.size, -math.inf)
+            return dead, dead
+        k = min(max(int(np.searchsorted(xs, target_x)), 1), xs.size - 1)
+        u = (target_x - xs[k - 1]) / (xs[k] - xs[k - 1])
+        h0, h1 = self.heights[:, k - 1], self.heights[:, k]
+        known = np.where(np.isnan(h0) | np.isnan(h1), -math.inf, (1 - u) * h0 + u * h1)
+        upper = np.where(np.isnan(h1), np.nan_to_num(h0, nan=-math.inf), known)
+        return known, upper
+
+    def band(self, target_x: float) -> Optional[Tuple[float, float]]:
+        """(lowest, highest) height reachable at target_x; -inf stands for "below the floor"."""
+        cols = self.columns(target_x)
+        if cols is None:
+            return None
+        known, upper = cols
+        return float(known[0]), float(upper.max())
+
+    def outside(self, target_x: float, target_y: float) -> Optional[str]:
+        """'high' or 'low' if the target is out of reach, None if it may be reachable."""
+        band = self.band(target_x)
+        if band is None:
+            return None
+        low, high = band
+        margin = self.margin[0] + self.margin[1] * target_x
+        if target_y > high + margin and target_y >= self.floor:
+            return 'high'
+        if target_y < low - margin:
+            return 'low'
+        if target_y < self.floor and high == -math.inf and self.sunk_reach(target_y) < target_x - margin:
+            # no ray crosses target_x above the floor, and none gets that far sinking to target_y
+            return 'low'
+        return None
+
+    def sunk_reach(self, target_y: float) -> float:
+        """Bound of the distance [m] any fan ray covers before it sinks to target_y below the floor."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            reach = np.where(self._last_slope < 0, self._last_x + (self._last_h - target_y) / -self._last_slope, math.inf)
+        return float(reach.max())
+
+    def bracket(self, target_x: float, target_y: float) -> Optional[Tuple[float, float]]:
+        """Launch angles [rad] around the first fan ray that reaches target_y, padded by one ray
+        on each side against the step error; None if the envelope cannot tell.
+
+        The bracket is not guaranteed near the top of the band; callers verify its ends.
+        """
+        cols = self.columns(target_x)
+        if cols is None:
+            return None
+        above = cols[0] >= target_y
+        j = int(np.argmax(above))
+        if not above[j] or j == 0:
+            return None
+        n = self.thetas.size
+        return float(self.thetas[max(j - 2, 0)]), float(self.thetas[min(j + 1, n - 1)])
+
+    def initial_angle(self, target_x: float, target_y: float) -> Optional[float]:
+        """Launch angle [rad] interpolated between the two fan rays around target_y (a starting
+        point for Newton's method); None where `bracket` is None.
+        """
+        cols = self.columns(target_x)
+        if cols is None or self.bracket(target_x, target_y) is None:
+            return None
+        known = cols[0]
+        j = int(np.argmax(known >= target_y))
+        u = (target_y - known[j - 1]) / (known[j] - known[j - 1])
+        return float(self.thetas[j - 1] + u * (self.thetas[j] - self.thetas[j - 1]))
+
+
+def _fan_axes(angles: int, step: float, x_max: float) -> Tuple[np.ndarray, np.ndarray]:
+    return np.radians(np.linspace(-45.0, 45.0, angles)), np.arange(step, x_max + 0.5 * step, step)
+
+
+def build_envelope(profile: Profile, phys: Physics = None, dt: float = ENVELOPE_DT, angles: int = ENVELOPE_ANGLES,
+                   step: float = ENVELOPE_STEP, x_max: float = ENVELOPE_X_MAX,
+                   floor: float = ENVELOPE_FLOOR) -> ReachEnvelope:
+    """Fly the envelope fan of `profile` in one batch (see module docstring)."""
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    drag = 0.5 * rho * profile.cw * profile.area() / profile.mass_kg()
+    thetas, xs = _fan_axes(angles, step, x_max)
+    *_, heights = _euler_batch(thetas, profile.v0_ms(), drag, g, None, dt, stations=xs, y_floor=floor)
+    # drop the stations no ray reached, except one that marks the envelope as complete
+    reached = np.flatnonzero(~np.isnan(heights).all(axis=0))
+    keep = min(int(reached[-1]) + 2 if reached.size else 1, xs.size)
+    return ReachEnvelope(thetas, xs[:keep], heights[:, :keep], floor=floor)
+
+
+def envelope_key(profile: Profile, phys: Physics) -> str:
+    """Hash of the profile values, physics and fan settings an envelope depends on."""
+    payload = {
+        'profile': {k: float(v) for k, v in asdict(profile).items() if k != 'name'},
+        'physics': {k: float(v) for k, v in asdict(phys).items()},
+        'fan': [ENVELOPE_ANGLES, ENVELOPE_DT, ENVELOPE_STEP, ENVELOPE_X_MAX, ENVELOPE_FLOOR],
+        'solver': SOLVER_VERSION,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def persist_envelopes(enabled: bool):
+    """Turn loading and saving envelopes under the cache directory on or off for this process."""
+    global _persist
+    _persist = enabled
+
+
+def reach_envelope(profile: Profile, phys: Physics = None, cache_dir: Path = None) -> ReachEnvelope:
+    """The envelope of `profile`: from memory, from `cache_dir` (default: the solve cache
+    directory), or flown and saved there (see `persist_envelopes`).
+    """
+    phys = phys if phys is not None else Physics()
+    key = envelope_key(profile, phys)
+    envelope = _ENVELOPES.get(key)
+    if envelope is not None:
+        return envelope
+
+    path = Path(cache_dir or DEFAULT_CACHE_DIR) / 'envelopes' / f"{key}.npy"
+    heights = None
+    if _persist:
+        try:
+            heights = np.load(path)
+        except (OSError, ValueError):
+            pass
+    if heights is not None:
+        thetas, xs = _fan_axes(ENVELOPE_ANGLES, ENVELOPE_STEP, ENVELOPE_X_MAX)
+        envelope = ReachEnvelope(thetas, xs[:heights.shape[1]], heights)
+    else:
+        flight_stats.count('envelopes_built')
+        with flight_stats.phase('envelope_build'):
+            envelope = build_envelope(profile, phys)
+        if _persist:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # written under a temporary name so concurrent processes never load a partial file
+                tmp = path.with_name(f"{key}.{os.getpid()}.tmp.npy")
+                np.save(tmp, envelope.heights)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+    _ENVELOPES[key] = envelope
+    return envelope
+
+
+def check_reachable(profile: Profile, target_x: float, target_y: float, phys: Physics = None):
+    """Raise UnreachableTargetError if the envelope rules the target out."""
+    envelope = reach_envelope(profile, phys)
+    if envelope.outside(target_x, target_y) is not None:
+        low, high = envelope.band(target_x)
+        reason = None
+        if high == -math.inf and target_y < envelope.floor:
+            reason = (f"no flight crosses {target_x:.2f} m above {envelope.floor:.0f} m, and none gets that far "
+                      f"before sinking to {target_y:.2f} m")
+        raise UnreachableTargetError(profile.name, target_x, target_y, low, high, reason=reason)
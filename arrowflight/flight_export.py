@@ -0,0 +1,160 @@
+"""Headless trajectory reports for a grid of targets: `arrowflight export`.
+
+One image (PNG, SVG or PDF) is written per target with the trajectories of all profiles,
+or with --split-profiles one per profile and target. The reports are rendered without a
+display on a process pool: every worker process keeps one BatchSolver (lookup tables,
+solve cache) and one ReportFigure, whose axes, rings and curves are only updated from
+report to report.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from .flight_constants import Physics
+from .flight_batch import BatchSolver
+from .flight_cache import default_cache
+from .flight_envelope import persist_envelopes, reach_envelope
+from .calc_profile_results import frange
+
+
+EXPORT_FORMATS = ('png', 'svg', 'pdf')
+DT = 0.001       # time step [s], as for a single `arrowflight` call
+PLOT_DX = 0.1    # recorded trajectory spacing [m]
+
+# per-process state of the export workers, set up by _init_worker
+_WORKER: Dict = {}
+
+
+def report_jobs(names: Sequence[str], points: Sequence[Tuple[float, float]], out_dir: Path, fmt: str = 'png',
+                split_profiles: bool = False) -> List[Tuple[str, float, float, Tuple[str, ...]]]:
+    """(path, target_x, target_y, profile names) of every report, in grid order."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+    groups = [(f"{name}_", (name,)) for name in names] if split_profiles else [("", tuple(names))]
+    return [(str(Path(out_dir) / f"{prefix}x{x:g}_y{y:g}.{fmt}"), x, y, group)
+            for x, y in points for prefix, group in groups]
+
+
+def _init_worker(configs: Dict, config_path: Path, names: Sequence[str], use_cache: bool, figsize, dpi: float):
+    # matplotlib is only needed by the processes that render
+    from .flight_plot import ReportFigure
+
+    cache = default_cache() if use_cache else None
+    persist_envelopes(use_cache)
+    _WORKER['solver'] = BatchSolver(configs, config_path, names, Physics(), DT, cache=cache)
+    _WORKER['figure'] = ReportFigure(figsize=figsize, dpi=dpi)
+    # profile colours stay the same in every report
+    _WORKER['colors'] = {name: f"C{i % 10}" for i, name in enumerate(names)}
+
+
+def _render_chunk(jobs) -> List[Tuple[Optional[str], List[str]]]:
+    """Render every job of the chunk; returns (path or None if nothing was drawn, error messages)."""
+    solver, figure, colors = _WORKER['solver'], _WORKER['figure'], _WORKER['colors']
+    out = []
+    for path, target_x, target_y, names in jobs:
+        trajectories, errors = [], []
+        notes = [f"target {target_x:g} m, {target_y:+g} m", "",
+                 f"{'profile':<10}{'angle [°]':>9}{'hold [m]':>10}{'t [s]':>7}"]
+        for name in names:
+            try:
+                result, traj = solver.trajectory(name, target_x, target_y, record_dx=PLOT_DX)
+            except ValueError as e:
+                errors.append(str(e))
+                notes.append(f"{name:<10} out of reach")
+                continue
+            trajectories.append({'xs': traj.x, 'ys': traj.y, 'v_total': traj.speed, 'label': name,
+                                 'target_height_rel': result.holdover, 'color': colors.get(name)})
+            notes.append(f"{name:<10}{result.launch_angle:>9.3f}{result.holdover:>+10.3f}{result.flight_time:>7.2f}")
+        if trajectories:
+            figure.save(path, trajectories, target_x, notes)
+        out.append((path if trajectories else None, errors))
+    return out
+
+
+def export_reports(configs: Dict, config_path: Path, names: Sequence[str], jobs, workers: int = None,
+                   chunk_size: int = None, use_cache: bool = True, figsize=(12, 7), dpi: float = 100):
+    """Render `jobs` (see `report_jobs`) on `workers` processes (None: number of CPU cores).
+
+    Yields (path or None, error messages) per job in order. Lookup tables and reachability
+    envelopes are prepared here once, so the workers only load them.
+    """
+    jobs = list(jobs)
+    persist_envelopes(use_cache)
+    solver = BatchSolver(configs, config_path, names, Physics(), DT, cache=default_cache() if use_cache else None)
+    for name in names:
+        profile = solver.profile(name)
+        solver.table(profile)
+        reach_envelope(profile, solver.phys)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    if chunk_size is None:
+        # a few chunks per worker keeps the pool busy while the tail finishes
+        chunk_size = max(1, len(jobs) // (workers * 4))
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    init_args = (configs, config_path, list(names), use_cache, figsize, dpi)
+
+    if workers == 1:
+        _init_worker(*init_args)
+        for chunk in chunks:
+            yield from _render_chunk(chunk)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=init_args) as ex:
+        futures = [ex.submit(_render_chunk, chunk) for chunk in chunks]
+        for f in futures:
+            yield from f.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='arrowflight export', description='Render trajectory reports for a grid of targets to image files without a display.')
+    parser.add_argument('profile', nargs='*', default=['default'], help='One or more named profiles from the config file (default: ["default"])')
+    parser.add_argument('--x_values', nargs=3, type=float, default=[10.0, 5.0, 100.0], help='The start, step and end values for target distances in meters (default: 10 5 100)')
+    parser.add_argument('--y_values', nargs=3, type=float, default=[0.0, 1.0, 0.0], help='The start, step and end values for target heights in meters (default: 0 1 0)')
+    parser.add_argument('--output-dir', '-o', default='reports', help='Directory for the report files (default: reports)')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='png', help='Image format (default: png)')
+    parser.add_argument('--split-profiles', action='store_true', help='Write one report per profile and target instead of one per target with all profiles')
+    parser.add_argument('--dpi', type=float, default=100, help='Resolution of PNG reports (default: 100)')
+    parser.add_argument('--config-file', '-c', default=str(Path(__file__).with_name('arrows.json')), help='Path to JSON config with named profiles')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='Number of worker processes (default: number of CPU cores)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the solve cache')
+    args = parser.parse_args(argv)
+
+    config_path = Path(args.config_file)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            configs = json.load(f)
+    except Exception as e:
+        print(f"Failed to read config file: {e}")
+        sys.exit(1)
+    for name in args.profile:
+        if name not in configs:
+            print(f"Profile '{name}' not found in config. Available profiles: {', '.join(sorted(configs.keys()))}")
+            sys.exit(1)
+
+    try:
+        points = [(x, y) for x in frange(args.x_values[0], args.x_values[2], args.x_values[1])
+                  for y in frange(args.y_values[0], args.y_values[2], args.y_values[1])]
+        jobs = report_jobs(args.profile, points, Path(args.output_dir), args.format, args.split_profiles)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    written = 0
+    failed = []
+    for path, errors in export_reports(configs, config_path, args.profile, jobs, workers=args.workers,
+                                       use_cache=not args.no_cache, dpi=args.dpi):
+        written += path is not None
+        failed += errors
+    for message in failed:
+        print(message)
+    print(f"Wrote {written} {args.format} reports to {args.output_dir} in {time.perf_counter() - start:.1f} s"
+          + (f"; {len(failed)} profile/target pairs out of reach" if failed else ""))
+    if failed:
+        sys.exit(1)
@@ -4,7 +4,342 @@ import readchar  # Third-party: readchar (MIT)
 from matplotlib.patches import Circle
 from matplotlib.gridspec import GridSpec
 import threading
+import time
 import random
+from .flight_constants import RING_RADII
+
+# ring colours from the innermost to the outermost of RING_RADII
+RING_COLORS = ('gold', 'red', 'tab:blue', 'black')
+
+
+def _draw_rings(ax):
+    for radius, color in zip(RING_RADII, RING_COLORS):
+        ax.add_patch(Circle((0, 0), radius, fill=False, edgecolor=color, linewidth=2))
+
+
+def downsample_minmax(xs, ys, n_bins: int):
+    """Indices of the points to draw for a curve over monotonic xs on an axis `n_bins` pixels wide.
+
+    The x range is split into n_bins equal bins; per bin the first, last, lowest and highest
+    points are kept, so the drawn curve is identical at pixel resolution.
+    """
+    xs, ys = np.asarray(xs), np.asarray(ys)
+    n = xs.size
+    if n <= 4 * n_bins or n_bins < 1:
+        return np.arange(n)
+    span = xs[-1] - xs[0]
+    if not span > 0:
+        return np.arange(n)
+    bins = np.minimum(((xs - xs[0]) / span * n_bins).astype(int), n_bins - 1)
+    # bins are contiguous runs since xs is monotonic; lexsort puts every run's min first and max last
+    order = np.lexsort((ys, bins))
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    sorted_bins = bins[order]
+    run_first = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+    run_last = np.r_[run_first[1:], n] - 1
+    keep = np.concatenate([starts, ends, order[run_first], order[run_last]])
+    return np.unique(keep)
+
+
+def _plot_decimated(ax, xs, ys, **kwargs):
+    """ax.plot reduced to what the axes can show at their pixel width."""
+    xs, ys = np.asarray(xs), np.asarray(ys)
+    idx = downsample_minmax(xs, ys, max(int(ax.bbox.width), 1))
+    return ax.plot(xs[idx], ys[idx], **kwargs)
+
+
+def _show_until_key(fig):
+    """Show the figures and block until a key is pressed in a plot window or in the terminal,
+    or the window is closed.
+
+    The GUI main loop idles in plt.show(); a key press or close event ends it. The terminal
+    key is read on a thread and noticed by a slow canvas timer, since only the GUI thread
+    may close windows.
+    """
+    key_pressed = threading.Event()
+
+    def _close(*_):
+        # closing the windows fires close_event again
+        if key_pressed.is_set() and not plt.get_fignums():
+            return
+        key_pressed.set()
+        plt.close('all')
+
+    fig.canvas.mpl_connect('key_press_event', _close)
+    fig.canvas.mpl_connect('close_event', _close)
+
+    def _wait_for_key():
+        try:
+            readchar.readkey()
+        except Exception:
+            return
+        key_pressed.set()
+
+    def _check_key():
+        if key_pressed.is_set():
+            plt.close('all')
+
+    timer = fig.canvas.new_timer(interval=250)
+    timer.add_callback(_check_key)
+    timer.start()
+    threading.Thread(target=_wait_for_key, daemon=True).start()
+
+    print("Press any key in the terminal or the plot window to exit the program...")
+    plt.show()
+    timer.stop()
+    plt.close('all')
+
+
+def _fits(lo: float, hi: float, current) -> bool:
+    """Whether axis limits `current` still suit data spanning [lo, hi]: they contain it and
+    the data fills at least half of the view."""
+    return current[0] <= lo and hi <= current[1] and max(hi - lo, 1e-3) >= 0.5 * (current[1] - current[0])
+
+
+def _padded(lo: float, hi: float, pad: float = 0.25):
+    """Limits around [lo, hi] with room for the data to grow before the next rescale."""
+    span = max(hi - lo, 1e-3)
+    return lo - pad * span, hi + pad * span
+
+
+class TrajectoryFigure:
+    """Trajectory, speed and aim axes whose curves are updated in place.
+
+    Every curve has a key (the profile name); `update` creates its Line2D objects on first
+    use and afterwards only replaces their data. The curves, titles and any artist passed
+    to `add_animated` are drawn by blitting over a saved background, so `refresh` repaints
+    the whole figure only when an axis has to be rescaled or the legend changes.
+    `overlays` are artists (e.g. widget axes) repainted on every blit.
+
+    With live=False (off-screen figures) nothing is animated and `refresh` fits the axes
+    tightly to every new set of curves without drawing; the caller saves the figure.
+    """
+
+    def __init__(self, fig, ax_traj, ax_speed, ax_aim, live: bool = True):
+        self.fig = fig
+        self.live = live
+        self.ax_traj = ax_traj
+        self.ax_speed = ax_speed
+        self.ax_aim = ax_aim
+        self.curves = {}
+        self.animated = [ax_traj.title, ax_aim.title]
+        self.overlays = []
+        self.background = None
+        self.legend_keys = None
+
+        ax_traj.set_xlabel("Horizontal distance [m]")
+        ax_traj.set_ylabel("Height [m]")
+        ax_traj.grid(True)
+        ax_speed.set_ylabel("Speed [m/s]")
+        ax_speed.grid(True)
+        _draw_rings(ax_aim)
+        ax_aim.plot(0, 0, 'ko')
+        ax_aim.set_aspect('equal', 'box')
+        ax_aim.set_xlabel("X [m]")
+        ax_aim.set_ylabel("Y [m]")
+        ax_aim.set_title(f"Aiming rel. to target.\n(Reference circle D={2 * RING_RADII[-1]:g} m)")
+        ax_aim.grid(True)
+        for ax in (ax_traj, ax_speed):
+            ax.set_xlim(0.0, 1.0)
+            ax.set_ylim(0.0, 1.0)
+        ax_aim.set_xlim(-RING_RADII[-1], RING_RADII[-1])
+        ax_aim.set_ylim(-RING_RADII[-1], RING_RADII[-1])
+        if live:
+            for artist in self.animated:
+                artist.set_animated(True)
+            fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def add_animated(self, artist):
+        if self.live:
+            artist.set_animated(True)
+            self.animated.append(artist)
+        return artist
+
+    def update(self, key, xs, ys, v_total, target_height_rel, color=None, label=None):
+        """Show the curves of `key` with new data."""
+        xs, ys, v_total = np.asarray(xs), np.asarray(ys), np.asarray(v_total)
+        idx = downsample_minmax(xs, ys, max(int(self.ax_traj.bbox.width), 1))
+        vidx = downsample_minmax(xs, v_total, max(int(self.ax_speed.bbox.width), 1))
+        if key not in self.curves:
+            color = color or tuple(np.random.rand(3,))
+            label = label if label is not None else str(key)
+            traj, = self.ax_traj.plot([], [], color=color, label=label)
+            speed, = self.ax_speed.plot([], [], color=color, label=label)
+            aim, = self.ax_aim.plot([], [], marker='o', color=color, markersize=8, alpha=0.5)
+            text = self.ax_aim.text(0.1, 0.0, label)
+            self.curves[key] = (traj, speed, aim, text)
+            for artist in self.curves[key]:
+                self.add_animated(artist)
+        traj, speed, aim, text = self.curves[key]
+        traj.set_data(xs[idx], ys[idx])
+        speed.set_data(xs[vidx], v_total[vidx])
+        aim.set_data([0.0], [target_height_rel])
+        text.set_position((0.1, target_height_rel - 0.1))
+        for artist in self.curves[key]:
+            artist.set_visible(True)
+
+    def hide(self, key):
+        for artist in self.curves.get(key, ()):
+            artist.set_visible(False)
+
+    def refresh(self, target_x: float):
+        """Repaint after `update`/`hide`: blit, or redraw everything if the view has to change."""
+        self.ax_traj.set_title(f"Arrow - Optimized flight ({target_x:.2f}m target)")
+        visible = {k: c for k, c in self.curves.items() if c[0].get_visible()}
+        full = self.background is None
+        if visible:
+            traj = [c[0] for c in visible.values()]
+            speed = [c[1] for c in visible.values()]
+            x = (0.0, max(line.get_xdata().max() for line in traj))
+            y = (min(line.get_ydata().min() for line in traj), max(line.get_ydata().max() for line in traj))
+            v = (min(line.get_ydata().min() for line in speed), max(line.get_ydata().max() for line in speed))
+            aim = max(RING_RADII[-1], max(abs(c[2].get_ydata()[0]) for c in visible.values()) + 0.1)
+            if not self.live:
+                self._rescale(x, y, v, aim, pad=0.05)
+            elif not (_fits(*x, self.ax_traj.get_xlim()) and _fits(*y, self.ax_traj.get_ylim())
+                      and _fits(*v, self.ax_speed.get_ylim()) and _fits(0.0, aim, (0.0, self.ax_aim.get_ylim()[1]))):
+                # rescale every axis at once so the others do not each cost a repaint of their own soon after
+                self._rescale(x, y, v, aim * 1.25)
+                full = True
+        if list(visible) != self.legend_keys:
+            self.legend_keys = list(visible)
+            for ax, i in ((self.ax_traj, 0), (self.ax_speed, 1)):
+                if visible:
+                    ax.legend(handles=[c[i] for c in visible.values()])
+                elif ax.get_legend() is not None:
+                    ax.get_legend().remove()
+            full = True
+        if not self.live:
+            return
+        if full:
+            self.fig.canvas.draw_idle()
+        else:
+            self.blit()
+
+    def _rescale(self, x, y, v, aim: float, pad: float = 0.25):
+        x_lim = (0.0, _padded(*x, pad=pad)[1])
+        self.ax_traj.set_xlim(*x_lim)
+        self.ax_speed.set_xlim(*x_lim)
+        self.ax_traj.set_ylim(*_padded(*y, pad=pad))
+        self.ax_speed.set_ylim(*_padded(*v, pad=pad))
+        self.ax_aim.set_xlim(-aim, aim)
+        self.ax_aim.set_ylim(-aim, aim)
+
+    def _draw_animated(self):
+        for artist in self.animated:
+            self.fig.draw_artist(artist)
+
+    def _on_draw(self, event):
+        canvas = self.fig.canvas
+        self.background = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def blit(self):
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        for artist in self.overlays:
+            self.fig.draw_artist(artist)
+        self._draw_animated()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+
+class ReportFigure:
+    """Off-screen trajectory report on an Agg canvas, reused for every target it renders.
+
+    The grid, axes, rings and curve artists are created once; `save` only updates them,
+    so a batch of reports does not rebuild the figure per image. Needs no display.
+    """
+
+    def __init__(self, figsize=(12, 7), dpi: float = 100):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        gs = GridSpec(2, 3, figure=fig)
+        self.view = TrajectoryFigure(fig, fig.add_subplot(gs[0, 0:2]), fig.add_subplot(gs[1, 0:2]),
+                                     fig.add_subplot(gs[0, 2]), live=False)
+        ax_notes = fig.add_subplot(gs[1, 2])
+        ax_notes.set_axis_off()
+        self.notes = ax_notes.text(0.0, 1.0, "", va='top', family='monospace', fontsize=9, transform=ax_notes.transAxes)
+        # laid out once; a layout engine left on the figure would cost an extra draw per savefig
+        fig.tight_layout()
+        if hasattr(fig, 'set_layout_engine'):  # matplotlib >= 3.6; older versions keep no engine
+            fig.set_layout_engine('none')
+
+    def save(self, path, trajectories, target_x: float, notes=(), **savefig_kw):
+        """Render `trajectories` (dicts like for `plot_trajectories`) and `notes` lines to `path`;
+        the file format follows its suffix."""
+        shown = {traj['label'] for traj in trajectories}
+        for key in self.view.curves:
+            if key not in shown:
+                self.view.hide(key)
+        for traj in trajectories:
+            self.view.update(traj['label'], traj['xs'], traj['ys'], traj['v_total'], traj['target_height_rel'],
+                             color=traj.get('color'), label=traj['label'])
+        self.view.refresh(target_x)
+        self.notes.set_text("\n".join(notes))
+        self.view.fig.savefig(path, **savefig_kw)
+
+
+def plot_interactive(solve, names, shown, target_x: float, target_y: float, colors=None):
+    """Live retargeting window: sliders for target distance and height, check boxes for the profiles.
+
+    `solve(name, target_x, target_y)` returns a trajectory dict like the entries of
+    `plot_trajectories` plus a 'summary' line, or raises ValueError (e.g. out of reach).
+    It is called for every checked profile whenever a slider moves or a box is ticked, and
+    the curves are updated in place. Blocks like the static plots.
+    """
+    from matplotlib.widgets import CheckButtons, Slider
+
+    fig = plt.figure(figsize=(12, 7))
+    gs = GridSpec(2, 3, figure=fig, bottom=0.2)
+    view = TrajectoryFigure(fig, fig.add_subplot(gs[0, 0:2]), fig.add_subplot(gs[1, 0:2]), fig.add_subplot(gs[0, 2]))
+    ax_check = fig.add_subplot(gs[1, 2])
+    status = view.add_animated(fig.text(0.70, 0.02, "", fontsize=8, va='bottom', family='monospace'))
+
+    x_slider = Slider(fig.add_axes([0.12, 0.08, 0.5, 0.03]), "Distance [m]", 1.0, max(150.0, 2 * target_x),
+                      valinit=target_x, valstep=0.5)
+    y_slider = Slider(fig.add_axes([0.12, 0.03, 0.5, 0.03]), "Height [m]", min(-20.0, target_y - 10.0),
+                      max(20.0, target_y + 10.0), valinit=target_y, valstep=0.1)
+    checks = CheckButtons(ax_check, list(names), [name in shown for name in names])
+    # the sliders are repainted by the view's blit instead of a full redraw per change;
+    # ticking a box changes the legend, which redraws everything anyway
+    for widget in (x_slider, y_slider, checks):
+        widget.drawon = False
+    view.overlays += [x_slider.ax, y_slider.ax]
+    colors = colors or {}
+
+    def redraw(_=None):
+        start = time.perf_counter()
+        tx, ty = float(x_slider.val), float(y_slider.val)
+        lines = []
+        for name, on in zip(names, checks.get_status()):
+            if not on:
+                view.hide(name)
+                continue
+            try:
+                traj = solve(name, tx, ty)
+            except ValueError as e:
+                view.hide(name)
+                lines.append(f"{name}: {e}")
+                continue
+            view.update(name, traj['xs'], traj['ys'], traj['v_total'], traj['target_height_rel'],
+                        color=colors.get(name), label=name)
+            lines.append(traj.get('summary', name))
+        lines.append(f"solved in {1000 * (time.perf_counter() - start):.1f} ms")
+        status.set_text("\n".join(lines))
+        view.refresh(tx)
+
+    x_slider.on_changed(redraw)
+    y_slider.on_changed(redraw)
+    checks.on_clicked(redraw)
+    redraw()
+    # the widgets only respond while they are referenced
+    fig._arrowflight_widgets = (x_slider, y_slider, checks)
+    _show_until_key(fig)
 
 
 def plot_trajectory(xs, ys, v_total, target_height_rel, target_x):
@@ -15,35 +350,28 @@ def plot_trajectory(xs, ys, v_total, target_height_rel, target_x):
     ax2 = fig.add_subplot(gs[1, 0:2])
     ax3 = fig.add_subplot(gs[0, 2])
 
-    ax1.plot(xs, ys, color="tab:green")
+    _plot_decimated(ax1, xs, ys, color="tab:green")
     ax1.set_xlabel("Horizontal distance [m]")
     ax1.set_ylabel("Height [m]")
     ax1.set_title(f"Arrow - Optimized flight ({target_x:.2f}m target)")
     ax1.grid(True)
 
-    ax2.plot(xs, v_total, color="tab:blue")
+    _plot_decimated(ax2, xs, v_total, color="tab:blue")
     ax2.set_ylabel("Speed [m/s]")
     ax2.grid(True)
 
-    circle_black = Circle((0, 0), 0.4, fill=False, edgecolor='black', linewidth=2)
-    circle_blue = Circle((0, 0), 0.3, fill=False, edgecolor='tab:blue', linewidth=2)
-    circle_red = Circle((0, 0), 0.2, fill=False, edgecolor='red', linewidth=2)
-    circle_gold = Circle((0, 0), 0.1, fill=False, edgecolor='gold', linewidth=2)
-    ax3.add_patch(circle_black)
-    ax3.add_patch(circle_blue)
-    ax3.add_patch(circle_red)
-    ax3.add_patch(circle_gold)
+    _draw_rings(ax3)
     ax3.plot(0, 0, 'ko')
 
     ax3.plot(0, target_height_rel, marker='o', color='tab:green', markersize=8)
 
     ax3.set_aspect('equal', 'box')
-    lim = max(0.4, abs(target_height_rel) + 0.1)
+    lim = max(RING_RADII[-1], abs(target_height_rel) + 0.1)
     ax3.set_xlim(-lim, lim)
     ax3.set_ylim(-lim, lim)
     ax3.set_xlabel("X [m]")
     ax3.set_ylabel("Y [m]")
-    ax3.set_title("Circles around target/origin (D=0.8 m)")
+    ax3.set_title(f"Circles around target/origin (D={2 * RING_RADII[-1]:g} m)")
     ax3.grid(True)
 
     ax3.annotate(
@@ -58,27 +386,7 @@ def plot_trajectory(xs, ys, v_total, target_height_rel, target_x):
     )
 
     plt.tight_layout()
-
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
-
-    print("Press any key in the terminal to exit the program...")
-
-    key_pressed = threading.Event()
-
-    def _wait_for_key():
-        try:
-            readchar.readkey()
-        except Exception:
-            pass
-        key_pressed.set()
-
-    threading.Thread(target=_wait_for_key, daemon=True).start()
-    while not key_pressed.is_set():
-        plt.pause(0.1)
-    plt.close('all')
+    _show_until_key(fig)
 
 
 
@@ -99,8 +407,8 @@ def plot_trajectories(trajectories, target_x):
         v_total = traj['v_total']
         label = traj.get('label')
         color = traj.get('color') or tuple(np.random.rand(3,))
-        ax1.plot(xs, ys, color=color, label=label)
-        ax2.plot(xs, v_total, color=color, label=label)
+        _plot_decimated(ax1, xs, ys, color=color, label=label)
+        _plot_decimated(ax2, xs, v_total, color=color, label=label)
 
     ax1.set_xlabel("Horizontal distance [m]")
     ax1.set_ylabel("Height [m]")
@@ -113,14 +421,7 @@ def plot_trajectories(trajectories, target_x):
     ax2.legend()
 
     # draw reference circles in ax3 (same as single-plot)
-    circle_black = Circle((0, 0), 0.4, fill=False, edgecolor='black', linewidth=2)
-    circle_blue = Circle((0, 0), 0.3, fill=False, edgecolor='tab:blue', linewidth=2)
-    circle_red = Circle((0, 0), 0.2, fill=False, edgecolor='red', linewidth=2)
-    circle_gold = Circle((0, 0), 0.1, fill=False, edgecolor='gold', linewidth=2)
-    ax3.add_patch(circle_black)
-    ax3.add_patch(circle_blue)
-    ax3.add_patch(circle_red)
-    ax3.add_patch(circle_gold)
+    _draw_rings(ax3)
     ax3.plot(0, 0, 'ko')
 
     # pick an average target height annotation if provided
@@ -135,34 +436,14 @@ def plot_trajectories(trajectories, target_x):
 
     height_max = max(heights) if heights else 0.0
     ax3.set_aspect('equal', 'box')
-    lim = max(0.4, abs(height_max) + 0.1)
+    lim = max(RING_RADII[-1], abs(height_max) + 0.1)
     ax3.set_xlim(-lim, lim)
     ax3.set_ylim(-lim, lim)
     ax3.set_xlabel("X [m]")
     ax3.set_ylabel("Y [m]")
-    ax3.set_title("Aiming rel. to target. (Reference circle D=0.8 m)")
+    ax3.set_title(f"Aiming rel. to target. (Reference circle D={2 * RING_RADII[-1]:g} m)")
     ax3.grid(True)
 
 
     plt.tight_layout()
-
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
-
-    print("Press any key in the terminal to exit the program...")
-
-    key_pressed = threading.Event()
-
-    def _wait_for_key():
-        try:
-            readchar.readkey()
-        except Exception:
-            pass
-        key_pressed.set()
-
-    threading.Thread(target=_wait_for_key, daemon=True).start()
-    while not key_pressed.is_set():
-        plt.pause(0.1)
-    plt.close('all')
+    _show_until_key(fig)
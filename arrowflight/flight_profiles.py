@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Iterable, List, Sequence
 import math
+import numpy as np
 from .flight_constants import GRAINS_TO_KG, FPS_TO_MS
 
 
@@ -39,3 +40,37 @@ class Profile:
             cw=d.get('cw', 0.25),
             v0_fps=d.get('v0_fps', 230.0)
         )
+
+
+class ProfileSet:
+    """Struct-of-arrays view of several profiles for the vectorized solvers.
+
+    mass_kg, area, cw and v0 (m/s) are float arrays in the order of `names`,
+    computed with the Profile conversion methods.
+    """
+
+    def __init__(self, profiles: Sequence[Profile]):
+        self.profiles: List[Profile] = list(profiles)
+        self.names = [p.name for p in self.profiles]
+        self.mass_kg = np.array([p.mass_kg() for p in self.profiles], dtype=float)
+        self.area = np.array([p.area() for p in self.profiles], dtype=float)
+        self.cw = np.array([p.cw for p in self.profiles], dtype=float)
+        self.v0 = np.array([p.v0_ms() for p in self.profiles], dtype=float)
+
+    @classmethod
+    def from_config(cls, configs: Dict, names: Iterable[str] = None) -> 'ProfileSet':
+        """Build from a parsed arrows.json; `names` selects and orders profiles (default: all, sorted)."""
+        names = sorted(configs) if names is None else list(names)
+        return cls([Profile.from_dict(name, configs[name]) for name in names])
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ProfileSet(self.profiles[index])
+        return self.profiles[index]
+
+    def drag(self, rho: float = 1.2) -> np.ndarray:
+        """Drag factor 0.5 * rho * cw * A / m of every profile."""
+        return 0.5 * rho * self.cw * self.area / self.mass_kg
@@ -0,0 +1,337 @@
+"""Resident solve service: `arrowflight serve`.
+
+A small asyncio HTTP/JSON server (TCP on localhost or a unix socket) that keeps the
+profiles, lookup tables and solve cache warm. Concurrent solve requests are collected for
+a short window and solved together, one `solve_many` batch per profile, on a worker pool.
+
+Endpoints:
+
+    GET  /health             {"status": "ok"}
+    GET  /profiles           list of profile names
+    GET  /stats              request/batch counters and cache statistics
+    POST /solve              {"target_x": 50, "target_y": 0, "profile": "default", "exact": false}
+                             or a list of such objects; answers with the SolveResult
+                             field(s) as JSON (one object, or a list in request order);
+                             targets out of reach are answered with status 422
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import math
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+from .flight_profiles import Profile
+from .flight_constants import Physics
+from .flight_compute import SolveResult
+from .flight_sweep import sweep_grid
+from .flight_table import load_or_build_table
+from .flight_cache import DEFAULT_CACHE_DIR, default_cache, solve_key
+from .flight_envelope import UnreachableTargetError, check_reachable, persist_envelopes, reach_envelope
+
+
+DT = 0.001
+MAX_BODY = 1 << 20
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """Invalid request; reported to the client with `status`."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _solve_points(profile: Profile, points: Sequence[Tuple[float, float]], dt: float,
+                  phys: Physics) -> List[SolveResult]:
+    """Worker task: one sweep batch for all queued targets of a profile."""
+    return sweep_grid(profile, points, dt=dt, phys=phys)
+
+
+class SolveBatcher:
+    """Collects solve requests for `window` seconds (or `max_batch` targets) and solves them together.
+
+    Requests are grouped by profile; each group is one `_solve_points` call on `executor`
+    (None: the event loop's default thread pool). Lookups and writes of `cache` run on a
+    thread of their own, so a slow or locked sqlite file does not stall the event loop.
+    """
+
+    def __init__(self, phys: Physics, dt: float = DT, window: float = 0.005, max_batch: int = 1024,
+                 executor: concurrent.futures.Executor = None, cache=None):
+        self.phys = phys
+        self.dt = dt
+        self.window = window
+        self.max_batch = max_batch
+        self.executor = executor
+        self.cache = cache
+        # one thread: a sqlite connection may only be used by the thread that opened it
+        self.cache_executor = (concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='solve-cache')
+                               if cache is not None else None)
+        self.batches = 0
+        self.batched_targets = 0
+        self._queue: asyncio.Queue = None
+
+    async def solve(self, profile: Profile, target_x: float, target_y: float) -> SolveResult:
+        key = solve_key(profile, self.phys, target_x, target_y, dt=self.dt, search='sweep')
+        if self.cache is not None:
+            result = await asyncio.get_running_loop().run_in_executor(self.cache_executor, self.cache.get, key)
+            if result is not None:
+                return replace(result, profile=profile.name)
+        future = asyncio.get_running_loop().create_future()
+        await self._get_queue().put((profile, target_x, target_y, key, future))
+        return await future
+
+    def _get_queue(self) -> asyncio.Queue:
+        # created on first use so it belongs to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def run(self):
+        """Batch loop; runs until cancelled."""
+        queue = self._get_queue()
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            groups = defaultdict(list)
+            for item in batch:
+                groups[item[0].name].append(item)
+            await asyncio.gather(*(self._solve_group(loop, items) for items in groups.values()))
+
+    async def _solve_group(self, loop, items):
+        profile = items[0][0]
+        points = [(x, y) for _, x, y, _, _ in items]
+        self.batches += 1
+        self.batched_targets += len(points)
+        try:
+            results = await loop.run_in_executor(self.executor, _solve_points, profile, points, self.dt, self.phys)
+        except Exception as e:
+            for item in items:
+                if not item[4].done():
+                    item[4].set_exception(e)
+            return
+        for item, result in zip(items, results):
+            if not item[4].done():
+                item[4].set_result(result)
+        if self.cache is not None:
+            # the answers are out already; a failed write only costs a later re-solve. Shielded, so
+            # cancelling the batch loop on shutdown does not drop a write that is still queued
+            try:
+                await asyncio.shield(loop.run_in_executor(self.cache_executor, self.cache.put_many,
+                                                          [(item[3], result) for item, result in zip(items, results)]))
+            except sqlite3.Error as e:
+                print(f"Warning: could not write the solve cache: {e}", file=sys.stderr)
+
+
+class SolveService:
+    """Profiles, tables and the batcher behind the HTTP handlers."""
+
+    def __init__(self, configs: Dict, config_path: Path, batcher: SolveBatcher, use_tables: bool = True):
+        self.profiles = {name: Profile.from_dict(name, d) for name, d in configs.items()}
+        self.config_path = config_path
+        self.batcher = batcher
+        self.use_tables = use_tables
+        self.tables = {}
+        self.requests = 0
+        self.table_hits = 0
+
+    def table(self, profile: Profile):
+        if profile.name not in self.tables:
+            cache_dir = DEFAULT_CACHE_DIR if self.batcher.cache is not None else None
+            self.tables[profile.name] = load_or_build_table(profile, self.batcher.phys, self.config_path, dt=self.batcher.dt,
+                                                            cache_dir=cache_dir)
+        return self.tables[profile.name]
+
+    async def solve(self, query: Dict) -> Dict:
+        if not isinstance(query, dict):
+            raise RequestError("each query must be a JSON object")
+        try:
+            target_x = float(query['target_x'])
+            target_y = float(query['target_y'])
+        except KeyError as e:
+            raise RequestError(f"missing field {e}")
+        except (TypeError, ValueError):
+            raise RequestError("target_x and target_y must be numbers")
+        if not (math.isfinite(target_x) and math.isfinite(target_y)):
+            raise RequestError("target_x and target_y must be finite numbers")
+        if target_x <= 0:
+            raise RequestError("target_x must be positive")
+        name = query.get('profile', 'default')
+        if not isinstance(name, str):
+            raise RequestError("profile must be a string")
+        if name not in self.profiles:
+            raise RequestError(f"profile '{name}' not found", status=404)
+        profile = self.profiles[name]
+        self.requests += 1
+
+        result = None
+        if self.use_tables and not query.get('exact', False):
+            result = self.table(profile).lookup(target_x, target_y)
+            if result is not None:
+                self.table_hits += 1
+        if result is None:
+            try:
+                check_reachable(profile, target_x, target_y, self.batcher.phys)
+            except UnreachableTargetError as e:
+                raise RequestError(str(e), status=422)
+            result = await self.batcher.solve(profile, target_x, target_y)
+        return asdict(result)
+
+    def stats(self) -> Dict:
+        out = {'requests': self.requests, 'table_hits': self.table_hits, 'batches': self.batcher.batches,
+               'batched_targets': self.batcher.batched_targets}
+        if self.batcher.cache is not None:
+            out['cache'] = self.batcher.cache.stats()
+        return out
+
+    async def handle(self, method: str, path: str, body: bytes):
+        """Return (status, JSON-serializable payload) for one request."""
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/profiles':
+            return 200, sorted(self.profiles)
+        if path == '/stats':
+            return 200, self.stats()
+        if path != '/solve':
+            raise RequestError(f"unknown path {path}", status=404)
+        if method != 'POST':
+            raise RequestError("use POST for /solve", status=405)
+        try:
+            query = json.loads(body or b'null')
+        except ValueError as e:
+            raise RequestError(f"invalid JSON: {e}")
+        if isinstance(query, list):
+            return 200, list(await asyncio.gather(*(self.solve(q) for q in query)))
+        return 200, await self.solve(query)
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """HTTP/1.1 with keep-alive; just enough of the protocol for JSON clients on localhost."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                close = headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0'
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # the body cannot be skipped without a valid length, so the connection is closed
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, close=True)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await self.handle(method, path.split('?', 1)[0], body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+                await self._respond(writer, status, payload, close=close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload, close: bool = False):
+        data = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+
+async def serve(service: SolveService, host: str = '127.0.0.1', port: int = 8765, unix: str = None):
+    """Run the batcher and the server until cancelled."""
+    batch_task = asyncio.ensure_future(service.batcher.run())
+    if unix:
+        server = await asyncio.start_unix_server(service.serve_connection, path=unix)
+        where = unix
+    else:
+        server = await asyncio.start_server(service.serve_connection, host=host, port=port)
+        where = "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"arrowflight serve listening on {where}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='arrowflight serve', description="Serve launch-angle solves over HTTP/JSON with warm profiles, tables and caches.")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port (default: 8765; 0 picks a free port)')
+    parser.add_argument('--unix', default=None, help='Listen on this unix socket path instead of TCP')
+    parser.add_argument('--config-file', '-c', default=str(Path(__file__).with_name('arrows.json')), help='Path to JSON config with named profiles')
+    parser.add_argument('--window-ms', type=float, default=5.0, help='How long to collect concurrent requests into one batch (default: 5 ms)')
+    parser.add_argument('--max-batch', type=int, default=1024, help='Largest number of targets solved in one batch (default: 1024)')
+    parser.add_argument('--workers', '-j', type=int, default=0, help='Worker processes for the batches (default: 0, solve on a thread of the server process)')
+    parser.add_argument('--exact', action='store_true', help='Never answer from the lookup tables')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the on-disk solve cache')
+    args = parser.parse_args(argv)
+
+    config_path = Path(args.config_file)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            configs = json.load(f)
+    except Exception as e:
+        print(f"Failed to read config file: {e}")
+        sys.exit(1)
+
+    persist_envelopes(not args.no_cache)
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) if args.workers > 0 else None
+    batcher = SolveBatcher(Physics(), dt=DT, window=args.window_ms / 1000.0, max_batch=args.max_batch,
+                           executor=executor, cache=None if args.no_cache else default_cache())
+    service = SolveService(configs, config_path, batcher, use_tables=not args.exact)
+    start = time.perf_counter()
+    # build or map every table and reachability envelope now so the first requests do not pay for it
+    for profile in service.profiles.values():
+        reach_envelope(profile, batcher.phys)
+        if service.use_tables:
+            service.table(profile)
+    print(f"Loaded {len(service.profiles)} profiles in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    try:
+        asyncio.run(serve(service, host=args.host, port=args.port, unix=args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if batcher.cache_executor is not None:
+            batcher.cache_executor.shutdown()
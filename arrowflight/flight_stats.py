@@ -0,0 +1,100 @@
+"""Opt-in hot-path instrumentation: counters and per-phase wall times.
+
+Usage:
+
+    with collect_stats() as stats:
+        solve_target(profile, 50, 0)
+    print(stats.report())
+
+Instrumented code calls `count()` and `phase()`; both reduce to a single `None` check
+while no collector is active, and counters are bumped once per simulation, never per step.
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class Stats:
+    """Counters and accumulated phase timings of one collection."""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.hooks: List[Callable[[str, float], None]] = []
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def add_time(self, name: str, seconds: float):
+        self.timings[name] += seconds
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    def merge(self, other):
+        """Add another Stats (or its as_dict()) into this one, e.g. from a worker process."""
+        d = other.as_dict() if isinstance(other, Stats) else other
+        for k, v in d.get('counters', {}).items():
+            self.counters[k] += v
+        for k, v in d.get('timings', {}).items():
+            self.timings[k] += v
+
+    def as_dict(self) -> dict:
+        return {'counters': dict(self.counters), 'timings': dict(self.timings)}
+
+    def report(self) -> str:
+        lines = []
+        c = self.counters
+        for name in sorted(c):
+            lines.append(f"{name}: {c[name]}")
+        if c.get('solves'):
+            lines.append(f"simulations per solve: {c.get('solver_simulations', 0) / c['solves']:.2f}")
+            lines.append(f"solver iterations per solve: {c.get('solver_iterations', 0) / c['solves']:.2f}")
+        if c.get('simulations'):
+            lines.append(f"steps per simulation: {c.get('integration_steps', 0) / c['simulations']:.1f}")
+        for name in sorted(self.timings):
+            lines.append(f"time {name}: {self.timings[name]:.4f} s")
+        return "\n".join(lines)
+
+
+_active: Optional[Stats] = None
+
+
+@contextmanager
+def collect_stats(stats: Stats = None, hook: Callable[[str, float], None] = None):
+    """Activate a Stats collector for the enclosed block and yield it.
+
+    `hook(phase_name, seconds)` is called whenever a phase finishes.
+    """
+    global _active
+    stats = stats if stats is not None else Stats()
+    if hook is not None:
+        stats.hooks.append(hook)
+    previous, _active = _active, stats
+    try:
+        yield stats
+    finally:
+        _active = previous
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def count(name: str, n: int = 1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+@contextmanager
+def phase(name: str):
+    """Accumulate the wall time of the enclosed block under `name`."""
+    if _active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _active is not None:
+            _active.add_time(name, time.perf_counter() - start)
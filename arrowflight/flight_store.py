@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Dict, Sequence
+import numpy as np
+from .flight_compute import SolveResult, RESULT_HEADERS
+
+
+STORE_FORMATS = ('csv', 'npz')
+
+# numeric SolveResult fields stored as columns of the binary output, in RESULT_HEADERS order
+RESULT_COLUMNS = ('target_x', 'target_y', 'holdover', 'launch_angle', 'best_x_hit', 'best_y_hit',
+                  'flight_time', 'final_speed', 'impact_angle')
+_RECORD = np.dtype([(name, 'f8') for name in RESULT_COLUMNS])
+
+
+class ResultStore:
+    """Grid-ordered writer for batch results that can resume an interrupted run.
+
+    Results must be written in grid order. They go to `<base>.csv` (one row per point, as
+    before) and to a memory-mapped record array `<base>.partial.npy`; every `checkpoint_every`
+    rows both are flushed and the number of completed points is written to `<base>.ckpt.json`
+    together with `meta`. Opening a store whose checkpoint has the same `meta` resumes after
+    the last checkpointed point (`completed`); anything written after it is discarded.
+    `close()` writes `<base>.npz` (one float array per column plus a JSON `meta` string)
+    if 'npz' is among the formats and removes the checkpoint files once the grid is complete.
+    """
+
+    def __init__(self, base: Path, n_points: int, meta: Dict, formats: Sequence[str] = ('csv',),
+                 resume: bool = True, checkpoint_every: int = 64):
+        unknown = set(formats) - set(STORE_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown store format(s) {', '.join(sorted(unknown))}. Choose from: {', '.join(STORE_FORMATS)}")
+        self.base = Path(base)
+        self.n_points = n_points
+        self.meta = dict(meta, points=n_points)
+        self.formats = tuple(formats)
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.csv_path = self.base.with_suffix('.csv')
+        self.npz_path = self.base.with_suffix('.npz')
+        self.partial_path = self.base.with_name(self.base.name + '.partial.npy')
+        self.ckpt_path = self.base.with_name(self.base.name + '.ckpt.json')
+
+        self.completed = self._read_checkpoint() if resume else 0
+        if self.completed:
+            self._columns = np.lib.format.open_memmap(self.partial_path, mode='r+')
+        else:
+            self._columns = np.lib.format.open_memmap(self.partial_path, mode='w+', dtype=_RECORD,
+                                                      shape=(n_points,))
+        self._fout = None
+        self._writer = None
+        if 'csv' in self.formats:
+            self._open_csv()
+        self._since_checkpoint = 0
+
+    def _read_checkpoint(self) -> int:
+        """Number of points a previous run of the same grid completed (0 if none)."""
+        try:
+            with open(self.ckpt_path, 'r', encoding='utf-8') as f:
+                ckpt = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if ckpt.get('meta') != json.loads(json.dumps(self.meta)) or not self.partial_path.exists():
+            return 0
+        if 'csv' in self.formats and not self.csv_path.exists():
+            return 0
+        return int(ckpt.get('completed', 0))
+
+    def _open_csv(self):
+        if not self.completed:
+            self._fout = self.csv_path.open('w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._fout)
+            self._writer.writerow(RESULT_HEADERS)
+            return
+        # keep the header and the checkpointed rows, truncate whatever was written after them
+        with self.csv_path.open('rb') as f:
+            for _ in range(self.completed + 1):
+                f.readline()
+            end = f.tell()
+        with self.csv_path.open('r+b') as f:
+            f.truncate(end)
+        self._fout = self.csv_path.open('a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._fout)
+
+    def _checkpoint(self):
+        if self._fout is not None:
+            self._fout.flush()
+        self._columns.flush()
+        tmp = self.ckpt_path.with_name(self.ckpt_path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'meta': self.meta, 'completed': self.completed}, f)
+        os.replace(tmp, self.ckpt_path)
+        self._since_checkpoint = 0
+
+    def write(self, result: SolveResult):
+        """Append the result of the next grid point."""
+        if self.completed >= self.n_points:
+            raise ValueError("all grid points have already been written")
+        self._columns[self.completed] = tuple(getattr(result, name) for name in RESULT_COLUMNS)
+        if self._writer is not None:
+            self._writer.writerow(result.to_row())
+        self.completed += 1
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self._checkpoint()
+
+    def close(self):
+        """Checkpoint, and finish the outputs if every grid point has been written."""
+        self._checkpoint()
+        if self._fout is not None:
+            self._fout.close()
+            self._fout = None
+        if self.completed < self.n_points:
+            return
+        if 'npz' in self.formats:
+            columns = {name: np.array(self._columns[name]) for name in RESULT_COLUMNS}
+            np.savez(self.npz_path, meta=np.array(json.dumps(self.meta)), **columns)
+        del self._columns
+        self.partial_path.unlink()
+        self.ckpt_path.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_results(path: Path) -> Dict[str, np.ndarray]:
+    """Read a results file (.npz store or CSV) into float column arrays keyed by RESULT_COLUMNS.
+
+    CSV rows that cannot be parsed are skipped. The .npz `meta` is returned as a dict
+    under 'meta' (None for CSV).
+    """
+    path = Path(path)
+    if path.suffix == '.npz':
+        with np.load(path, allow_pickle=False) as data:
+            out = {name: data[name] for name in RESULT_COLUMNS}
+            out['meta'] = json.loads(str(data['meta'])) if 'meta' in data.files else None
+        return out
+
+    rows = []
+    with path.open('r', newline='', encoding='utf-8') as fin:
+        reader = csv.reader(fin)
+        header = next(reader, None)
+        if header is None:
+            return dict({name: np.empty(0) for name in RESULT_COLUMNS}, meta=None)
+        index = [header.index(h) for h in RESULT_HEADERS[1:]]
+        for row in reader:
+            try:
+                rows.append([float(row[i]) for i in index])
+            except (IndexError, ValueError):
+                continue
+    values = np.array(rows, dtype=float).reshape(-1, len(RESULT_COLUMNS))
+    out = {name: values[:, j] for j, name in enumerate(RESULT_COLUMNS)}
+    out['meta'] = None
+    return out
@@ -0,0 +1,202 @@
+import concurrent.futures
+import os
+import numpy as np
+from typing import List, Sequence, Tuple
+from .flight_profiles import Profile, ProfileSet
+from .flight_constants import Physics
+from .flight_compute import _euler_batch, MAX_FLIGHT_TIME, SolveInfo, SolveResult
+from . import flight_stats
+
+
+def _drag_params(profile: Profile, phys: Physics):
+    """Return (v0, drag, g) for the batch kernel."""
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    return profile.v0_ms(), 0.5 * rho * profile.cw * profile.area() / profile.mass_kg(), g
+
+
+def _max_steps(dt: float) -> int:
+    """Step budget of every batch flight: MAX_FLIGHT_TIME, like the searches of flight_compute."""
+    return int(MAX_FLIGHT_TIME / dt)
+
+
+def _refine(fan_thetas, res, v0, drag, g: float, tx, ty, dt: float, angle_tol: float, max_passes: int):
+    """Bracket every target between two fan angles and refine it with batched Illinois passes.
+
+    res[i, j] is the target-plane residual of target i at fan angle j; v0 and drag are
+    scalars or per-target arrays. Returns per-target arrays
+    (theta, x_hit, y_hit, t, vx, vy, iterations, converged); flights that run out of
+    their step budget short of the target plane are never counted as converged.
+    """
+    n = tx.size
+    max_steps = _max_steps(dt)
+    v0, drag = (np.broadcast_to(np.asarray(a, dtype=float), (n,)) for a in (v0, drag))
+    # first fan angle at or above the target height brackets the root
+    above = res >= 0
+    first = np.argmax(above, axis=1)
+    reachable = above.any(axis=1) & (first > 0)
+    hi = np.where(reachable, first, 0)
+    lo = np.maximum(hi - 1, 0)
+    rows = np.arange(n)
+    a, fa = fan_thetas[lo], res[rows, lo]
+    b, fb = fan_thetas[hi], res[rows, hi]
+
+    theta = np.where(above[:, 0], fan_thetas[0], fan_thetas[-1])
+    x_hit, y_hit, t, vx, vy = (np.full(n, np.nan) for _ in range(5))
+    iterations = np.zeros(n, dtype=int)
+    converged = np.zeros(n, dtype=bool)
+    active = np.flatnonzero(reachable)
+
+    for _ in range(max_passes):
+        if not active.size:
+            break
+        # Illinois step inside the bracket
+        c = b[active] - fb[active] * (b[active] - a[active]) / (fb[active] - fa[active])
+        xe, ye, te, vxe, vye = _euler_batch(c, v0[active], drag[active], g, tx[active], dt, max_steps=max_steps)
+        fc = ye - (xe - tx[active]) * vye / vxe - ty[active]
+
+        step = np.abs(c - theta[active])
+        theta[active] = c
+        x_hit[active], y_hit[active], t[active], vx[active], vy[active] = xe, ye, te, vxe, vye
+        iterations[active] += 1
+
+        flip = fc * fb[active] < 0
+        a[active] = np.where(flip, b[active], a[active])
+        fa[active] = np.where(flip, fb[active], 0.5 * fa[active])
+        b[active], fb[active] = c, fc
+
+        done = (step < angle_tol) | (fc == 0) | (np.abs(b[active] - a[active]) < angle_tol)
+        converged[active[done & (xe > tx[active])]] = True
+        active = active[~done]
+
+    # targets outside the fan band end on the nearest edge, like find_optimal_angle
+    edge = np.flatnonzero(~reachable)
+    if edge.size:
+        xe, ye, te, vxe, vye = _euler_batch(theta[edge], v0[edge], drag[edge], g, tx[edge], dt, max_steps=max_steps)
+        x_hit[edge], y_hit[edge], t[edge], vx[edge], vy[edge] = xe, ye, te, vxe, vye
+
+    return theta, x_hit, y_hit, t, vx, vy, iterations, converged
+
+
+def solve_many(profile: Profile, target_xs, target_ys, dt: float = 0.001, phys: Physics = None,
+               fan: int = 33, angle_tol: float = 1e-7, max_passes: int = 30):
+    """Solve the launch angle for many (target_x, target_y) pairs at once.
+
+    A fan of `fan` launch angles over [-45°, 45°] is integrated once to the farthest target,
+    recording the crossing height at every distinct target distance, so one trajectory
+    answers all distances. For every target the two neighbouring fan angles whose heights
+    straddle target_y form the starting bracket, which is then refined with Illinois
+    (modified regula falsi) steps; each refinement pass is one batch integration of all
+    unconverged targets to their own distance.
+
+    Returns a dict of arrays (shape of target_xs): theta, x_hit, y_hit, t, vx, vy,
+    iterations, converged. The residual is the same target-plane height used by
+    find_optimal_angle(search='brent'), so both agree to within angle_tol.
+    """
+    v0, drag, g = _drag_params(profile, phys)
+    target_xs, target_ys = np.broadcast_arrays(np.asarray(target_xs, dtype=float),
+                                               np.asarray(target_ys, dtype=float))
+    shape = target_xs.shape
+    tx, ty = target_xs.ravel(), target_ys.ravel()
+    n = tx.size
+
+    # shared pass: every fan angle flown once through all target distances
+    stations, col = np.unique(tx, return_inverse=True)
+    fan_thetas = np.linspace(np.radians(-45.0), np.radians(45.0), fan)
+    heights = _euler_batch(fan_thetas, v0, drag, g, None, dt, stations=stations, max_steps=_max_steps(dt))[5]
+    res = heights[:, col].T - ty[:, None]          # (n, fan) residuals per target
+
+    theta, x_hit, y_hit, t, vx, vy, iterations, converged = _refine(
+        fan_thetas, res, v0, drag, g, tx, ty, dt, angle_tol, max_passes)
+
+    if flight_stats._active is not None:
+        flight_stats.count('sweep_targets', n)
+        flight_stats.count('sweep_refinements', int(iterations.sum()))
+
+    out = dict(theta=theta, x_hit=x_hit, y_hit=y_hit, t=t, vx=vx, vy=vy,
+               iterations=iterations, converged=converged)
+    return {k: v.reshape(shape) for k, v in out.items()}
+
+
+def sweep_grid(profile: Profile, points: Sequence[Tuple[float, float]], dt: float = 0.001,
+               phys: Physics = None, angle_tol: float = 1e-7) -> List[SolveResult]:
+    """Solve a list of (x, y) grid points with `solve_many` and return SolveResults in order."""
+    points = list(points)
+    if not points:
+        return []
+    xs, ys = (np.array(v, dtype=float) for v in zip(*points))
+    sol = solve_many(profile, xs, ys, dt=dt, phys=phys, angle_tol=angle_tol)
+
+    return _results([profile.name] * len(points), xs, ys, sol)
+
+
+def _results(names: Sequence[str], xs, ys, sol) -> List[SolveResult]:
+    """SolveResults from the flat solution arrays of `solve_many` / `solve_profiles`."""
+    results = []
+    for i, (name, x, y) in enumerate(zip(names, xs, ys)):
+        theta = sol['theta'][i]
+        vx, vy = sol['vx'][i], sol['vy'][i]
+        iters = int(sol['iterations'][i])
+        results.append(SolveResult(
+            profile=name,
+            target_x=float(x),
+            target_y=float(y),
+            holdover=float(np.tan(theta) * x - y),
+            launch_angle=float(np.degrees(theta)),
+            best_x_hit=float(sol['x_hit'][i]),
+            best_y_hit=float(sol['y_hit'][i]),
+            flight_time=float(sol['t'][i]),
+            final_speed=float(np.sqrt(vx**2 + vy**2)),
+            impact_angle=float(np.degrees(np.arctan2(vy, vx))),
+            solver=SolveInfo('sweep', iters, iters, bool(sol['converged'][i]))
+        ))
+    return results
+
+
+def _solve_profile_chunk(profiles: ProfileSet, target_x: float, target_y: float, dt: float,
+                         phys: Physics, fan: int, angle_tol: float, max_passes: int) -> List[SolveResult]:
+    """Integrate every profile x fan angle of `profiles` in one batch and refine them together."""
+    rho = phys.rho if phys is not None else 1.2
+    g = phys.g if phys is not None else 9.81
+    n = len(profiles)
+    v0, drag = profiles.v0, profiles.drag(rho)
+    tx, ty = np.full(n, float(target_x)), np.full(n, float(target_y))
+
+    fan_thetas = np.linspace(np.radians(-45.0), np.radians(45.0), fan)
+    x, y, _, vx, vy = _euler_batch(fan_thetas[None, :], v0[:, None], drag[:, None], g, target_x, dt,
+                                   max_steps=_max_steps(dt))
+    res = y - (x - target_x) * vy / vx - target_y          # (n, fan) residuals per profile
+    # rays that ran out of steps short of the plane count as below it, like the unreached stations of solve_many
+    res[x <= target_x] = np.nan
+
+    theta, x_hit, y_hit, t, vx, vy, iterations, converged = _refine(
+        fan_thetas, res, v0, drag, g, tx, ty, dt, angle_tol, max_passes)
+    if flight_stats._active is not None:
+        flight_stats.count('sweep_targets', n)
+        flight_stats.count('sweep_refinements', int(iterations.sum()))
+    sol = dict(theta=theta, x_hit=x_hit, y_hit=y_hit, t=t, vx=vx, vy=vy,
+               iterations=iterations, converged=converged)
+    return _results(profiles.names, tx, ty, sol)
+
+
+def solve_profiles(profiles: ProfileSet, target_x: float, target_y: float, dt: float = 0.001,
+                   phys: Physics = None, fan: int = 33, angle_tol: float = 1e-7, max_passes: int = 30,
+                   workers: int = 1, chunk_size: int = 512) -> List[SolveResult]:
+    """Solve one target for every profile of a ProfileSet at once; SolveResults in set order.
+
+    All profiles x `fan` launch angles are integrated in one `_euler_batch` call with
+    per-ray muzzle velocity and drag, then refined together like `solve_many`. Sets larger
+    than `chunk_size` are split into chunks, solved on `workers` processes if workers > 1
+    (None: number of CPU cores).
+    """
+    if len(profiles) <= chunk_size:
+        return _solve_profile_chunk(profiles, target_x, target_y, dt, phys, fan, angle_tol, max_passes)
+    chunks = [profiles[i:i + chunk_size] for i in range(0, len(profiles), chunk_size)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        return [r for chunk in chunks
+                for r in _solve_profile_chunk(chunk, target_x, target_y, dt, phys, fan, angle_tol, max_passes)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = [ex.submit(_solve_profile_chunk, chunk, target_x, target_y, dt, phys, fan, angle_tol, max_passes)
+                   for chunk in chunks]
+        return [r for f in futures for r in f.result()]
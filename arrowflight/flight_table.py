@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import sys
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+from .flight_profiles import Profile
+from .flight_constants import Physics
+from .flight_compute import SolveInfo, SolveResult, simulate_flight
+from .flight_sweep import solve_many
+from .flight_cache import DEFAULT_CACHE_DIR, SOLVER_VERSION
+from . import flight_stats
+
+
+TABLE_FIELDS = ('launch_angle', 'holdover', 'flight_time', 'final_speed', 'impact_angle')
+
+# default table grid as (start, step, end) like calc_profile_results
+TABLE_X_RANGE = (5.0, 1.0, 100.0)
+TABLE_Y_RANGE = (-20.0, 0.5, 20.0)
+
+
+def _axis(rng: Tuple[float, float, float]) -> np.ndarray:
+    start, step, end = rng
+    n = int(round((end - start) / step)) + 1
+    return start + step * np.arange(n)
+
+
+def table_key(profile: Profile, physics: Physics, x_range, y_range, dt: float = 0.001) -> str:
+    """Hash of everything a table depends on; any change to the profile entry changes the key."""
+    # floats throughout so 235 and 235.0 in arrows.json give the same key
+    fields = {k: float(v) for k, v in asdict(profile).items() if k != 'name'}
+    payload = {
+        'profile': fields,
+        'physics': {k: float(v) for k, v in asdict(physics).items()},
+        'x_range': [float(v) for v in x_range],
+        'y_range': [float(v) for v in y_range],
+        'dt': float(dt),
+        'fields': TABLE_FIELDS,
+        'solver': SOLVER_VERSION,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class BallisticTable:
+    """Precomputed solutions over a regular (target_x, target_y) grid with bilinear queries.
+
+    values has shape (len(TABLE_FIELDS), len(xs), len(ys)); angles in degrees, distances in m.
+    Grid points the solver could not reach are stored as NaN.
+    """
+
+    def __init__(self, profile_name: str, xs: np.ndarray, ys: np.ndarray, values: np.ndarray, key: str = None):
+        self.profile_name = profile_name
+        self.xs = xs
+        self.ys = ys
+        self.values = values
+        self.key = key
+
+    def contains(self, target_x: float, target_y: float) -> bool:
+        return self.xs[0] <= target_x <= self.xs[-1] and self.ys[0] <= target_y <= self.ys[-1]
+
+    def lookup(self, target_x: float, target_y: float) -> Optional[SolveResult]:
+        """Bilinearly interpolate all table fields at one target.
+
+        Returns None if the target is outside the grid or its cell touches an unreachable
+        grid point; callers then fall back to `solve_target`. The result is marked with a
+        SolveInfo of search 'table'; its best_x_hit/best_y_hit are the target itself (see
+        `fly_table_hit` for the hit point of an actual flight).
+        """
+        flight_stats.count('table_lookups')
+        if not self.contains(target_x, target_y):
+            return None
+        xs, ys = self.xs, self.ys
+        i = min(max(int(np.searchsorted(xs, target_x)) - 1, 0), xs.size - 2)
+        j = min(max(int(np.searchsorted(ys, target_y)) - 1, 0), ys.size - 2)
+        u = (target_x - xs[i]) / (xs[i + 1] - xs[i])
+        w = (target_y - ys[j]) / (ys[j + 1] - ys[j])
+        cell = self.values[:, i:i + 2, j:j + 2]
+        if np.isnan(cell).any():
+            return None
+        v = ((1 - u) * (1 - w) * cell[:, 0, 0] + u * (1 - w) * cell[:, 1, 0]
+             + (1 - u) * w * cell[:, 0, 1] + u * w * cell[:, 1, 1])
+        launch_angle, holdover, flight_time, final_speed, impact_angle = (float(a) for a in v)
+        return SolveResult(
+            profile=self.profile_name,
+            target_x=float(target_x),
+            target_y=float(target_y),
+            holdover=holdover,
+            launch_angle=launch_angle,
+            # the table answers on the target plane itself
+            best_x_hit=float(target_x),
+            best_y_hit=float(target_y),
+            flight_time=flight_time,
+            final_speed=final_speed,
+            impact_angle=impact_angle,
+            solver=SolveInfo('table', 0, 0, True)
+        )
+
+
+def fly_table_hit(result: SolveResult, profile: Profile, physics: Physics, dt: float = 0.001) -> SolveResult:
+    """A table answer with best_x_hit/best_y_hit of one flight at its interpolated launch angle."""
+    x_hit, y_hit = simulate_flight(np.radians(result.launch_angle), profile, result.target_x, dt=dt, phys=physics)[:2]
+    return replace(result, best_x_hit=float(x_hit), best_y_hit=float(y_hit))
+
+
+def build_table(profile: Profile, physics: Physics, x_range=TABLE_X_RANGE, y_range=TABLE_Y_RANGE,
+                dt: float = 0.001) -> BallisticTable:
+    """Solve every grid point with the sweep solver and return the table."""
+    xs, ys = _axis(x_range), _axis(y_range)
+    gx, gy = np.meshgrid(xs, ys, indexing='ij')
+    sol = solve_many(profile, gx, gy, dt=dt, phys=physics)
+    theta = sol['theta']
+    values = np.stack([
+        np.degrees(theta),
+        np.tan(theta) * gx - gy,
+        sol['t'],
+        np.sqrt(sol['vx']**2 + sol['vy']**2),
+        np.degrees(np.arctan2(sol['vy'], sol['vx'])),
+    ])
+    values[:, ~sol['converged']] = np.nan
+    return BallisticTable(profile.name, xs, ys, values, key=table_key(profile, physics, x_range, y_range, dt))
+
+
+def table_path(config_path: Path, profile: Profile, key: str, cache_dir: Path = None) -> Path:
+    """Location of a profile's table: next to the config file it was read from, or with
+    `cache_dir` under `<cache_dir>/tables`.
+    """
+    config_path = Path(config_path)
+    name = f"{config_path.stem}_{profile.name}_{key}.npy"
+    return Path(cache_dir) / 'tables' / name if cache_dir is not None else config_path.with_name(name)
+
+
+def _writable_dir(path: Path) -> bool:
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return False
+    return os.access(path, os.W_OK)
+
+
+def load_or_build_table(profile: Profile, physics: Physics, config_path: Path, x_range=TABLE_X_RANGE,
+                        y_range=TABLE_Y_RANGE, dt: float = 0.001, cache_dir: Path = DEFAULT_CACHE_DIR,
+                        keep_unsaved: bool = True) -> Optional[BallisticTable]:
+    """Return the profile's table, memory-mapping it from disk or building and saving it.
+
+    Tables are saved next to the config file, or under `<cache_dir>/tables` if that
+    directory is not writable (cache_dir None: no fallback). Tables of the same profile
+    with a different key (the profile entry, physics or grid changed) are deleted when a
+    new one is written next to the config file. If neither location is writable the
+    table is only built for this process if `keep_unsaved` is set; otherwise None is
+    returned, since solving a few targets is faster than building a table every run.
+    """
+    key = table_key(profile, physics, x_range, y_range, dt)
+    paths = [table_path(config_path, profile, key)]
+    if cache_dir is not None:
+        paths.append(table_path(config_path, profile, key, cache_dir))
+    for path in paths:
+        if path.exists():
+            with flight_stats.phase('table_load'):
+                values = np.load(path, mmap_mode='r')
+            return BallisticTable(profile.name, _axis(x_range), _axis(y_range), values, key=key)
+
+    path = next((p for p in paths if _writable_dir(p.parent)), None)
+    if path is None and not keep_unsaved:
+        return None
+    print(f"Building lookup table for profile '{profile.name}'...", file=sys.stderr)
+    with flight_stats.phase('table_build'):
+        table = build_table(profile, physics, x_range=x_range, y_range=y_range, dt=dt)
+    if path is None:
+        print(f"Could not save lookup table to {paths[-1].parent}: directory not writable", file=sys.stderr)
+        return table
+    try:
+        if path == paths[0]:
+            # the cache directory is shared by configs from many places, so only stale tables
+            # next to the config are removed
+            prefix = f"{Path(config_path).stem}_{profile.name}_"
+            for stale in path.parent.glob(prefix + "*.npy"):
+                suffix = stale.stem[len(prefix):]
+                if len(suffix) == 16 and all(c in '0123456789abcdef' for c in suffix):
+                    stale.unlink()
+        np.save(path, table.values)
+    except OSError as e:
+        print(f"Could not save lookup table to {path}: {e}", file=sys.stderr)
+    return table
@@ -1,24 +1,69 @@
 # Read the file results.csv and plot 3D surface plot of specified surface data (e.g. aim_angle) vs target distance and target height. 
 # use plotly.
-import csv
 import sys
 import argparse
 import numpy as np  # Third-party: numpy (BSD-3-Clause)
-import scipy  # Third-party: scipy (BSD-3-Clause)
-import plotly  # Third-party: plotly (MIT)
-import plotly.graph_objects as go
 from pathlib import Path
-from scipy.interpolate import griddata
 from collections import defaultdict
+# scipy (BSD-3-Clause) and plotly (MIT) are imported where they are used, after the input was read
+from .flight_store import load_results
+
+def lattice_surfaces(xs, ys, values, decimals: int = 9):
+    """Reshape scattered values into surface arrays if (xs, ys) is a complete x/y lattice.
+
+    Returns (x_grid, y_grid, [z_grid, ...]) with shape (len(unique ys), len(unique xs)),
+    or None if some lattice node is missing or occupied twice.
+    """
+    xr, yr = np.round(xs, decimals), np.round(ys, decimals)
+    ux, ix = np.unique(xr, return_inverse=True)
+    uy, iy = np.unique(yr, return_inverse=True)
+    if ux.size * uy.size != xs.size:
+        return None
+    cell = iy * ux.size + ix
+    if np.unique(cell).size != cell.size:
+        return None
+    grids = []
+    for v in values:
+        z = np.empty(ux.size * uy.size)
+        z[cell] = v
+        grids.append(z.reshape(uy.size, ux.size))
+    xi, yi = np.meshgrid(ux, uy)
+    return xi, yi, grids
+
+
+def interpolate_surfaces(xs, ys, values, resolution: int = 200):
+    """Interpolate scattered values onto a resolution x resolution grid.
+
+    The points are triangulated once and the triangulation is shared by all surfaces
+    (Clough-Tocher cubic for 16+ points, linear for fewer, nearest neighbour if the
+    points cannot be triangulated).
+    """
+    from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator, NearestNDInterpolator
+    from scipy.spatial import Delaunay, QhullError
+    xi, yi = np.meshgrid(np.linspace(xs.min(), xs.max(), resolution), np.linspace(ys.min(), ys.max(), resolution))
+    points = np.column_stack([xs, ys])
+    try:
+        tri = Delaunay(points) if len(points) >= 3 else None
+    except QhullError:
+        tri = None
+    if tri is None:
+        interpolators = [NearestNDInterpolator(points, v) for v in values]
+    elif len(points) >= 16:
+        interpolators = [CloughTocher2DInterpolator(tri, v) for v in values]
+    else:
+        interpolators = [LinearNDInterpolator(tri, v) for v in values]
+    return xi, yi, [f(xi, yi) for f in interpolators]
+
 
 def main():
-    parser = argparse.ArgumentParser(description="Plot 3D surface from results CSV")
-    parser.add_argument('data_path', nargs='?', default='results.csv', help='Path to CSV file (default: results.csv)')
+    parser = argparse.ArgumentParser(description="Plot 3D surface from a results CSV or .npz file")
+    parser.add_argument('data_path', nargs='?', default='results.csv', help='Path to the results CSV or .npz file written by calc_profile_results (default: results.csv)')
     # parameter values for plots as any of: aim, aim_angle, aim_0diff, aim_angle_0diff
     # to  plott multiple surfaces simultaneously
     parser.add_argument('--surfaces', '-s', nargs='+', choices=['aim', 'aim_angle', 'aim_0diff', 'aim_angle_0diff'],
                         default=['aim', 'aim_angle'],
                         help='Which surfaces to show. Possible values: aim, aim_angle, aim_0diff, aim_angle_0diff (default: aim, aim_angle)')
+    parser.add_argument('--resolution', type=int, default=200, help='Grid points per axis when the data is not a regular x/y lattice and has to be interpolated (default: 200)')
     args = parser.parse_args()
 
     data_path = Path(args.data_path)
@@ -26,22 +71,19 @@ def main():
         print(f"File not found: {data_path}", file=sys.stderr)
         sys.exit(1)
 
+    try:
+        data = load_results(data_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Failed to read results file: {e}", file=sys.stderr)
+        sys.exit(1)
+
     pts = defaultdict(list)  # key=(x,y) -> list of z
-    with data_path.open("r", encoding="utf-8") as fin:
-        reader = csv.DictReader(fin)
-        for row in reader:
-            try:
-                x = float(row.get("Target distance [m]"))
-                y = float(row.get("Target height [m]"))     # corresponds to theta_y
-                y_aim = float(row.get("Optimal holdover"))  # corresponds to theta_aim. This is the vertical offset to apply at target distance
-                # all angles in degrees
-                theta = float(row.get("Optimal launch angle [°]"))  # the total launch angle
-                theta_y = np.degrees(np.arctan2(y, x))  # The angle where the line of sight to the target is. Coresponds y 
-                theta_aim = theta - theta_y  # The angle difference to the line of sight to the target. Corresponds to y_aim
-            except (TypeError, ValueError):
-                # skip malformed rows
-                continue
-            pts[(x, y)].append({'theta': theta, 'theta_y': theta_y, 'theta_aim': theta_aim, 'y_aim': y_aim})
+    for x, y, y_aim, theta in zip(data['target_x'], data['target_y'], data['holdover'], data['launch_angle']):
+        # y corresponds to theta_y; y_aim (theta_aim) is the vertical offset to apply at target distance
+        # all angles in degrees; theta is the total launch angle
+        theta_y = np.degrees(np.arctan2(y, x))  # The angle where the line of sight to the target is. Coresponds y
+        theta_aim = theta - theta_y  # The angle difference to the line of sight to the target. Corresponds to y_aim
+        pts[(float(x), float(y))].append({'theta': theta, 'theta_y': theta_y, 'theta_aim': theta_aim, 'y_aim': y_aim})
 
     if not pts:
         print("No valid data rows found in CSV.", file=sys.stderr)
@@ -89,19 +131,16 @@ def main():
         print("Not enough data for interpolation.", file=sys.stderr)
         sys.exit(1)
 
-    xi = np.linspace(min(xs), max(xs), len(xs))
-    yi = np.linspace(min(ys), max(ys), len(ys))
-    xi, yi = np.meshgrid(xi, yi)
+    surfaces = [y_aims, theta_aims, y_aim_0diffs, theta_aim_0diffs]
+    lattice = lattice_surfaces(xs, ys, surfaces)
+    if lattice is not None:
+        xi, yi, zs = lattice
+    else:
+        xi, yi, zs = interpolate_surfaces(xs, ys, surfaces, args.resolution)
+    zi_y_aim, zi_theta_aim, zi_y_aim_0diff, zi_theta_aim_0diff = zs
 
-    # choose method based on available points
-    method = 'cubic' if len(y_aims) >= 16 else ('linear' if len(y_aims) >= 3 else 'nearest')
-    zi_y_aim = griddata((xs, ys), y_aims, (xi, yi), method=method)
-    zi_theta_aim = griddata((xs, ys), theta_aims, (xi, yi), method=method)
-    zi_y_aim_0diff = griddata((xs, ys), y_aim_0diffs, (xi, yi), method=method)
-    zi_theta_aim_0diff = griddata((xs, ys), theta_aim_0diffs, (xi, yi), method=method)
-    
- 
     # plot selected surfaces
+    import plotly.graph_objects as go
     fig = go.Figure()
     sel = set(args.surfaces)
     if 'aim' in sel:
@@ -0,0 +1,11 @@
+import pytest
+
+from arrowflight.flight_envelope import persist_envelopes
+
+
+@pytest.fixture(autouse=True)
+def _no_envelope_files():
+    """Keep reachability envelopes in memory, so no test writes to the user's cache directory."""
+    persist_envelopes(False)
+    yield
+    persist_envelopes(True)
@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+from arrowflight.flight_adaptive import adaptive_grid
+from arrowflight.flight_compute import SolveResult
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_profiles import Profile
+from arrowflight.flight_sweep import sweep_grid
+
+PROFILE = Profile('default')
+X_VALUES = (5.0, 1.0, 69.0)
+Y_VALUES = (-8.0, 0.5, 8.0)
+
+
+def _sweep(points):
+    return sweep_grid(PROFILE, points, phys=Physics())
+
+
+def _planar(points):
+    # holdover linear in x and y, aim angle zero: the coarse cells need no refinement
+    return [SolveResult('plane', x, y, 0.01 * x + 0.1 * y, math.degrees(math.atan2(y, x)), x, y, 0.0, 0.0, 0.0)
+            for x, y in points]
+
+
+def _lattice(x_values, y_values):
+    (x0, dx, x1), (y0, dy, y1) = x_values, y_values
+    return [(round(float(x), 10), round(float(y), 10)) for x in np.arange(x0, x1 + dx / 2, dx) for y in np.arange(y0, y1 + dy / 2, dy)]
+
+
+def test_linear_surface_keeps_the_coarse_cells():
+    calls = []
+    results, full = adaptive_grid(lambda pts: calls.append(len(pts)) or _planar(pts), X_VALUES, Y_VALUES,
+                                  coarse_level=3)
+    # 8 x 4 cells of 8 steps: corners and centers, solved in one call
+    assert full == 65 * 33
+    assert calls == [9 * 5 + 8 * 4]
+    assert len(results) == calls[0]
+
+
+def test_zero_tolerance_solves_the_full_lattice():
+    x_values, y_values = (10.0, 1.0, 26.0), (-2.0, 0.5, 2.0)
+    results, full = adaptive_grid(_sweep, x_values, y_values, holdover_tol=0.0, angle_tol=0.0, coarse_level=2)
+    points = [(r.target_x, r.target_y) for r in results]
+
+    assert points == sorted(_lattice(x_values, y_values)) and len(points) == full
+    for result, expected in zip(results, _sweep(points)):
+        assert result.holdover == expected.holdover
+
+
+def test_refined_grid_reproduces_the_uniform_grid():
+    from scipy.interpolate import LinearNDInterpolator
+
+    results, full = adaptive_grid(_sweep, X_VALUES, Y_VALUES, holdover_tol=0.01, coarse_level=3)
+    lattice = _lattice(X_VALUES, Y_VALUES)
+    points = [(r.target_x, r.target_y) for r in results]
+
+    assert len(results) < full / 3
+    assert points == sorted(points) and set(points) <= set(lattice)
+    surface = LinearNDInterpolator(np.array(points), [r.holdover for r in results])
+    errors = [abs(surface(*p)[()] - r.holdover) for p, r in zip(lattice, _sweep(lattice))]
+    assert max(errors) < 2 * 0.01
+
+
+def test_rejects_non_positive_steps():
+    with pytest.raises(ValueError):
+        adaptive_grid(_planar, (5.0, 0.0, 10.0), Y_VALUES)
@@ -0,0 +1,39 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from arrowflight.flight_batch import BatchSolver, run_batch
+from arrowflight.flight_constants import Physics
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / 'arrowflight' / 'arrows.json'
+
+
+def _solver():
+    configs = json.loads(CONFIG_PATH.read_text(encoding='utf-8'))
+    return BatchSolver(configs, CONFIG_PATH, ['default'], Physics(), 0.001, use_table=False)
+
+
+@pytest.mark.parametrize('query', [
+    {'target_x': float('nan'), 'target_y': 0},
+    {'target_x': 50, 'target_y': float('inf')},
+    {'target_x': '-inf', 'target_y': 0},
+    {'target_x': 'nan', 'target_y': 'nan'},
+])
+def test_non_finite_targets_are_rejected(query):
+    with pytest.raises(ValueError, match='^target_x and target_y must be finite numbers$'):
+        _solver().solve(query)
+
+
+def test_run_batch_reports_errors_per_line():
+    lines = io.StringIO('{"target_x": 30, "target_y": 0}\n{"target_x": NaN, "target_y": 0}\n'
+                        'target_x,target_y\n')
+    out = io.StringIO()
+    failed = run_batch(_solver(), lines, out)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert failed == 2
+    assert records[0]['line'] == 1 and records[0]['profile'] == 'default'
+    assert records[1] == {'line': 2, 'error': 'target_x and target_y must be finite numbers'}
+    assert records[2]['line'] == 3 and 'error' in records[2]
@@ -0,0 +1,56 @@
+from dataclasses import replace
+
+import pytest
+
+from arrowflight.flight_cache import SOLVER_VERSION, SolveCache, cached_solve, solve_key
+from arrowflight.flight_compute import SolveInfo, SolveResult
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_profiles import Profile
+
+PROFILE = Profile('default')
+
+
+def _result(holdover: float) -> SolveResult:
+    return SolveResult('default', 50.0, 0.0, holdover, 2.9, 50.05, 0.0, 0.72, 69.3, -2.9,
+                       solver=SolveInfo('brent', 5, 6, True))
+
+
+def test_keys_are_versioned_and_ignore_the_profile_name():
+    key = solve_key(PROFILE, Physics(), 50.0, 0.0)
+    assert key.startswith(f"v{SOLVER_VERSION}|brent|euler|")
+    assert solve_key(replace(PROFILE, name='other'), Physics(), 50.0, 0.0) == key
+    assert solve_key(PROFILE, Physics(), 50.0, 0.0, search='bisect') != key
+    assert solve_key(replace(PROFILE, cw=0.26), Physics(), 50.0, 0.0) != key
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = SolveCache(maxsize=2)
+    assert cache.get('a') is None
+    cache.put('a', _result(1.0))
+    cache.put('b', _result(2.0))
+    assert cache.get('a').holdover == 1.0    # 'a' is now the most recently used entry
+    cache.put('c', _result(3.0))             # evicts 'b'
+
+    assert cache.get('b') is None
+    assert cache.get('c').holdover == 3.0
+    assert cache.stats() == {'hits': 2, 'disk_hits': 0, 'misses': 2, 'size': 2}
+
+
+def test_sqlite_tier_survives_the_process(tmp_path):
+    cache = SolveCache(path=tmp_path / 'solves.sqlite')
+    cache.put_many([('a', _result(1.0)), ('b', _result(2.0))])
+    cache.close()
+
+    reopened = SolveCache(path=tmp_path / 'solves.sqlite')
+    assert reopened.get('b') == _result(2.0)
+    assert reopened.stats()['disk_hits'] == 1
+
+
+def test_cached_solve(tmp_path):
+    cache = SolveCache(path=tmp_path / 'solves.sqlite')
+    first = cached_solve(cache, PROFILE, 40.0, 1.0, phys=Physics())
+    renamed = cached_solve(cache, replace(PROFILE, name='copy'), 40.0, 1.0, phys=Physics())
+
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 1
+    assert renamed == replace(first, profile='copy')
+    assert first.holdover == pytest.approx(cached_solve(None, PROFILE, 40.0, 1.0, phys=Physics()).holdover)
@@ -0,0 +1,118 @@
+import dataclasses
+import math
+
+import numpy as np
+import pytest
+
+from arrowflight.flight_compute import (SENSITIVITY_PARAMS, find_optimal_angle, plane_height, simulate_flight,
+                                        simulate_flight_batch)
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_profiles import Profile
+
+PROFILE = Profile('default')
+TARGETS = [(20.0, 0.0), (50.0, 1.5), (80.0, -3.0)]
+
+
+@pytest.mark.parametrize('limits', [{}, {'y_floor': -2.0}, {'max_steps': 300}, {'y_floor': 0.5, 'max_steps': 5000}])
+def test_batch_kernel_matches_scalar_flights(limits):
+    thetas = np.radians([-20.0, -5.0, 0.0, 2.5, 10.0, 30.0, 45.0])
+    batch = simulate_flight_batch(thetas, PROFILE, 60.0, phys=Physics(), **limits)
+    scalar = np.array([simulate_flight(theta, PROFILE, 60.0, phys=Physics(), **limits) for theta in thetas]).T
+
+    for got, expected in zip(batch, scalar):
+        np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_batch_kernel_keeps_the_shape_of_the_angles():
+    thetas = np.radians(np.linspace(0.0, 20.0, 6)).reshape(2, 3)
+    x, y, t, v_end, angle_end = simulate_flight_batch(thetas, PROFILE, 30.0)
+    assert x.shape == y.shape == t.shape == v_end.shape == angle_end.shape == (2, 3)
+    assert (x > 30.0).all()
+
+
+@pytest.mark.parametrize('target', TARGETS)
+def test_ksection_matches_bisection(target):
+    kwargs = dict(phys=Physics(), use_envelope=False)
+    bisect = find_optimal_angle(PROFILE, *target, search='bisect', **kwargs)
+    ksection = find_optimal_angle(PROFILE, *target, search='ksection', **kwargs)
+
+    assert ksection[0] == pytest.approx(bisect[0], abs=1e-6)
+    assert ksection[2] == pytest.approx(target[1], abs=0.01)
+    assert math.isfinite(ksection[1])
+
+
+@pytest.mark.parametrize('target_x', [7.3, 50.0, 123.4])
+def test_rk45_ends_exactly_on_the_target_plane(target_x):
+    theta = math.radians(3.0)
+    x, y, t, v_end, angle_end = simulate_flight(theta, PROFILE, target_x, integrator='rk45', rtol=1e-10, atol=1e-10)
+    traj = simulate_flight(theta, PROFILE, target_x, integrator='rk45', rtol=1e-10, atol=1e-10,
+                           record_trajectory=True, record_dx=1.0)
+    # a fine Euler flight stepped back onto the plane converges to the same crossing
+    fine = simulate_flight(theta, PROFILE, target_x, dt=1e-5)
+
+    assert x == target_x
+    assert traj.x[-1] == target_x and traj.y[-1] == pytest.approx(y, abs=1e-9)
+    assert plane_height(fine[0], fine[1], fine[4], target_x) == pytest.approx(y, abs=2e-4)
+
+
+def _plane_residual(theta, target):
+    x, y, t, v_end, angle_end = simulate_flight(theta, PROFILE, target[0], phys=Physics())
+    return plane_height(x, y, angle_end, target[0]) - target[1]
+
+
+@pytest.mark.parametrize('use_envelope', [False, True])
+@pytest.mark.parametrize('target', TARGETS)
+def test_searches_agree(target, use_envelope):
+    kwargs = dict(phys=Physics(), use_envelope=use_envelope, full_output=True)
+    brent, *_, info = find_optimal_angle(PROFILE, *target, search='brent', **kwargs)
+
+    assert info.converged and info.simulations <= 10
+    assert abs(_plane_residual(brent, target)) < 1e-5
+    newton, *_, newton_info = find_optimal_angle(PROFILE, *target, search='newton', **kwargs)
+    assert newton_info.converged
+    assert newton == pytest.approx(brent, abs=1e-6)
+    assert abs(_plane_residual(newton, target)) < 1e-5
+    # bisection and k-section compare the end point after the last step, a few mm off the plane
+    for search in ('bisect', 'ksection'):
+        theta = find_optimal_angle(PROFILE, *target, search=search, **kwargs)[0]
+        assert theta == pytest.approx(brent, abs=1e-4)
+        assert abs(_plane_residual(theta, target)) < 5e-3
+
+
+def test_holdover_tolerance_stops_brent_early():
+    target = (50.0, 1.5)
+    exact, *_, exact_info = find_optimal_angle(PROFILE, *target, phys=Physics(), use_envelope=False, full_output=True)
+    rough, *_, rough_info = find_optimal_angle(PROFILE, *target, phys=Physics(), use_envelope=False, full_output=True,
+                                               holdover_tol=0.01)
+    assert rough_info.simulations <= exact_info.simulations
+    assert abs(_plane_residual(rough, target)) < 0.01
+
+
+# each parameter nudged by `step` in the profile/physics units, and that step in SI units
+NUDGES = {
+    'theta': (lambda theta, step: (theta + step, PROFILE, Physics()), 1e-4, lambda step: step),
+    'v0': (lambda theta, step: (theta, dataclasses.replace(PROFILE, v0_fps=PROFILE.v0_fps + step), Physics()), 0.5,
+           lambda step: step * PROFILE.v0_ms() / PROFILE.v0_fps),
+    'mass': (lambda theta, step: (theta, dataclasses.replace(PROFILE, mass_grains=PROFILE.mass_grains + step),
+                                  Physics()), 1.0, lambda step: step * PROFILE.mass_kg() / PROFILE.mass_grains),
+    'cw': (lambda theta, step: (theta, dataclasses.replace(PROFILE, cw=PROFILE.cw + step), Physics()), 0.005,
+           lambda step: step),
+    'rho': (lambda theta, step: (theta, PROFILE, Physics(rho=Physics().rho + step)), 0.02, lambda step: step),
+}
+
+
+@pytest.mark.parametrize('target_x', [20.0, 70.0])
+def test_sensitivity_matches_finite_differences(target_x):
+    theta = math.radians(4.0)
+    *endpoint, sens = simulate_flight(theta, PROFILE, target_x, phys=Physics(), sensitivity=True)
+
+    np.testing.assert_allclose(endpoint, simulate_flight(theta, PROFILE, target_x, phys=Physics()), rtol=1e-12)
+    for param in SENSITIVITY_PARAMS:
+        nudge, step, si_step = NUDGES[param]
+        heights = []
+        for sign in (1, -1):
+            theta_i, profile, phys = nudge(theta, sign * step)
+            x, y, t, v_end, angle_end = simulate_flight(theta_i, profile, target_x, phys=phys)
+            heights.append(plane_height(x, y, angle_end, target_x))
+        expected = (heights[0] - heights[1]) / (2 * si_step(step))
+        assert getattr(sens, param) == pytest.approx(expected, rel=5e-3), param
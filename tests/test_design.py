@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_design import _score_chunk, band_targets, candidate_profiles, corner_bounds, design
+from arrowflight.flight_profiles import Profile, ProfileSet
+
+BASE = Profile('default')
+RANGES = {'mass_grains': (180.0, 400.0), 'v0_fps': (150.0, 300.0)}
+BAND = ((15.0, 60.0), (-3.0, 3.0))
+POINTS = (4, 3)
+
+
+@pytest.fixture(scope='module')
+def exhaustive():
+    profiles = candidate_profiles(BASE, RANGES, steps=4)
+    return profiles, np.array(_score_chunk(profiles, *band_targets(*BAND, POINTS), 0.001, Physics()))
+
+
+def test_corner_bounds_are_lower_bounds(exhaustive):
+    profiles, scores = exhaustive
+    bounds = corner_bounds(ProfileSet(profiles), *BAND, phys=Physics())
+    feasible = np.isfinite(scores[:, 0])
+    assert (bounds[feasible] <= scores[feasible] + 1e-9).all()
+
+
+@pytest.mark.parametrize('objective', ['spread', 'time'])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_pruned_search_matches_exhaustive_scoring(exhaustive, objective, workers):
+    profiles, scores = exhaustive
+    column = ('spread', 'time').index(objective)
+    order = [i for i in np.argsort(scores[:, column], kind='stable') if np.isfinite(scores[i, column])]
+
+    result = design(BASE, RANGES, *BAND, points=POINTS, steps=4, objective=objective, top=3, phys=Physics(),
+                    workers=workers, chunk_size=2)
+    assert [c.profile for c in result.best] == [profiles[i] for i in order[:3]]
+    assert [c.score(objective) for c in result.best] == pytest.approx(scores[order[:3], column].tolist())
+    assert result.pruned > 0
+    assert result.candidates == len(profiles) and result.evaluated < len(profiles)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from arrowflight.flight_compute import find_optimal_angle, plane_height, simulate_flight
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_dispersion import ShotSpread, dispersion_report, error_budget, impact_heights
+from arrowflight.flight_profiles import Profile
+
+PROFILE = Profile('default')
+TARGET = (40.0, 0.0)
+
+
+@pytest.fixture(scope='module')
+def theta():
+    return find_optimal_angle(PROFILE, *TARGET, phys=Physics())[0]
+
+
+def test_fixed_seed_is_reproducible(theta):
+    first = impact_heights(PROFILE, theta, TARGET[0], samples=5000, seed=11, chunk_size=2000, phys=Physics())
+    again = impact_heights(PROFILE, theta, TARGET[0], samples=5000, seed=11, chunk_size=2000, phys=Physics())
+    pooled = impact_heights(PROFILE, theta, TARGET[0], samples=5000, seed=11, chunk_size=2000, phys=Physics(),
+                            workers=2)
+    np.testing.assert_array_equal(first, again)
+    np.testing.assert_array_equal(first, pooled)
+
+
+def test_hit_probabilities_are_stable(theta):
+    reports = [dispersion_report(PROFILE, *TARGET, impact_heights(PROFILE, theta, TARGET[0], samples=20000, seed=seed,
+                                                                     phys=Physics()))
+               for seed in (1, 1, 2)]
+    assert reports[0] == reports[1]
+    for radius, p in reports[0].hit_probability.items():
+        assert 0.0 <= p <= 1.0
+        assert reports[2].hit_probability[radius] == pytest.approx(p, abs=0.02)
+    probabilities = list(reports[0].hit_probability.values())
+    assert probabilities == sorted(probabilities)        # wider rings are hit at least as often
+    assert abs(reports[0].mean) < 0.05 and reports[0].std > 0
+
+
+def test_no_spread_flies_the_nominal_shot(theta):
+    heights = impact_heights(PROFILE, theta, TARGET[0], spread=ShotSpread(0, 0, 0, 0, 0), samples=10, phys=Physics())
+    x, y, t, v_end, angle_end = simulate_flight(theta, PROFILE, TARGET[0], phys=Physics())
+    np.testing.assert_allclose(heights, plane_height(x, y, angle_end, TARGET[0]), atol=1e-9)
+
+
+def test_error_budget_matches_the_monte_carlo_spread(theta):
+    budget = error_budget(PROFILE, theta, TARGET[0], phys=Physics())
+    heights = impact_heights(PROFILE, theta, TARGET[0], samples=20000, seed=3, phys=Physics())
+    # the deviations are small enough for the first-order propagation to hold
+    assert budget.total == pytest.approx(heights.std(), rel=0.05)
@@ -0,0 +1,56 @@
+import math
+import time
+
+import numpy as np
+import pytest
+
+from arrowflight.flight_compute import _euler_batch, solve_target
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_envelope import UnreachableTargetError, check_reachable, reach_envelope
+from arrowflight.flight_profiles import Profile
+
+PROFILES = [
+    Profile('default'),
+    Profile('light', mass_grains=180, diameter_m=0.005, cw=0.24, v0_fps=245),
+    Profile('heavy', mass_grains=350, diameter_m=0.0058, cw=0.26, v0_fps=190),
+]
+
+
+def _reachable_targets(profile, phys):
+    """Heights at which a fine fan of solver-step (dt 0.001) flights crosses stations out to 400 m,
+    down to 200 m below the launch height."""
+    thetas = np.radians(np.linspace(-45.0, 45.0, 181))
+    stations = np.arange(5.0, 401.0, 10.0)
+    drag = 0.5 * phys.rho * profile.cw * profile.area() / profile.mass_kg()
+    *_, heights = _euler_batch(thetas, profile.v0_ms(), drag, phys.g, None, 0.001, stations=stations, y_floor=-200.0)
+    rays, cols = np.nonzero(~np.isnan(heights))
+    return stations[cols], heights[rays, cols]
+
+
+@pytest.mark.parametrize('profile', PROFILES, ids=lambda p: p.name)
+def test_no_reachable_target_is_rejected(profile):
+    phys = Physics()
+    envelope = reach_envelope(profile, phys)
+    xs, ys = _reachable_targets(profile, phys)
+
+    assert (ys < envelope.floor).any()  # the deep part below the fan's floor is covered too
+    rejected = [(x, y) for x, y in zip(xs, ys) if envelope.outside(x, y) is not None]
+    assert rejected == []
+
+
+def test_out_of_reach_targets_are_rejected():
+    envelope = reach_envelope(Profile('default'), Physics())
+    assert envelope.outside(50.0, 100.0) == 'high'
+    assert envelope.outside(1500.0, -60.0) == 'low'
+    with pytest.raises(UnreachableTargetError) as info:
+        check_reachable(Profile('default'), 50.0, 100.0, Physics())
+    assert info.value.low == -math.inf and 40.0 < info.value.high < 100.0
+    assert 'can hit heights from below -50 to' in str(info.value)
+
+
+def test_bounded_solve_of_a_deep_target():
+    # passes the precheck but sinks below the target height before reaching it; bounded, not integrated out
+    start = time.perf_counter()
+    with pytest.raises(UnreachableTargetError):
+        solve_target(Profile('default'), 2000.0, -100000.0, phys=Physics())
+    assert time.perf_counter() - start < 10.0
@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from arrowflight import flight
+from arrowflight.flight_compute import SolveInfo
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _arrowflight(*args, stdin=None, cwd=None):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable, '-m', 'arrowflight.flight', *args], input=stdin, env=env, cwd=cwd,
+                          capture_output=True, text=True)
+
+
+@pytest.mark.parametrize('args', [
+    ['--batch', 'targets.jsonl', 'light'],
+    ['light', '--batch', 'targets.jsonl'],
+])
+def test_batch_with_profile_arguments(tmp_path, args):
+    (tmp_path / 'targets.jsonl').write_text('{"target_x": 30, "target_y": 0}\n'
+                                            '{"target_x": 40, "target_y": 1, "profile": "heavy"}\n')
+    out = _arrowflight(*args, '--exact', '--no-cache', '-c', str(ROOT / 'arrowflight' / 'arrows.json'), cwd=tmp_path)
+
+    assert out.returncode == 0, out.stderr
+    records = [json.loads(line) for line in out.stdout.splitlines()]
+    assert [(r['line'], r['profile']) for r in records] == [(1, 'light'), (2, 'heavy')]
+
+
+def test_batch_profiles_around_the_file_and_stdin():
+    out = _arrowflight('light', '--batch', '-', 'heavy', '--exact', '--no-cache', '--batch-format', 'csv',
+                       stdin='target_x,target_y\n30,0\n')
+
+    assert out.returncode == 0, out.stderr
+    rows = out.stdout.splitlines()
+    assert [row.split(',')[:2] for row in rows[1:]] == [['2', 'light'], ['2', 'heavy']]
+
+
+def test_target_must_be_a_number():
+    out = _arrowflight('50', 'light', '--no-plot')
+    assert out.returncode == 2
+    assert "argument target_y: invalid float value: 'light'" in out.stderr
+
+
+def _unconverged(results):
+    return [replace(r, launch_angle=float('nan'), solver=SolveInfo('sweep', 40, 40, False)) for r in results]
+
+
+def _run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['arrowflight', *args, '--no-plot', '--no-cache', '--exact'])
+    flight.main()
+
+
+def test_unconverged_profile_batch_falls_back_to_single_solves(monkeypatch, capsys):
+    batch_solve = flight.cached_solve_profiles
+    monkeypatch.setattr(flight, 'cached_solve_profiles', lambda *a, **kw: _unconverged(batch_solve(*a, **kw)))
+    _run_main(monkeypatch, '50', '0', 'light', 'heavy')
+
+    rows = capsys.readouterr().out.splitlines()[-2:]
+    assert [row.split()[0] for row in rows] == ['light', 'heavy']
+    assert 'nan' not in ' '.join(rows)
+
+
+def test_unconverged_solve_exits_non_zero(monkeypatch, capsys):
+    batch_solve, single_solve = flight.cached_solve_profiles, flight.cached_solve
+    monkeypatch.setattr(flight, 'cached_solve_profiles', lambda *a, **kw: _unconverged(batch_solve(*a, **kw)))
+    monkeypatch.setattr(flight, 'cached_solve', lambda *a, **kw: _unconverged([single_solve(*a, **kw)])[0])
+    with pytest.raises(SystemExit) as exit_info:
+        _run_main(monkeypatch, '50', '0', 'light', 'heavy')
+
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    assert "Profile 'light': the angle search did not converge" in out
+    assert "Profile 'heavy': the angle search did not converge" in out
@@ -0,0 +1,44 @@
+import numpy as np
+
+from arrowflight.plot_profile_results import interpolate_surfaces, lattice_surfaces
+
+
+def _lattice():
+    gx, gy = np.meshgrid(np.arange(5.0, 30.0, 2.5), np.arange(-2.0, 2.01, 0.5))
+    return gx.ravel(), gy.ravel()
+
+
+def test_lattice_reshape_from_any_order():
+    xs, ys = _lattice()
+    order = np.random.default_rng(7).permutation(xs.size)
+    values = [xs * 10 + ys, xs - ys]
+    xi, yi, grids = lattice_surfaces(xs[order], ys[order], [v[order] for v in values])
+
+    assert xi.shape == yi.shape == (9, 10)
+    np.testing.assert_array_equal(xi[0], np.arange(5.0, 30.0, 2.5))
+    np.testing.assert_array_equal(yi[:, 0], np.arange(-2.0, 2.01, 0.5))
+    np.testing.assert_array_equal(grids[0], xi * 10 + yi)
+    np.testing.assert_array_equal(grids[1], xi - yi)
+
+
+def test_float_noise_still_forms_a_lattice():
+    xs, ys = _lattice()
+    assert lattice_surfaces(xs + 1e-12, ys - 1e-12, [xs]) is not None
+
+
+def test_incomplete_or_duplicate_points_are_not_a_lattice():
+    xs, ys = _lattice()
+    assert lattice_surfaces(xs[1:], ys[1:], [xs[1:]]) is None
+    dup_x, dup_y = xs.copy(), ys.copy()
+    dup_x[1], dup_y[1] = dup_x[0], dup_y[0]
+    assert lattice_surfaces(dup_x, dup_y, [dup_x]) is None
+
+
+def test_scattered_points_are_interpolated():
+    rng = np.random.default_rng(3)
+    xs, ys = rng.uniform(5.0, 30.0, 200), rng.uniform(-2.0, 2.0, 200)
+    xi, yi, (z,) = interpolate_surfaces(xs, ys, [2.0 * xs + ys], resolution=20)
+
+    inside = ~np.isnan(z)
+    assert xi.shape == z.shape == (20, 20) and inside.mean() > 0.8
+    np.testing.assert_allclose(z[inside], (2.0 * xi + yi)[inside], atol=1e-6)
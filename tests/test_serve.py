@@ -0,0 +1,143 @@
+import asyncio
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from arrowflight.flight_cache import SolveCache
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_compute import solve_target
+from arrowflight.flight_profiles import Profile
+from arrowflight.flight_serve import SolveBatcher, SolveService
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / 'arrowflight' / 'arrows.json'
+
+
+def _service(window=0.005, cache=None):
+    configs = json.loads(CONFIG_PATH.read_text(encoding='utf-8'))
+    batcher = SolveBatcher(Physics(), window=window, cache=cache)
+    return SolveService(configs, CONFIG_PATH, batcher, use_tables=False)
+
+
+async def _exchange(service, raw: bytes):
+    """Send raw bytes to a server on a free localhost port; returns (status, JSON payload) of the first response."""
+    batch_task = asyncio.ensure_future(service.batcher.run())
+    server = await asyncio.start_server(service.serve_connection, host='127.0.0.1', port=0)
+    try:
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(raw)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        payload = json.loads(await reader.readexactly(length))
+        writer.close()
+        return status, payload
+    finally:
+        server.close()
+        await server.wait_closed()
+        batch_task.cancel()
+
+
+def _post(body: bytes, content_length=None) -> bytes:
+    length = len(body) if content_length is None else content_length
+    return (f"POST /solve HTTP/1.1\r\nHost: localhost\r\nContent-Length: {length}\r\n"
+            f"Connection: close\r\n\r\n").encode('latin-1') + body
+
+
+def _run(service, raw: bytes):
+    return asyncio.run(_exchange(service, raw))
+
+
+@pytest.mark.parametrize('body', [
+    b'{"target_x": NaN, "target_y": 0}',
+    b'{"target_x": 50, "target_y": Infinity}',
+    b'{"target_x": "-inf", "target_y": 0}',
+    b'{"target_x": "nan", "target_y": "1"}',
+])
+def test_non_finite_targets_are_rejected(body):
+    status, payload = _run(_service(), _post(body))
+    assert status == 400
+    assert payload == {'error': 'target_x and target_y must be finite numbers'}
+
+
+@pytest.mark.parametrize('body, message', [
+    (b'{"target_y": 0}', "missing field 'target_x'"),
+    (b'{"target_x": "far", "target_y": 0}', 'target_x and target_y must be numbers'),
+    (b'{"target_x": -5, "target_y": 0}', 'target_x must be positive'),
+    (b'[1, 2]', 'each query must be a JSON object'),
+])
+def test_invalid_queries_are_rejected(body, message):
+    status, payload = _run(_service(), _post(body))
+    assert status == 400
+    assert payload == {'error': message}
+
+
+def test_unknown_profile():
+    status, payload = _run(_service(), _post(b'{"target_x": 50, "target_y": 0, "profile": "nope"}'))
+    assert status == 404
+
+
+@pytest.mark.parametrize('profile', [b'["default"]', b'{"name": "default"}', b'7'])
+def test_profile_must_be_a_string(profile):
+    status, payload = _run(_service(), _post(b'{"target_x": 50, "target_y": 0, "profile": %s}' % profile))
+    assert status == 400
+    assert payload == {'error': 'profile must be a string'}
+
+
+@pytest.mark.parametrize('content_length', ['-5', 'abc', '1e3'])
+def test_invalid_content_length(content_length):
+    status, payload = _run(_service(), _post(b'{}', content_length=content_length))
+    assert status == 400
+    assert payload == {'error': 'invalid Content-Length'}
+
+
+def test_malformed_request_line():
+    status, payload = _run(_service(), b'GARBAGE\r\n\r\n')
+    assert status == 400
+    assert payload == {'error': 'malformed request line'}
+
+
+def test_batched_round_trip():
+    # a long window so that all three queries of the request end up in one batch
+    service = _service(window=0.5)
+    targets = [(20.0, 0.0), (50.0, 1.0), (70.0, -2.0)]
+    body = json.dumps([{'target_x': x, 'target_y': y, 'profile': 'default'} for x, y in targets]).encode('utf-8')
+    status, payload = _run(service, _post(body))
+
+    assert status == 200
+    assert service.batcher.batches == 1
+    assert service.batcher.batched_targets == len(targets)
+    profile = Profile.from_dict('default', json.loads(CONFIG_PATH.read_text(encoding='utf-8'))['default'])
+    for (x, y), result in zip(targets, payload):
+        assert result['profile'] == 'default'
+        assert (result['target_x'], result['target_y']) == (x, y)
+        assert math.isfinite(result['launch_angle'])
+        reference = solve_target(profile, x, y, phys=Physics())
+        assert result['launch_angle'] == pytest.approx(reference.launch_angle, abs=1e-3)
+        assert result['holdover'] == pytest.approx(reference.holdover, abs=1e-3)
+
+
+def test_cached_answers(tmp_path):
+    cache = SolveCache(path=tmp_path / 'solves.sqlite')
+    body = _post(b'{"target_x": 40, "target_y": 0.5}')
+    service = _service(cache=cache)
+    status, first = _run(service, body)
+    # the answer is sent before it is written; wait for the write
+    service.batcher.cache_executor.shutdown(wait=True)
+    # a new service with an empty LRU reads the answer back from the sqlite file
+    cache = SolveCache(path=tmp_path / 'solves.sqlite')
+    service = _service(cache=cache)
+    status, second = _run(service, body)
+
+    assert status == 200
+    assert second == first
+    assert service.batcher.batches == 0
+    assert cache.stats()['disk_hits'] == 1
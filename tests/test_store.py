@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from arrowflight.flight_compute import SolveResult
+from arrowflight.flight_store import RESULT_COLUMNS, ResultStore, load_results
+
+N = 200
+META = {'profile': 'default', 'x_values': [1, 1, 20], 'y_values': [0, 1, 9]}
+
+
+def _result(i: int) -> SolveResult:
+    # values that survive the CSV rounding
+    return SolveResult('default', 1.0 + i % 20, float(i // 20), 0.125 * i, 0.5 + i, 1.0 + i, -0.25 * i,
+                       0.01 * i, 70.0 - 0.25 * i, -0.5 * i)
+
+
+def _expected(column: str) -> np.ndarray:
+    return np.array([getattr(_result(i), column) for i in range(N)])
+
+
+def _assert_complete(base):
+    for path in (base.with_suffix('.csv'), base.with_suffix('.npz')):
+        columns = load_results(path)
+        for name in RESULT_COLUMNS:
+            np.testing.assert_allclose(columns[name], _expected(name), atol=1e-9)
+    assert load_results(base.with_suffix('.npz'))['meta'] == dict(META, points=N)
+    assert not base.with_name(base.name + '.ckpt.json').exists()
+    assert not base.with_name(base.name + '.partial.npy').exists()
+
+
+def test_writes_csv_and_npz_in_grid_order(tmp_path):
+    base = tmp_path / 'default_results'
+    with ResultStore(base, N, META, formats=('csv', 'npz')) as store:
+        for i in range(N):
+            store.write(_result(i))
+    _assert_complete(base)
+
+
+def test_resumes_after_an_interrupted_run(tmp_path):
+    base = tmp_path / 'default_results'
+    store = ResultStore(base, N, META, formats=('csv', 'npz'), checkpoint_every=64)
+    for i in range(150):
+        store.write(_result(i))
+    # the process dies: rows after the last checkpoint (128) are flushed, the last one half-written
+    store._fout.flush()
+    store._fout.close()
+    del store
+    with base.with_suffix('.csv').open('a', encoding='utf-8') as f:
+        f.write('default,11.00,7.0')
+
+    with ResultStore(base, N, META, formats=('csv', 'npz'), checkpoint_every=64) as store:
+        assert store.completed == 128
+        for i in range(store.completed, N):
+            store.write(_result(i))
+    _assert_complete(base)
+
+
+def test_other_grid_starts_over(tmp_path):
+    base = tmp_path / 'default_results'
+    store = ResultStore(base, N, META, checkpoint_every=10)
+    for i in range(50):
+        store.write(_result(i))
+    store.close()
+
+    with ResultStore(base, N, META) as store:
+        assert store.completed == 50
+    with ResultStore(base, N, dict(META, profile='light')) as store:
+        assert store.completed == 0
+
+
+def test_rejects_unknown_formats_and_extra_points(tmp_path):
+    with pytest.raises(ValueError):
+        ResultStore(tmp_path / 'r', 1, META, formats=('parquet',))
+    with ResultStore(tmp_path / 'r', 1, META) as store:
+        store.write(_result(0))
+        with pytest.raises(ValueError):
+            store.write(_result(1))
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from arrowflight.flight_compute import find_optimal_angle, solve_target
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_profiles import Profile, ProfileSet
+from arrowflight.flight_sweep import solve_many, solve_profiles, sweep_grid
+
+PROFILE = Profile('default')
+
+
+def test_sweep_matches_per_point_solves():
+    xs, ys = np.meshgrid([10.0, 35.0, 60.0, 90.0], [-4.0, 0.0, 2.5])
+    sol = solve_many(PROFILE, xs, ys, phys=Physics())
+
+    assert sol['theta'].shape == xs.shape
+    assert sol['converged'].all()
+    for theta, x, y in zip(sol['theta'].ravel(), xs.ravel(), ys.ravel()):
+        expected = find_optimal_angle(PROFILE, x, y, phys=Physics(), use_envelope=False)[0]
+        assert theta == pytest.approx(expected, abs=1e-6)
+
+
+def test_sweep_grid_results_in_point_order():
+    points = [(70.0, 1.0), (20.0, -1.0), (70.0, -2.0)]
+    results = sweep_grid(PROFILE, points, phys=Physics())
+
+    assert [(r.target_x, r.target_y) for r in results] == points
+    for result, (x, y) in zip(results, points):
+        expected = solve_target(PROFILE, x, y, phys=Physics())
+        assert result.solver.search == 'sweep' and result.solver.converged
+        assert result.launch_angle == pytest.approx(expected.launch_angle, abs=1e-4)
+        assert result.holdover == pytest.approx(expected.holdover, abs=1e-4)
+
+
+def test_sweep_reports_out_of_reach_targets_as_unconverged():
+    sol = solve_many(PROFILE, [30.0, 30.0], [0.0, 200.0], phys=Physics())
+    assert sol['converged'].tolist() == [True, False]
+
+
+PROFILES = ProfileSet.from_config({
+    'default': {},
+    'light': {'mass_grains': 180, 'diameter_m': 0.005, 'cw': 0.24, 'v0_fps': 245},
+    'heavy': {'mass_grains': 350, 'diameter_m': 0.0058, 'cw': 0.26, 'v0_fps': 190},
+    'slow': {'v0_fps': 150, 'cw': 0.3},
+}, ['light', 'heavy', 'slow', 'default'])
+
+
+@pytest.mark.parametrize('target', [(25.0, 0.0), (60.0, -2.0), (45.0, 3.0)])
+def test_profile_set_matches_per_profile_solves(target):
+    results = solve_profiles(PROFILES, *target, phys=Physics())
+
+    assert [r.profile for r in results] == ['light', 'heavy', 'slow', 'default']
+    for profile, result in zip(PROFILES, results):
+        expected = find_optimal_angle(profile, *target, phys=Physics(), use_envelope=False)[0]
+        assert result.solver.converged
+        assert np.radians(result.launch_angle) == pytest.approx(expected, abs=1e-6)
+
+
+def test_profile_set_chunks_give_the_same_results():
+    whole = solve_profiles(PROFILES, 50.0, 1.0, phys=Physics())
+    chunked = solve_profiles(PROFILES, 50.0, 1.0, phys=Physics(), chunk_size=3)
+    assert chunked == whole
+
+
+def test_profile_set_arrays():
+    assert PROFILES.names == ['light', 'heavy', 'slow', 'default']
+    for i, profile in enumerate(PROFILES):
+        assert PROFILES.v0[i] == profile.v0_ms()
+        assert PROFILES.drag(1.2)[i] == pytest.approx(0.6 * profile.cw * profile.area() / profile.mass_kg())
+    assert PROFILES[1:3].names == ['heavy', 'slow']
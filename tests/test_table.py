@@ -0,0 +1,76 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from arrowflight import flight_table
+from arrowflight.flight_compute import solve_target
+from arrowflight.flight_constants import Physics
+from arrowflight.flight_profiles import Profile
+from arrowflight.flight_table import build_table, fly_table_hit, load_or_build_table
+
+PROFILE = Profile('default')
+# default grid spacing, a smaller range
+X_RANGE = (10.0, 1.0, 60.0)
+Y_RANGE = (-5.0, 0.5, 5.0)
+
+
+@pytest.fixture(scope='module')
+def table():
+    return build_table(PROFILE, Physics(), x_range=X_RANGE, y_range=Y_RANGE)
+
+
+def test_bilinear_lookup_error(table):
+    # cell interiors, where the interpolation error is largest
+    for x in np.arange(10.5, 60.0, 7.3):
+        for y in np.arange(-4.75, 5.0, 1.9):
+            result = table.lookup(x, y)
+            expected = solve_target(PROFILE, x, y, phys=Physics())
+            assert result.solver.search == 'table'
+            assert result.holdover == pytest.approx(expected.holdover, abs=1e-3)
+            # the angle curves most at short, steep targets
+            assert result.launch_angle == pytest.approx(expected.launch_angle, abs=0.05)
+
+
+def test_lookup_outside_the_grid(table):
+    assert table.lookup(9.0, 0.0) is None
+    assert table.lookup(30.0, 5.5) is None
+
+
+def test_table_hit_is_a_real_flight(table):
+    result = fly_table_hit(table.lookup(42.3, 1.1), PROFILE, Physics())
+    assert result.best_x_hit > 42.3
+    assert result.best_y_hit == pytest.approx(1.1, abs=0.01)
+
+
+def _load(config_path, profile, **kwargs):
+    return load_or_build_table(profile, Physics(), config_path, x_range=X_RANGE, y_range=Y_RANGE, **kwargs)
+
+
+def test_table_is_rebuilt_when_the_profile_changes(tmp_path, capsys):
+    config_path = tmp_path / 'arrows.json'
+    first = _load(config_path, PROFILE, cache_dir=None)
+    assert 'Building' in capsys.readouterr().err
+    assert [p.name for p in tmp_path.glob('*.npy')] == [f"arrows_default_{first.key}.npy"]
+
+    again = _load(config_path, PROFILE, cache_dir=None)
+    assert 'Building' not in capsys.readouterr().err
+    np.testing.assert_array_equal(again.values, first.values)
+
+    changed = _load(config_path, replace(PROFILE, cw=0.3), cache_dir=None)
+    assert 'Building' in capsys.readouterr().err
+    assert changed.key != first.key
+    # the stale table of the old entry is removed
+    assert [p.name for p in tmp_path.glob('*.npy')] == [f"arrows_default_{changed.key}.npy"]
+
+
+def test_read_only_config_dir_falls_back_to_the_cache_dir(tmp_path, monkeypatch):
+    config_dir, cache_dir = tmp_path / 'config', tmp_path / 'cache'
+    config_dir.mkdir()
+    writable = flight_table._writable_dir
+    monkeypatch.setattr(flight_table, '_writable_dir', lambda path: path != config_dir and writable(path))
+
+    table = _load(config_dir / 'arrows.json', PROFILE, cache_dir=cache_dir)
+    assert (cache_dir / 'tables' / f"arrows_default_{table.key}.npy").exists()
+    assert not list(config_dir.iterdir())
+    assert _load(config_dir / 'arrows.json', PROFILE, cache_dir=None, keep_unsaved=False) is None